@@ -0,0 +1 @@
+"""Бенчмарки Forex News Trading Bot."""
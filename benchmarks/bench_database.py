@@ -0,0 +1,100 @@
+"""Бенчмарк bot/database.py: задержка add_event / list_events на 10k и 100k строк.
+
+Запуск: python -m benchmarks.bench_database [--sizes 10000 100000]
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from bot import database
+
+SYMBOLS = ["EURUSD", "GBPUSD", "USDJPY", "USDCHF", "AUDUSD", "USDCAD", "NZDUSD"]
+
+
+def _fill(rows: int, active_share: float) -> None:
+    """Заполнить таблицу: прошедшие новости неактивны, будущие — активны."""
+    conn = database.init_db()
+    base = datetime(2020, 1, 1)
+    data = [
+        (
+            (base + timedelta(minutes=15 * i)).isoformat(),
+            random.choice(SYMBOLS),
+            "",
+            int(i >= rows * (1 - active_share)),
+        )
+        for i in range(rows)
+    ]
+    with conn:
+        conn.executemany(
+            "INSERT INTO events (event_date, symbol, description, active) "
+            "VALUES (?, ?, ?, ?)",
+            data,
+        )
+
+
+def _measure(fn: Callable[[], object], repeat: int) -> dict[str, float]:
+    samples: list[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": statistics.median(samples),
+        "p95_ms": samples[int(len(samples) * 0.95) - 1],
+        "max_ms": samples[-1],
+    }
+
+
+def run(sizes: list[int], active_share: float) -> None:
+    print(f"{'rows':>8} {'operation':<22} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            database.init_db(Path(tmp) / "bench.db")
+            _fill(rows, active_share)
+            # (event_date, symbol) уникальны — каждая вставка на новую минуту
+            minutes = iter(range(10**9))
+            start = datetime(2030, 1, 1)
+            results = {
+                "add_event": _measure(
+                    lambda: database.add_event(
+                        start + timedelta(minutes=next(minutes)), "EURUSD"
+                    ),
+                    repeat=1000,
+                ),
+                "list_events(active)": _measure(
+                    lambda: database.list_events(only_active=True), repeat=20
+                ),
+                "list_events(all)": _measure(
+                    lambda: database.list_events(only_active=False), repeat=5
+                ),
+            }
+            database.close_db()
+        for name, r in results.items():
+            print(
+                f"{rows:>8} {name:<22} "
+                f"{r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['max_ms']:>9.3f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument(
+        "--active-share",
+        type=float,
+        default=0.05,
+        help="доля активных (будущих) новостей в таблице",
+    )
+    args = parser.parse_args()
+    run(args.sizes, args.active_share)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Нагрузочный бенчмарк TradingScheduler: N одновременных новостей.
+
+Demo MT5Client с искусственной задержкой каждого вызова (в потоке шлюза),
+сжатое время: окно торговли — секунды вместо минут, интервал перестановки
+— доли секунды. Перестановка на каждом тике (порог сдвига и лимит
+модификаций отключены), поэтому интервал между модификациями одного
+ордера должен быть равен интервалу опроса; превышение — «проскальзывание»
+перестановок. Измеряются джиттер перестановок, модификаций в секунду,
+лаг event loop (перцентили), разброс выставления (от первого до
+последнего подтверждённого ордера) и CPU/память на задачу.
+
+Результат — JSON (по объекту на N), для сравнения между версиями.
+
+Запуск: python -m benchmarks.bench_scheduler [--tasks 1 10 100 500]
+    [--latency-ms 2] [--window 5] [--interval 0.1] [--out result.json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import partial
+from pathlib import Path
+
+from bot.config import settings
+from bot.models import NewsEvent, TradeState
+from bot.mt5_client import MT5Client
+from bot.mt5_gateway import MT5Gateway
+from bot.repository import EventRepository
+from bot.requote import AdaptiveRequotePolicy
+from bot.scheduler import TradingScheduler
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+
+class LatencyMT5Client(MT5Client):
+    """Demo-клиент: каждый вызов терминала ждёт latency секунд."""
+
+    def __init__(self, latency: float) -> None:
+        super().__init__()
+        self._demo = True
+        self.latency = latency
+        self.modifies: dict[int, list[float]] = defaultdict(list)
+        self.placed: int = 0
+        self.acks: list[float] = []  # время подтверждения выставленных ордеров
+        self._lock = threading.Lock()
+
+    def get_quote(self, symbol: str) -> tuple[float, float] | None:
+        time.sleep(self.latency)
+        return super().get_quote(symbol)
+
+    def place_buy_stop(self, symbol: str, price: float, lot: float) -> int | None:
+        time.sleep(self.latency)
+        self.placed += 1
+        ticket = super().place_buy_stop(symbol, price, lot)
+        self.acks.append(time.perf_counter())
+        return ticket
+
+    def place_sell_stop(self, symbol: str, price: float, lot: float) -> int | None:
+        time.sleep(self.latency)
+        self.placed += 1
+        ticket = super().place_sell_stop(symbol, price, lot)
+        self.acks.append(time.perf_counter())
+        return ticket
+
+    def modify_order(self, ticket: int, new_price: float) -> bool:
+        time.sleep(self.latency)
+        with self._lock:
+            self.modifies[ticket].append(time.perf_counter())
+        return super().modify_order(ticket, new_price)
+
+    def cancel_order(self, ticket: int) -> bool:
+        time.sleep(self.latency)
+        return super().cancel_order(ticket)
+
+
+class _NullRepository(EventRepository):
+    """Хранилище без БД."""
+
+    async def list_events(self, only_active: bool = True) -> list[NewsEvent]:
+        return []
+
+    async def deactivate_event(self, event_id: int) -> None:
+        return None
+
+    async def list_trades(self) -> list[TradeState]:
+        return []
+
+    def save_trade(self, state: TradeState) -> None:
+        return None
+
+    def finish_trade(self, event_id: int) -> None:
+        return None
+
+
+def _percentiles(samples: list[float], scale: float = 1000.0) -> dict[str, float]:
+    """p50/p95/p99/max в миллисекундах."""
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+
+    def at(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * scale
+
+    return {
+        "p50": statistics.median(ordered) * scale,
+        "p95": at(0.95),
+        "p99": at(0.99),
+        "max": ordered[-1] * scale,
+    }
+
+
+async def _sample_lag(samples: list[float], interval: float) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - started - interval))
+
+
+def _max_rss_kb() -> int:
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # macOS — в байтах
+
+
+async def run_once(
+    tasks: int, symbols: int, latency: float, window: float, interval: float
+) -> dict[str, object]:
+    """Один прогон: tasks новостей, выходящих одновременно."""
+    settings.pre_news_seconds = int(window) if window >= 1 else 1
+    client = LatencyMT5Client(latency)
+    gateway = MT5Gateway(client, timeout=max(2.0, window))
+    gateway.start()
+    policy = partial(
+        AdaptiveRequotePolicy,
+        min_points=0,
+        base_interval=interval,
+        fast_interval=interval,
+        max_interval=interval,
+        fast_window=0,
+        max_per_second=1e9,
+    )
+    scheduler = TradingScheduler(gateway, _NullRepository(), policy_factory=policy)
+    await scheduler.start()
+
+    lag: list[float] = []
+    lag_task = asyncio.create_task(_sample_lag(lag, 0.05))
+    rss_before = _max_rss_kb()
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+
+    release = datetime.now() + timedelta(seconds=settings.pre_news_seconds + 0.5)
+    for i in range(tasks):
+        scheduler.schedule(
+            NewsEvent(id=i + 1, event_date=release, symbol=f"SYM{i % symbols:03d}")
+        )
+    # Ждём запуска и завершения всех задач
+    while scheduler.get_active_count() < tasks and datetime.now() < release:
+        await asyncio.sleep(0.05)
+    while scheduler.get_active_count():
+        await asyncio.sleep(0.05)
+
+    wall = time.perf_counter() - wall_before
+    cpu = time.process_time() - cpu_before
+    rss_growth = _max_rss_kb() - rss_before
+    lag_task.cancel()
+    await asyncio.gather(lag_task, return_exceptions=True)
+    await scheduler.stop()
+    gateway.stop()
+
+    gaps = [
+        b - a
+        for stamps in client.modifies.values()
+        for a, b in zip(stamps, stamps[1:])
+    ]
+    jitter = [gap - interval for gap in gaps]
+    modifies = sum(len(stamps) for stamps in client.modifies.values())
+    return {
+        "tasks": tasks,
+        "symbols": min(symbols, tasks),
+        "latency_ms": latency * 1000,
+        "interval_ms": interval * 1000,
+        "window_s": settings.pre_news_seconds,
+        "orders_placed": client.placed,
+        "placement_spread_ms": (max(client.acks) - min(client.acks)) * 1000
+        if client.acks
+        else 0.0,
+        "modifies": modifies,
+        "modifies_per_sec": modifies / settings.pre_news_seconds,
+        "requote_gap_ms": _percentiles(gaps),
+        "requote_jitter_ms": _percentiles(jitter),
+        "loop_lag_ms": _percentiles(lag),
+        "gateway_timeouts": gateway.timeouts,
+        "cpu_ms_per_task": cpu / tasks * 1000,
+        "cpu_share": cpu / wall,
+        "max_rss_growth_kb_per_task": rss_growth / tasks,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument(
+        "--symbols", type=int, default=0, help="символов (0 — свой на каждую задачу)"
+    )
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--window", type=float, default=5.0, help="окно торговли, сек")
+    parser.add_argument("--interval", type=float, default=0.1, help="перестановка, сек")
+    parser.add_argument("--out", type=Path, default=None, help="сохранить JSON")
+    args = parser.parse_args()
+    # Таймауты шлюза под нагрузкой ожидаемы — считаем их, а не логируем
+    logging.basicConfig(level=logging.ERROR)
+
+    results = []
+    print(
+        f"{'tasks':>6} {'placed':>7} {'spread':>8} {'mod/s':>8} {'jit p50':>8} "
+        f"{'jit p99':>8} {'lag p99':>8} {'timeouts':>8} {'cpu ms':>8} {'rss kb':>8}",
+        file=sys.stderr,
+    )
+    for tasks in args.tasks:
+        r = asyncio.run(
+            run_once(
+                tasks,
+                args.symbols or tasks,
+                args.latency_ms / 1000,
+                args.window,
+                args.interval,
+            )
+        )
+        results.append(r)
+        jitter, lag = r["requote_jitter_ms"], r["loop_lag_ms"]
+        assert isinstance(jitter, dict) and isinstance(lag, dict)
+        print(
+            f"{tasks:>6} {r['orders_placed']:>7} {r['placement_spread_ms']:>8.1f} "
+            f"{r['modifies_per_sec']:>8.1f} "
+            f"{jitter['p50']:>8.1f} {jitter['p99']:>8.1f} {lag['p99']:>8.1f} "
+            f"{r['gateway_timeouts']:>8} {r['cpu_ms_per_task']:>8.1f} "
+            f"{r['max_rss_growth_kb_per_task']:>8.1f}",
+            file=sys.stderr,
+        )
+
+    report = {
+        "benchmark": "scheduler",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Бенчмарк задержки команды Telegram: long polling против webhook.
+
+Локальный фейковый сервер Bot API (getMe, getUpdates, setWebhook,
+deleteWebhook, sendMessage) в отдельном потоке со своим event loop;
+каждый переход «сети» между ним и ботом задерживается на половину
+--rtt-ms. Бот — настоящее Application с обработчиком /start из
+bot.handlers: в режиме polling — Updater с getUpdates, как run_polling,
+в режиме webhook — WebhookServer, как run_webhook. Время круга — от
+появления команды на «сервере Telegram» до прихода ответа sendMessage.
+Меряются серия одиночных команд и залп --burst одновременных.
+
+Результат — JSON (по объекту на режим), для сравнения между версиями.
+
+Запуск: python -m benchmarks.bench_telegram [--commands 50] [--burst 20]
+    [--rtt-ms 50] [--out result.json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import socket
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl
+
+import httpx
+from telegram.ext import ApplicationBuilder, CommandHandler
+
+from bot.handlers import cmd_start
+from bot.webhook import SECRET_HEADER, WebhookServer
+
+TOKEN = "123456:bench"
+SECRET = "bench-secret"
+
+
+class FakeTelegram:
+    """Фейковый сервер Bot API с задержкой сети."""
+
+    def __init__(self, rtt: float) -> None:
+        self.delay = rtt / 2  # в одну сторону
+        self.port = _free_port()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._updates: list[dict[str, Any]] = []
+        self._update_id = 0
+        self._arrived: asyncio.Event | None = None
+        self._webhook: str | None = None
+        self._secret = ""
+        self._client: httpx.AsyncClient | None = None
+        self._server: asyncio.Server | None = None
+        self._replies: dict[int, asyncio.Future[float]] = {}
+        self._connections: dict[asyncio.Task[None], asyncio.StreamWriter] = {}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/bot"
+
+    def start(self) -> None:
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+    async def round_trip(self, chat_id: int) -> float:
+        """Отправить боту /start и дождаться ответа (из loop бота)."""
+        future = asyncio.run_coroutine_threadsafe(self._command(chat_id), self.loop)
+        return await asyncio.wrap_future(future)
+
+    async def _start(self) -> None:
+        self._arrived = asyncio.Event()
+        self._client = httpx.AsyncClient()
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", self.port)
+
+    async def _stop(self) -> None:
+        assert self._server is not None
+        assert self._client is not None and self._arrived is not None
+        self._server.close()
+        await self._client.aclose()
+        for writer in self._connections.values():
+            writer.close()
+        self._arrived.set()  # отпустить висящий getUpdates
+        await asyncio.gather(*self._connections, return_exceptions=True)
+
+    async def _command(self, chat_id: int) -> float:
+        started = time.perf_counter()
+        reply = self._replies[chat_id] = self.loop.create_future()
+        self._update_id += 1
+        update = _command_update(self._update_id, chat_id)
+        if self._webhook is not None:
+            asyncio.create_task(self._deliver(update))
+        else:
+            self._updates.append(update)
+            assert self._arrived is not None
+            self._arrived.set()
+        return await reply - started
+
+    async def _deliver(self, update: dict[str, Any]) -> None:
+        assert self._client is not None and self._webhook is not None
+        await asyncio.sleep(self.delay)
+        await self._client.post(
+            self._webhook, json=update, headers={SECRET_HEADER: self._secret}
+        )
+
+    async def _get_updates(self, params: dict[str, str]) -> list[dict[str, Any]]:
+        assert self._arrived is not None
+        offset = int(params.get("offset", "0"))
+        self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        if not self._updates:
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(
+                    self._arrived.wait(), float(params.get("timeout", "0"))
+                )
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:100]
+
+    async def _call(self, method: str, params: dict[str, str]) -> Any:
+        if method == "getMe":
+            return {"id": 1, "is_bot": True, "first_name": "bench", "username": "b"}
+        if method == "getUpdates":
+            return await self._get_updates(params)
+        if method == "setWebhook":
+            self._webhook = params["url"]
+            self._secret = params.get("secret_token", "")
+            return True
+        if method == "deleteWebhook":
+            self._webhook = None
+            return True
+        if method == "sendMessage":
+            chat_id = int(params["chat_id"])
+            reply = self._replies.pop(chat_id, None)
+            if reply is not None:
+                reply.set_result(time.perf_counter())
+            return {
+                "message_id": chat_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": params.get("text", ""),
+            }
+        return True
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        assert task is not None
+        self._connections[task] = writer
+        try:
+            while request_line := await reader.readline():
+                target = request_line.decode().split(" ")[1]
+                length = 0
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                body = await reader.readexactly(length)
+                await asyncio.sleep(self.delay)  # запрос бота идёт по сети
+                params = dict(parse_qsl(body.decode()))
+                result = await self._call(target.rsplit("/", 1)[-1], params)
+                await asyncio.sleep(self.delay)  # ответ идёт обратно
+                payload = json.dumps({"ok": True, "result": result}).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(payload)}\r\n\r\n".encode()
+                    + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port: int = s.getsockname()[1]
+        return port
+
+
+def _command_update(update_id: int, chat_id: int) -> dict[str, Any]:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "bench"},
+            "text": "/start",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+        },
+    }
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    ms = sorted(v * 1000 for v in values)
+    return {
+        "p50": round(statistics.median(ms), 2),
+        "p99": round(ms[min(len(ms) - 1, int(len(ms) * 0.99))], 2),
+        "max": round(ms[-1], 2),
+    }
+
+
+async def run_mode(
+    mode: str, fake: FakeTelegram, commands: int, burst: int
+) -> dict[str, object]:
+    builder = ApplicationBuilder().token(TOKEN).base_url(fake.base_url)
+    if mode == "webhook":
+        builder = builder.updater(None)
+    app = builder.build()
+    app.add_handler(CommandHandler("start", cmd_start))
+
+    await app.initialize()
+    webhook: WebhookServer | None = None
+    if mode == "webhook":
+        port = _free_port()
+        webhook = WebhookServer(app, "/telegram", SECRET)
+        await webhook.start("127.0.0.1", port)
+        await app.bot.set_webhook(
+            f"http://127.0.0.1:{port}/telegram", secret_token=SECRET
+        )
+    else:
+        assert app.updater is not None
+        await app.updater.start_polling(poll_interval=0.0, timeout=10)
+    await app.start()
+
+    chat_ids = iter(range(1, commands + burst + 1))
+    single = [await fake.round_trip(next(chat_ids)) for _ in range(commands)]
+    started = time.perf_counter()
+    bursty = await asyncio.gather(
+        *(fake.round_trip(next(chat_ids)) for _ in range(burst))
+    )
+    burst_total = time.perf_counter() - started
+
+    if webhook is not None:
+        await webhook.stop()
+    elif app.updater is not None:
+        await app.updater.stop()
+    await app.stop()
+    await app.shutdown()
+    return {
+        "mode": mode,
+        "single_ms": _percentiles(single),
+        "burst_ms": _percentiles(list(bursty)),
+        "burst_total_ms": round(burst_total * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--commands", type=int, default=50, help="одиночных команд")
+    parser.add_argument("--burst", type=int, default=20, help="команд в залпе")
+    parser.add_argument("--rtt-ms", type=float, default=50.0, help="RTT до Telegram")
+    parser.add_argument("--out", type=Path, default=None, help="сохранить JSON")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    results = []
+    print(
+        f"{'mode':>8} {'p50':>8} {'p99':>8} {'burst p50':>10} {'burst p99':>10} "
+        f"{'burst ms':>9}",
+        file=sys.stderr,
+    )
+    for mode in ("polling", "webhook"):
+        fake = FakeTelegram(args.rtt_ms / 1000)
+        fake.start()
+        try:
+            r = asyncio.run(run_mode(mode, fake, args.commands, args.burst))
+        finally:
+            fake.stop()
+        results.append(r)
+        single, bursty = r["single_ms"], r["burst_ms"]
+        assert isinstance(single, dict) and isinstance(bursty, dict)
+        print(
+            f"{mode:>8} {single['p50']:>8.1f} {single['p99']:>8.1f} "
+            f"{bursty['p50']:>10.1f} {bursty['p99']:>10.1f} "
+            f"{r['burst_total_ms']:>9.1f}",
+            file=sys.stderr,
+        )
+
+    report = {
+        "benchmark": "telegram",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rtt_ms": args.rtt_ms,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
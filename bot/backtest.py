@@ -0,0 +1,388 @@
+"""Бэктест стратегии на записанных тиках.
+
+Прогоняет ту же логику TradingScheduler._trade_on_news (отступ, лот,
+перестановки, фиксация в момент новости) на тиковых файлах
+(bot/tickfile.py) быстрее реального времени: event loop с виртуальным
+временем, MT5Client, отдающий тики по этим часам, и симулятор
+исполнения стоп-ордеров.
+
+Каждый файл — окно вокруг одной новости, в метаданных symbol и
+event_date (ISO). CLI: python -m bot.backtest ticks/*.tick
+"""
+
+import argparse
+import asyncio
+import csv
+import logging
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from bot import tickfile
+from bot.clock import Clock, VirtualClock, VirtualTimeLoop
+from bot.config import settings
+from bot.event_index import start_time_of
+from bot.market_sim import MarketEngine, TickRow
+from bot.models import NewsEvent, TradeState
+from bot.mt5_client import MT5Client, OrderBook, OrderRecord, Position
+from bot.mt5_gateway import MT5Gateway
+from bot.repository import EventRepository
+from bot.scheduler import TradingScheduler
+from bot.symbols import SymbolInfo
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Fill:
+    """Исполнение стоп-ордера."""
+
+    ticket: int
+    symbol: str
+    order_type: str
+    order_price: float
+    fill_price: float
+    time_ns: int
+    lot: float = 0.0
+
+    @property
+    def slippage(self) -> float:
+        """Проскальзывание в цене (положительное — хуже заявленной)."""
+        if self.order_type == "BUY_STOP":
+            return self.fill_price - self.order_price
+        return self.order_price - self.fill_price
+
+
+class TickSeries:
+    """Тики одного символа: колонки time_ns / bid / ask."""
+
+    def __init__(self, arrays: dict[str, np.ndarray]) -> None:
+        self.time_ns = arrays["time_ns"]
+        self.bid = arrays["bid"]
+        self.ask = arrays["ask"]
+
+    def index_at(self, time_ns: int) -> int:
+        """Число тиков с временем <= time_ns."""
+        return int(np.searchsorted(self.time_ns, time_ns, side="right"))
+
+
+class StopFillSimulator:
+    """Исполнение стоп-ордеров по тикам.
+
+    Buy Stop срабатывает при ask >= цены, Sell Stop — при bid <= цены;
+    исполнение по цене сработавшего тика.
+    """
+
+    def check(
+        self, book: OrderBook, symbol: str, series: TickSeries, i0: int, i1: int
+    ) -> list[Fill]:
+        """Проверить ордера символа на тиках [i0, i1), исполненные убрать из книги."""
+        fills: list[Fill] = []
+        if i1 <= i0:
+            return fills
+        for order in book:
+            if order.symbol != symbol:
+                continue
+            if order.order_type == "BUY_STOP":
+                hit = series.ask[i0:i1] >= order.price
+                prices = series.ask
+            else:
+                hit = series.bid[i0:i1] <= order.price
+                prices = series.bid
+            if not hit.any():
+                continue
+            i = i0 + int(hit.argmax())
+            book.remove(order.ticket)
+            fills.append(
+                Fill(
+                    order.ticket,
+                    symbol,
+                    order.order_type,
+                    order.price,
+                    float(prices[i]),
+                    int(series.time_ns[i]),
+                    order.lot,
+                )
+            )
+        return fills
+
+
+class ReplayMT5Client(MT5Client):
+    """MT5Client, воспроизводящий записанные тики по (виртуальным) часам.
+
+    Ордера ведёт demo-«брокер» (OrderBook), перед каждым вызовом он
+    прогоняется через симулятор исполнения на тиках с прошлого вызова.
+    Исполненный ордер, как в demo, становится позицией с его ticket.
+    """
+
+    def __init__(self, clock: Clock) -> None:
+        # Котировки и исполнение — из записанных тиков, а не из симулятора
+        super().__init__(MarketEngine())
+        self._demo = True
+        self.clock = clock
+        self.simulator = StopFillSimulator()
+        self.fills: list[Fill] = []
+        self.placed: list[OrderRecord] = []
+        self.modifies: int = 0
+        self._series: dict[str, TickSeries] = {}
+        self._cursor: dict[str, int] = {}
+        self._infos: dict[str, SymbolInfo] = {}
+
+    def load(
+        self, symbol: str, arrays: dict[str, np.ndarray], info: SymbolInfo
+    ) -> None:
+        """Подключить тики и спецификацию символа (заменяет предыдущие)."""
+        self._series[symbol] = TickSeries(arrays)
+        self._cursor[symbol] = 0
+        self._infos[symbol] = info
+
+    def symbol_info(self, symbol: str) -> SymbolInfo | None:
+        return self._infos.get(symbol) or SymbolInfo.guess(symbol)
+
+    def advance(self) -> None:
+        """Прогнать исполнение ордеров до текущего момента часов."""
+        now_ns = self.clock.time_ns()
+        for symbol, series in self._series.items():
+            i1 = series.index_at(now_ns)
+            i0 = self._cursor[symbol]
+            if i1 > i0:
+                fills = self.simulator.check(self._mock_orders, symbol, series, i0, i1)
+                for fill in fills:
+                    side = "BUY" if fill.order_type == "BUY_STOP" else "SELL"
+                    self._mock_positions[fill.ticket] = Position(
+                        fill.ticket,
+                        symbol,
+                        side,
+                        fill.lot,
+                        fill.fill_price,
+                        fill.time_ns / 1e9,
+                    )
+                self.fills += fills
+                self._cursor[symbol] = i1
+
+    def _sync_demo(self) -> None:
+        self.advance()
+
+    def pending(self, ticket: int) -> OrderRecord | None:
+        """Ордер, ещё стоящий у «брокера» (не исполнен и не снят)."""
+        return self._mock_orders.get(ticket)
+
+    def get_quote(self, symbol: str) -> tuple[float, float] | None:
+        self.advance()
+        return self._market(symbol)
+
+    def _market(self, symbol: str) -> tuple[float, float] | None:
+        series = self._series.get(symbol)
+        if series is None:
+            return None
+        i = series.index_at(self.clock.time_ns()) - 1
+        return (float(series.bid[i]), float(series.ask[i])) if i >= 0 else None
+
+    def copy_ticks(self, symbol: str, since_msc: int) -> list[TickRow]:
+        self.advance()
+        series = self._series.get(symbol)
+        if series is None:
+            return []
+        # Тики строго позже since_msc: пропускаем всю его миллисекунду
+        i1 = series.index_at(self.clock.time_ns())
+        i0 = i1 - 1
+        if since_msc > 0:
+            i0 = series.index_at((since_msc + 1) * 1_000_000 - 1)
+        i0 = max(i0, 0, i1 - settings.stream_batch)
+        time_ms = series.time_ns[i0:i1] // 1_000_000
+        return list(
+            zip(
+                time_ms.tolist(),
+                series.bid[i0:i1].tolist(),
+                series.ask[i0:i1].tolist(),
+            )
+        )
+
+    def place_buy_stop(self, symbol: str, price: float, lot: float) -> int | None:
+        self.advance()
+        ticket = super().place_buy_stop(symbol, price, lot)
+        if ticket is not None:
+            self.placed.append(OrderRecord(ticket, symbol, "BUY_STOP", price, lot))
+        return ticket
+
+    def place_sell_stop(self, symbol: str, price: float, lot: float) -> int | None:
+        self.advance()
+        ticket = super().place_sell_stop(symbol, price, lot)
+        if ticket is not None:
+            self.placed.append(OrderRecord(ticket, symbol, "SELL_STOP", price, lot))
+        return ticket
+
+    def modify_order(self, ticket: int, new_price: float) -> bool:
+        self.advance()
+        self.modifies += 1
+        return super().modify_order(ticket, new_price)
+
+    def cancel_order(self, ticket: int) -> bool:
+        self.advance()
+        return super().cancel_order(ticket)
+
+
+class _ReplayRepository(EventRepository):
+    """Хранилище без БД: бэктесту нужна только деактивация."""
+
+    async def deactivate_event(self, event_id: int) -> None:
+        return None
+
+    def save_trade(self, state: TradeState) -> None:
+        return None
+
+    def finish_trade(self, event_id: int) -> None:
+        return None
+
+
+# Окно новости: событие, колонки тиков и спецификация символа
+Window = tuple[NewsEvent, dict[str, np.ndarray], SymbolInfo]
+
+
+@dataclass
+class ReleaseResult:
+    """Итог по одной новости."""
+
+    symbol: str
+    event_date: datetime
+    point: float  # размер пункта символа
+    buy_price: float | None = None  # цена Buy Stop в момент новости
+    sell_price: float | None = None
+    modifies: int = 0
+    fills: list[Fill] = field(default_factory=list)
+
+    def fill_delay(self, fill: Fill) -> float:
+        """Секунд от новости до исполнения."""
+        return fill.time_ns / 1e9 - self.event_date.timestamp()
+
+
+async def _replay(
+    windows: list[Window],
+    scheduler: TradingScheduler,
+    client: ReplayMT5Client,
+    clock: Clock,
+    post_seconds: float,
+) -> list[ReleaseResult]:
+    results: list[ReleaseResult] = []
+    for event, arrays, info in windows:
+        client.load(event.symbol, arrays, info)
+        client.placed.clear()
+        client.fills.clear()
+        client.modifies = 0
+        await clock.sleep_until(start_time_of(event))
+        await scheduler._trade_on_news(event)
+
+        result = ReleaseResult(event.symbol, event.event_date, info.point)
+        for order in client.placed:
+            live = client.pending(order.ticket)
+            price = live.price if live is not None else None
+            if order.order_type == "BUY_STOP":
+                result.buy_price = price
+            else:
+                result.sell_price = price
+
+        # Досматриваем окно после новости и снимаем неисполненное
+        await clock.sleep_until(event.event_date + timedelta(seconds=post_seconds))
+        client.advance()
+        for order in client.placed:
+            if client.pending(order.ticket) is not None:
+                client.cancel_order(order.ticket)
+        result.modifies = client.modifies
+        result.fills = list(client.fills)
+        results.append(result)
+    return results
+
+
+def load_windows(paths: list[Path]) -> list[Window]:
+    """Прочитать тиковые файлы и построить события по их метаданным."""
+    windows: list[Window] = []
+    for i, path in enumerate(paths, 1):
+        arrays, meta = tickfile.read(path)
+        if "symbol" not in meta or "event_date" not in meta:
+            logger.warning("%s: нет symbol/event_date в метаданных — пропуск", path)
+            continue
+        event = NewsEvent(
+            id=i,
+            event_date=datetime.fromisoformat(str(meta["event_date"])),
+            symbol=str(meta["symbol"]).upper(),
+        )
+        windows.append((event, arrays, SymbolInfo.from_meta(event.symbol, meta)))
+    windows.sort(key=lambda w: w[0].event_date)
+    return windows
+
+
+def run_backtest(paths: list[Path], post_seconds: float = 60.0) -> list[ReleaseResult]:
+    """Прогнать бэктест по тиковым файлам."""
+    windows = load_windows(paths)
+    if not windows:
+        return []
+    loop = VirtualTimeLoop()
+    origin = start_time_of(windows[0][0]) - timedelta(seconds=1)
+    clock = VirtualClock(loop, origin)
+    client = ReplayMT5Client(clock)
+    gateway = MT5Gateway(client, inline=True)
+    gateway.start()
+    scheduler = TradingScheduler(gateway, _ReplayRepository(), clock=clock)
+    try:
+        return loop.run_until_complete(
+            _replay(windows, scheduler, client, clock, post_seconds)
+        )
+    finally:
+        scheduler.feed.stop()
+        loop.run_until_complete(asyncio.sleep(0))
+        loop.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бэктест на записанных тиках")
+    parser.add_argument("paths", type=Path, nargs="+")
+    parser.add_argument(
+        "--post-seconds", type=float, default=60.0, help="окно после новости, сек"
+    )
+    parser.add_argument("--csv", type=Path, default=None, help="сохранить итоги в CSV")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    started = time.perf_counter()
+    results = run_backtest(args.paths, args.post_seconds)
+    elapsed = time.perf_counter() - started
+
+    rows: list[list[object]] = []
+    for r in results:
+        point = r.point
+        if not r.fills:
+            rows.append(
+                [r.event_date.isoformat(), r.symbol, "", "", "", "", r.modifies]
+            )
+        for fill in r.fills:
+            rows.append(
+                [
+                    r.event_date.isoformat(),
+                    r.symbol,
+                    fill.order_type,
+                    f"{fill.fill_price:.5f}",
+                    f"{fill.slippage / point:.1f}",
+                    f"{r.fill_delay(fill):.3f}",
+                    r.modifies,
+                ]
+            )
+    header = ["event_date", "symbol", "side", "fill", "slip_pts", "delay_s", "modifies"]
+    out = csv.writer(args.csv.open("w", newline="") if args.csv else sys.stdout)
+    out.writerow(header)
+    out.writerows(rows)
+
+    fills = [f for r in results for f in r.fills]
+    print(
+        f"\nНовостей: {len(results)}, исполнений: {len(fills)}, "
+        f"обе стороны: {sum(len(r.fills) == 2 for r in results)}, "
+        f"время: {elapsed:.2f} сек",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Пакетный импорт экономического календаря из CSV или ICS.
+
+Документ разбирается потоково (построчно), строки валидируются в
+NewsEvent и вставляются пачками через executemany в одной транзакции.
+Дубли по (event_date, symbol) отсекает уникальный индекс.
+
+CSV: заголовок с колонками date,time,symbol[,description] или
+event_date,symbol[,description]. ICS: VEVENT с DTSTART, SUMMARY и
+символом в X-SYMBOL (или CATEGORIES), иначе используется default_symbol.
+
+CLI: python -m bot.calendar_import calendar.csv [--symbol EURUSD] [--db path]
+"""
+
+import argparse
+import csv
+import itertools
+import sqlite3
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import NamedTuple
+from zoneinfo import ZoneInfo
+
+from pydantic import ValidationError
+
+from bot import database
+from bot.models import NewsEvent
+
+BATCH_SIZE = 1000
+MAX_ERRORS = 10  # сколько ошибок разбора сохранять в отчёте
+
+
+@dataclass
+class ImportReport:
+    """Итоги импорта."""
+
+    rows: int = 0  # прочитано записей
+    inserted: int = 0
+    duplicates: int = 0
+    past: int = 0  # новость уже прошла
+    invalid: int = 0
+    seconds: float = 0.0
+    errors: list[str] = field(default_factory=list)
+
+    def error(self, line: int, message: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"строка {line}: {message}")
+
+    def summary(self) -> str:
+        """Текстовый отчёт для чата и CLI."""
+        text = (
+            f"Прочитано: {self.rows}\n"
+            f"Добавлено: {self.inserted}\n"
+            f"Дубли: {self.duplicates}\n"
+            f"Прошедшие: {self.past}\n"
+            f"Ошибки: {self.invalid}\n"
+            f"Время: {self.seconds:.2f} сек"
+        )
+        if self.errors:
+            text += "\n\n" + "\n".join(self.errors)
+        return text
+
+
+class Record(NamedTuple):
+    """Сырая запись календаря (или ошибка разбора)."""
+
+    line: int
+    date: str = ""
+    symbol: str = ""
+    description: str = ""
+    error: str = ""
+
+
+def _to_naive_local(dt: datetime) -> datetime:
+    """Расписание хранится в локальном времени без зоны."""
+    if dt.tzinfo is not None:
+        return dt.astimezone().replace(tzinfo=None)
+    return dt
+
+
+def iter_csv(lines: Iterable[str]) -> Iterator[Record]:
+    """Потоково прочитать CSV."""
+    reader = csv.DictReader(lines)
+    for record in reader:
+        line = reader.line_num
+        row = {(k or "").strip().lower(): (v or "").strip() for k, v in record.items()}
+        if row.get("event_date"):
+            date_str = row["event_date"]
+        elif row.get("date"):
+            date_str = f"{row['date']} {row.get('time', '')}".strip()
+        else:
+            yield Record(line, error="нет колонки date/event_date")
+            continue
+        yield Record(line, date_str, row.get("symbol", ""), row.get("description", ""))
+
+
+def _unfold(lines: Iterable[str]) -> Iterator[tuple[int, str]]:
+    """Склеить перенесённые строки ICS (RFC 5545, 3.1)."""
+    current: str | None = None
+    start = 0
+    for n, raw in enumerate(lines, 1):
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield start, current
+        current, start = line, n
+    if current is not None:
+        yield start, current
+
+
+def _parse_ics_date(value: str, params: str) -> datetime:
+    if value.endswith("Z"):
+        return datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+    if "T" in value:
+        dt = datetime.strptime(value, "%Y%m%dT%H%M%S")
+    else:
+        dt = datetime.strptime(value, "%Y%m%d")
+    if "TZID=" in params:
+        tzid = params.split("TZID=", 1)[1].split(";", 1)[0].strip('"')
+        dt = dt.replace(tzinfo=ZoneInfo(tzid))
+    return dt
+
+
+def iter_ics(lines: Iterable[str], default_symbol: str = "") -> Iterator[Record]:
+    """Потоково прочитать ICS: одна запись на VEVENT."""
+    event: dict[str, tuple[str, str]] | None = None  # имя -> (параметры, значение)
+    start = 0
+    for n, line in _unfold(lines):
+        if line == "BEGIN:VEVENT":
+            event, start = {}, n
+            continue
+        if event is None:
+            continue
+        if line == "END:VEVENT":
+            yield _ics_record(start, event, default_symbol)
+            event = None
+            continue
+        name, _, value = line.partition(":")
+        key, _, params = name.partition(";")
+        event[key.upper()] = (params, value)
+
+
+def _ics_record(
+    line: int, event: dict[str, tuple[str, str]], default_symbol: str
+) -> Record:
+    if "DTSTART" not in event:
+        return Record(line, error="нет DTSTART")
+    params, value = event["DTSTART"]
+    try:
+        date = _to_naive_local(_parse_ics_date(value, params))
+    except (ValueError, KeyError) as e:  # KeyError — неизвестная TZID
+        return Record(line, error=f"неверный DTSTART: {e}")
+    symbol = (
+        event.get("X-SYMBOL", ("", ""))[1]
+        or event.get("CATEGORIES", ("", ""))[1].split(",")[0]
+        or default_symbol
+    )
+    summary = event.get("SUMMARY", ("", ""))[1].replace("\\,", ",")
+    return Record(line, date.isoformat(), symbol, summary)
+
+
+def validate(
+    records: Iterable[Record], report: ImportReport, now: datetime
+) -> Iterator[tuple[str, str, str]]:
+    """Проверить записи через NewsEvent и отдать строки для INSERT."""
+    for record in records:
+        report.rows += 1
+        if record.error:
+            report.error(record.line, record.error)
+            continue
+        if not record.symbol:
+            report.error(record.line, "пустой символ")
+            continue
+        try:
+            event = NewsEvent(
+                event_date=_to_naive_local(datetime.fromisoformat(record.date)),
+                symbol=record.symbol.upper(),
+                description=record.description,
+            )
+        except (ValueError, ValidationError) as e:
+            report.error(record.line, str(e).splitlines()[0])
+            continue
+        if event.event_date < now:
+            report.past += 1
+            continue
+        yield event.event_date.isoformat(), event.symbol, event.description
+
+
+def import_records(conn: sqlite3.Connection, records: Iterable[Record]) -> ImportReport:
+    """Вставить записи пачками по BATCH_SIZE. Транзакцией управляет вызывающий."""
+    report = ImportReport()
+    started = time.perf_counter()
+    rows = validate(records, report, datetime.now())
+    valid = 0
+    while batch := list(itertools.islice(rows, BATCH_SIZE)):
+        valid += len(batch)
+        report.inserted += database.insert_events_ignore(conn, batch)
+    report.duplicates = valid - report.inserted
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def open_records(
+    stream: Iterable[str], name: str, default_symbol: str = ""
+) -> Iterator[Record]:
+    """Выбрать разборщик по расширению файла."""
+    if name.lower().endswith(".ics"):
+        return iter_ics(stream, default_symbol)
+    return iter_csv(stream)
+
+
+def import_file(
+    path: Path, default_symbol: str = "", db_path: Path | None = None
+) -> ImportReport:
+    """Импортировать локальный файл одной транзакцией."""
+    conn = database.connect(db_path)
+    try:
+        with conn:
+            return import_path(conn, path, default_symbol)
+    finally:
+        conn.close()
+
+
+def import_path(
+    conn: sqlite3.Connection, path: Path, default_symbol: str = "", name: str = ""
+) -> ImportReport:
+    """Потоково импортировать файл через переданное соединение."""
+    with path.open(encoding="utf-8-sig", newline="") as f:
+        return import_records(
+            conn, open_records(f, name or path.name, default_symbol)
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Импорт экономического календаря (CSV / ICS)"
+    )
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--symbol", default="", help="символ по умолчанию для ICS")
+    parser.add_argument("--db", type=Path, default=None, help="путь к events.db")
+    args = parser.parse_args()
+    print(import_file(args.path, args.symbol, args.db).summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Часы планировщика: системные и виртуальные (для бэктеста)."""
+
+import asyncio
+import selectors
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+# Сколько последних секунд перед дедлайном досыпать без таймера
+_SPIN_SECONDS = 0.02
+
+
+class Clock:
+    """Системные часы: datetime.now(), time.monotonic(), asyncio.sleep()."""
+
+    def now(self) -> datetime:
+        """Текущее время (локальное, без зоны — как в расписании)."""
+        return datetime.now()
+
+    def monotonic(self) -> float:
+        """Монотонное время в секундах."""
+        return time.monotonic()
+
+    def time(self) -> float:
+        """Время от эпохи в секундах (для перевода дат в monotonic)."""
+        return time.time()
+
+    def time_ns(self) -> int:
+        """Время от эпохи в наносекундах (метки тиков)."""
+        return time.time_ns()
+
+    def monotonic_at(self, when: datetime) -> float:
+        """Момент when на шкале monotonic().
+
+        Наивное время считается локальным (с учётом перехода на летнее
+        время); дальнейшие скачки системных часов на результат не влияют.
+        """
+        return self.monotonic() + when.astimezone().timestamp() - self.time()
+
+    async def sleep(self, seconds: float) -> None:
+        """Подождать seconds секунд."""
+        await asyncio.sleep(seconds)
+
+    async def sleep_until_monotonic(
+        self, deadline: float, precise: bool = False
+    ) -> None:
+        """Подождать до момента deadline шкалы monotonic().
+
+        Таймеры loop грубые (на Windows ~15 мс), поэтому при precise
+        последние _SPIN_SECONDS досыпаем, уступая loop на каждом проходе.
+        """
+        spin = _SPIN_SECONDS if precise else 0.0
+        delay = deadline - self.monotonic() - spin
+        if delay > 0:
+            await asyncio.sleep(delay)
+        while precise and self.monotonic() < deadline:
+            await asyncio.sleep(0)
+
+    async def sleep_until(self, when: datetime) -> None:
+        """Подождать до момента when (если он уже прошёл — сразу вернуться)."""
+        delay = (when - self.now()).total_seconds()
+        if delay > 0:
+            await self.sleep(delay)
+
+
+SYSTEM_CLOCK = Clock()
+
+
+class _VirtualSelector(selectors.DefaultSelector):  # type: ignore[misc,valid-type]
+    """Селектор, который вместо ожидания таймеров сдвигает виртуальное время."""
+
+    loop: "VirtualTimeLoop | None" = None
+
+    def select(self, timeout: float | None = None) -> Any:
+        if timeout is not None and timeout > 0 and self.loop is not None:
+            self.loop.advance(timeout)
+            timeout = 0
+        return super().select(timeout)
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """Event loop с виртуальным временем.
+
+    Когда готовых задач нет, loop не ждёт ближайший таймер, а мгновенно
+    переводит время на него. asyncio.sleep / wait_for / call_later работают
+    как обычно, но без реального ожидания. Вызовы, блокирующиеся в других
+    потоках, здесь использовать нельзя — время убежит вперёд.
+    """
+
+    def __init__(self) -> None:
+        selector = _VirtualSelector()
+        super().__init__(selector)
+        selector.loop = self
+        self._virtual_time: float = 0.0
+        # Разрешение таймеров: на виртуальных интервалах в месяцы шаг float
+        # превышает наносекунду, и таймер «ровно сейчас» иначе не сработает
+        self._clock_resolution = 1e-6
+
+    def time(self) -> float:
+        return self._virtual_time
+
+    def advance(self, seconds: float) -> None:
+        """Сдвинуть виртуальное время вперёд."""
+        self._virtual_time += seconds
+
+
+class VirtualClock(Clock):
+    """Часы поверх VirtualTimeLoop: now() = origin + время loop."""
+
+    def __init__(self, loop: VirtualTimeLoop, origin: datetime) -> None:
+        self.loop = loop
+        self.origin = origin
+        self._origin_ts = origin.timestamp()
+        self._origin_ns = int(self._origin_ts * 1e9)
+        self._t0 = loop.time()
+
+    def now(self) -> datetime:
+        return self.origin + timedelta(seconds=self.loop.time() - self._t0)
+
+    def monotonic(self) -> float:
+        return self.loop.time()
+
+    def time(self) -> float:
+        return self._origin_ts + self.loop.time() - self._t0
+
+    async def sleep_until_monotonic(
+        self, deadline: float, precise: bool = False
+    ) -> None:
+        # Виртуальные таймеры точны, а sleep(0) время не двигает
+        await asyncio.sleep(max(0.0, deadline - self.loop.time()))
+
+    def time_ns(self) -> int:
+        return self._origin_ns + int((self.loop.time() - self._t0) * 1e9)
@@ -1,30 +1,109 @@
 """Конфигурация бота."""
 
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 
 
+class AccountConfig(BaseModel):
+    """Счёт MT5 для многосчётного режима (свой терминал и процесс)."""
+
+    name: str
+    login: int = 0
+    password: str = ""
+    server: str = ""
+    path: str = ""  # путь к terminal64.exe этого счёта
+    symbols: list[str] = []  # закреплённые символы; пусто — все остальные
+
+
 class Settings(BaseSettings):
     """Настройки приложения из переменных окружения."""
 
     # Telegram (принимает TELEGRAM_TOKEN или BOT_TOKEN)
     telegram_token: str = ""
     bot_token: str = ""
+    list_page_size: int = 20  # новостей на странице /list
+    telegram_api_url: str = ""  # свой сервер Bot API; пусто — api.telegram.org
+    # Webhook вместо long polling (bot/webhook.py); пустой URL — polling.
+    # Путь URL — путь локального сервера, TLS — на обратном прокси
+    webhook_url: str = ""
+    webhook_host: str = "127.0.0.1"
+    webhook_port: int = 8443
+    webhook_secret: str = ""  # пусто — случайный при каждом запуске
+    webhook_max_concurrent: int = 8  # обновлений в обработке одновременно
+    webhook_max_connections: int = 40  # соединений Telegram к webhook
+    # Уведомления о сделках: чаты (JSON-список id), пусто — не отправлять
+    notify_chat_ids: list[int] = []
+    notify_queue_size: int = 1000
+    notify_merge_window: float = 1.0  # сек, сообщения одной новости — в сводку
+    notify_global_rate: float = 25.0  # сообщений в секунду на все чаты
+    notify_chat_rate: float = 1.0  # сообщений в секунду в один чат
+    notify_fill_window: float = 600.0  # сек после новости, пока ждём исполнений
 
     # MetaTrader 5
     mt5_login: int = 0
     mt5_password: str = ""
     mt5_server: str = ""
     mt5_path: str = ""
+    # Несколько счетов: JSON-список AccountConfig, каждый — в своём процессе
+    mt5_accounts: list[AccountConfig] = []
 
     # Торговля
     offset_points: int = 200
     lot_size: float = 0.01
     pre_news_seconds: int = 300  # 5 минут до новости
     update_interval: float = 1.5  # секунд между обновлениями ордеров
+    price_stale_seconds: float = 5.0  # тик старше этого считается устаревшим
+    # Источник цен: poll — опрос symbol_info_tick по таймеру, stream — чтение
+    # новых тиков (copy_ticks_from) и перестановка по приходу тика
+    price_source: str = "poll"
+    stream_poll_interval: float = 0.05  # сек между чтениями потока тиков
+    stream_batch: int = 1000  # максимум тиков за одно чтение
+
+    # Политика перестановки ордеров
+    requote_min_points: float = 10  # не двигать ордер при сдвиге меньше N пунктов
+    requote_fast_interval: float = 0.5  # интервал в последние секунды до новости
+    requote_fast_window: float = 30.0  # «последние секунды» до новости
+    requote_max_interval: float = 5.0  # интервал в тихом рынке
+    requote_max_per_second: float = 10.0  # лимит модификаций на аккаунт
+    requote_last_offset: float = 0.2  # последняя перестановка за N сек до новости
+    # OCO после новости: исполнилась одна нога — встречная снимается
+    oco_window: float = 60.0  # сек наблюдения после новости (0 — выключено)
+    oco_poll_interval: float = 0.05  # сек между опросами позиций
+
+    # Шлюз MT5
+    symbol_info_ttl: float = 3600.0  # сек, срок кэша спецификаций символов
+    placement_window: float = 0.5  # сек, сбор одновременных выставлений в пакет
+    placement_retries: int = 1  # перевыставлений одиночной ноги до её отмены
+    mt5_call_timeout: float = 2.0  # таймаут одного вызова терминала, сек
+    order_reconcile_interval: float = 10.0  # сверка кэша ордеров с терминалом, сек
+
+    # Метрики: Prometheus-эндпоинт на localhost (0 — выключен)
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 0
+
+    # Запись тиков окна вокруг новости (вход для бэктеста и bot/sweep.py)
+    record_ticks: bool = False
+    ticks_dir: str = "data/ticks"
+    tick_recorder_capacity: int = 4096  # строк в буфере до сброса на диск
+    # Сек записи после новости; окно не короче OCO_WINDOW
+    tick_record_post_seconds: float = 60.0
+
+    # Журнал сделок: бинарный лог цен, ордеров и исполнений (bot/journal.py)
+    journal_enabled: bool = True
+    journal_dir: str = "data/journal"
+    journal_segment_records: int = 1_000_000  # записей в одном сегменте
+    journal_flush_interval: float = 0.2  # сек между пакетными записями
+    journal_fsync: str = "interval"  # batch / interval / never
+    journal_fsync_interval: float = 1.0  # сек между fsync при interval
 
     # Режим demo (mock MT5)
     demo_mode: bool = True
 
+    # Симулятор рынка demo-режима
+    sim_seed: int | None = None  # фиксирует путь цены (воспроизводимые прогоны)
+    sim_latency_ms: float = 0.0  # задержка каждого вызова «брокера»
+    sim_reject_rate: float = 0.0  # доля отклонённых торговых запросов
+
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8", "extra": "ignore"}
 
 
@@ -1,81 +1,295 @@
 """SQLite база данных для хранения расписания новостей."""
 
+import logging
 import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
 
-from bot.models import NewsEvent
+from bot.models import NewsEvent, TradeState
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = Path("data/events.db")
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_date TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    description TEXT DEFAULT '',
+    active INTEGER DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_events_active_date ON events (active, event_date);
+CREATE INDEX IF NOT EXISTS idx_events_active_symbol_date
+    ON events (active, symbol, event_date);
+CREATE TABLE IF NOT EXISTS trades (
+    event_id INTEGER PRIMARY KEY,
+    phase TEXT NOT NULL,
+    buy_ticket INTEGER NOT NULL,
+    sell_ticket INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
 
-def _connect() -> sqlite3.Connection:
-    """Получить соединение с БД."""
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(DB_PATH))
+# Одна новость на символ в один момент: защищает от дублей при импорте
+_UNIQUE_INDEX = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_events_date_symbol "
+    "ON events (event_date, symbol)"
+)
+
+# Запросы — константы: sqlite3 кэширует подготовленные выражения по тексту SQL
+_SQL_INSERT = "INSERT INTO events (event_date, symbol, description) VALUES (?, ?, ?)"
+_SQL_INSERT_IGNORE = (
+    "INSERT OR IGNORE INTO events (event_date, symbol, description) VALUES (?, ?, ?)"
+)
+_SQL_SELECT = "SELECT id, event_date, symbol, description, active FROM events"
+_SQL_LIST_ACTIVE = _SQL_SELECT + " WHERE active = 1 ORDER BY event_date ASC"
+_SQL_LIST_ALL = _SQL_SELECT + " ORDER BY event_date ASC"
+_SQL_BY_ID = _SQL_SELECT + " WHERE id = ?"
+_SQL_STATS = "SELECT COUNT(*), MIN(event_date) FROM events WHERE active = 1"
+_SQL_DELETE = "DELETE FROM events WHERE id = ?"
+_SQL_DEACTIVATE = "UPDATE events SET active = 0 WHERE id = ?"
+_SQL_UPSERT_TRADE = (
+    "INSERT OR REPLACE INTO trades"
+    " (event_id, phase, buy_ticket, sell_ticket, updated_at) VALUES (?, ?, ?, ?, ?)"
+)
+_SQL_LIST_TRADES = "SELECT event_id, phase, buy_ticket, sell_ticket FROM trades"
+_SQL_DELETE_TRADE = "DELETE FROM trades WHERE event_id = ?"
+# Торговля после выхода новости ещё под наблюдением OCO — её строку
+# удаляет само наблюдение по завершении (delete_trade)
+_SQL_DELETE_OPEN_TRADE = "DELETE FROM trades WHERE event_id = ? AND phase != 'released'"
+
+
+# Страница расписания: keyset по (event_date, id) внутри диапазона дат,
+# по индексу (active, event_date) или (active, symbol, event_date)
+def _page_sql(forward: bool, by_symbol: bool) -> str:
+    op, order = (">", "ASC") if forward else ("<", "DESC")
+    # Планировщик SQLite сам предпочитает индекс под ORDER BY, а по редкому
+    # символу он просматривал бы всё расписание
+    index, symbol = "", ""
+    if by_symbol:
+        index, symbol = " INDEXED BY idx_events_active_symbol_date", " AND symbol = ?"
+    return (
+        f"{_SQL_SELECT}{index} WHERE active = 1{symbol}"
+        " AND event_date >= ? AND event_date < ?"
+        f" AND (event_date, id) {op} (?, ?)"
+        f" ORDER BY event_date {order}, id {order} LIMIT ?"
+    )
+
+
+_SQL_PAGE = {
+    (forward, by_symbol): _page_sql(forward, by_symbol)
+    for forward in (True, False)
+    for by_symbol in (True, False)
+}
+
+_conn: sqlite3.Connection | None = None
+_lock = threading.RLock()
+
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    """Открыть новое соединение: WAL, схема и индексы."""
+    path = path or DB_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), check_same_thread=False)
     conn.row_factory = sqlite3.Row
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS events (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            event_date TEXT NOT NULL,
-            symbol TEXT NOT NULL,
-            description TEXT DEFAULT '',
-            active INTEGER DEFAULT 1
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    try:
+        conn.execute(_UNIQUE_INDEX)
+    except sqlite3.IntegrityError:
+        logger.warning(
+            "В БД есть дубли (event_date, symbol) — уникальный индекс не создан"
         )
-        """
-    )
     conn.commit()
     return conn
 
 
-def add_event(event_date: datetime, symbol: str, description: str = "") -> int:
-    """Добавить новость в расписание. Возвращает id."""
-    conn = _connect()
+def init_db(path: Path | None = None) -> sqlite3.Connection:
+    """Открыть долгоживущее соединение процесса (повторный вызов — то же)."""
+    global _conn, DB_PATH
+    with _lock:
+        if path is not None:
+            close_db()
+            DB_PATH = path
+        if _conn is None:
+            _conn = connect()
+        return _conn
+
+
+def close_db() -> None:
+    """Закрыть соединение (следующий вызов откроет его заново)."""
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
+
+def _connect() -> sqlite3.Connection:
+    """Получить соединение с БД."""
+    return _conn if _conn is not None else init_db()
+
+
+def _row_to_event(r: sqlite3.Row) -> NewsEvent:
+    # Строки пишем только мы сами — повторная валидация не нужна
+    return NewsEvent.model_construct(
+        id=r["id"],
+        event_date=datetime.fromisoformat(r["event_date"]),
+        symbol=r["symbol"],
+        description=r["description"],
+        active=bool(r["active"]),
+    )
+
+
+# Операции над переданным соединением, без commit — их собирает в
+# транзакции вызывающий код (синхронный API ниже или bot.repository).
+
+
+def insert_event(
+    conn: sqlite3.Connection, event_date: datetime, symbol: str, description: str = ""
+) -> int:
+    """INSERT новости. Возвращает id."""
     cur = conn.execute(
-        "INSERT INTO events (event_date, symbol, description) VALUES (?, ?, ?)",
-        (event_date.isoformat(), symbol.upper(), description),
+        _SQL_INSERT, (event_date.isoformat(), symbol.upper(), description)
     )
-    conn.commit()
-    event_id: int = cur.lastrowid  # type: ignore[assignment]
-    conn.close()
-    return event_id
+    return cur.lastrowid  # type: ignore[return-value]
 
 
-def list_events(only_active: bool = True) -> list[NewsEvent]:
-    """Получить список новостей."""
-    conn = _connect()
-    query = "SELECT * FROM events"
-    if only_active:
-        query += " WHERE active = 1"
-    query += " ORDER BY event_date ASC"
+def insert_events_ignore(
+    conn: sqlite3.Connection, rows: list[tuple[str, str, str]]
+) -> int:
+    """Пакетный INSERT (event_date ISO, symbol, description), дубли пропускаются.
+
+    Возвращает число реально вставленных строк.
+    """
+    before = conn.total_changes
+    conn.executemany(_SQL_INSERT_IGNORE, rows)
+    return conn.total_changes - before
+
+
+def select_events(
+    conn: sqlite3.Connection, only_active: bool = True
+) -> list[NewsEvent]:
+    """SELECT новостей по возрастанию даты."""
+    query = _SQL_LIST_ACTIVE if only_active else _SQL_LIST_ALL
     rows = conn.execute(query).fetchall()
-    conn.close()
+    return [_row_to_event(r) for r in rows]
+
+
+def select_events_by_id(
+    conn: sqlite3.Connection, event_ids: list[int]
+) -> list[NewsEvent]:
+    """SELECT новостей по id, включая неактивные."""
+    rows = [conn.execute(_SQL_BY_ID, (i,)).fetchone() for i in event_ids]
+    return [_row_to_event(r) for r in rows if r is not None]
+
+
+def select_page(
+    conn: sqlite3.Connection,
+    cursor: tuple[str, int],
+    forward: bool = True,
+    limit: int = 20,
+    symbol: str = "",
+    date_from: str = "",
+    date_to: str = "~",
+) -> list[NewsEvent]:
+    """Активные новости после (forward) или до cursor=(event_date ISO, id).
+
+    Результат всегда по возрастанию даты. date_from/date_to — границы ISO
+    [date_from, date_to); пустой symbol — все символы.
+    """
+    params: list[object] = [symbol.upper()] if symbol else []
+    params += [date_from, date_to, *cursor, limit]
+    rows = conn.execute(_SQL_PAGE[forward, bool(symbol)], params).fetchall()
+    events = [_row_to_event(r) for r in rows]
+    return events if forward else events[::-1]
+
+
+def select_stats(conn: sqlite3.Connection) -> tuple[int, datetime | None]:
+    """Число активных новостей и дата ближайшей."""
+    count, first = conn.execute(_SQL_STATS).fetchone()
+    return count, datetime.fromisoformat(first) if first else None
+
+
+def delete_events(conn: sqlite3.Connection, event_ids: list[int]) -> int:
+    """DELETE новостей и их состояния торговли. Возвращает число удалённых."""
+    params = [(i,) for i in event_ids]
+    conn.executemany(_SQL_DELETE_TRADE, params)
+    return conn.executemany(_SQL_DELETE, params).rowcount
+
+
+def deactivate_events(conn: sqlite3.Connection, event_ids: list[int]) -> None:
+    """Пометить новости неактивными и удалить их незавершённые торговли.
+
+    Состояние после выхода новости (released) остаётся до конца OCO.
+    """
+    params = [(i,) for i in event_ids]
+    conn.executemany(_SQL_DEACTIVATE, params)
+    conn.executemany(_SQL_DELETE_OPEN_TRADE, params)
+
+
+def delete_trade(conn: sqlite3.Connection, event_id: int) -> None:
+    """Удалить состояние торговли по новости."""
+    conn.execute(_SQL_DELETE_TRADE, (event_id,))
+
+
+def upsert_trade(conn: sqlite3.Connection, state: TradeState) -> None:
+    """Записать (заменить) состояние торговли по новости."""
+    conn.execute(
+        _SQL_UPSERT_TRADE,
+        (
+            state.event_id,
+            state.phase,
+            state.buy_ticket,
+            state.sell_ticket,
+            datetime.now().isoformat(),
+        ),
+    )
+
+
+def select_trades(conn: sqlite3.Connection) -> list[TradeState]:
+    """Все сохранённые состояния торговли."""
     return [
-        NewsEvent(
-            id=r["id"],
-            event_date=datetime.fromisoformat(r["event_date"]),
-            symbol=r["symbol"],
-            description=r["description"],
-            active=bool(r["active"]),
+        TradeState.model_construct(
+            event_id=r["event_id"],
+            phase=r["phase"],
+            buy_ticket=r["buy_ticket"],
+            sell_ticket=r["sell_ticket"],
         )
-        for r in rows
+        for r in conn.execute(_SQL_LIST_TRADES)
     ]
 
 
+def add_event(event_date: datetime, symbol: str, description: str = "") -> int:
+    """Добавить новость в расписание. Возвращает id."""
+    with _lock:
+        conn = _connect()
+        event_id = insert_event(conn, event_date, symbol, description)
+        conn.commit()
+    return event_id
+
+
+def list_events(only_active: bool = True) -> list[NewsEvent]:
+    """Получить список новостей."""
+    with _lock:
+        return select_events(_connect(), only_active)
+
+
 def delete_event(event_id: int) -> bool:
     """Удалить новость по id. Возвращает True если удалена."""
-    conn = _connect()
-    cur = conn.execute("DELETE FROM events WHERE id = ?", (event_id,))
-    conn.commit()
-    deleted = cur.rowcount > 0
-    conn.close()
+    with _lock:
+        conn = _connect()
+        deleted = delete_events(conn, [event_id]) > 0
+        conn.commit()
     return deleted
 
 
 def deactivate_event(event_id: int) -> None:
     """Деактивировать новость (после отработки)."""
-    conn = _connect()
-    conn.execute("UPDATE events SET active = 0 WHERE id = ?", (event_id,))
-    conn.commit()
-    conn.close()
+    with _lock:
+        conn = _connect()
+        deactivate_events(conn, [event_id])
+        conn.commit()
@@ -0,0 +1,67 @@
+"""In-memory индекс запланированных новостей, упорядоченный по времени старта."""
+
+import heapq
+from datetime import datetime, timedelta
+
+from bot.config import settings
+from bot.models import NewsEvent
+
+
+def start_time_of(event: NewsEvent) -> datetime:
+    """Момент начала торговли по новости (за pre_news_seconds до неё)."""
+    return event.event_date - timedelta(seconds=settings.pre_news_seconds)
+
+
+class EventIndex:
+    """Куча дедлайнов (время старта, id) + словарь событий.
+
+    Удаление ленивое: запись в куче игнорируется при извлечении, если
+    события уже нет или его время старта изменилось. Вставка и удаление —
+    O(log n), ближайший дедлайн — O(1) амортизированно.
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[datetime, int]] = []
+        self._events: dict[int, NewsEvent] = {}
+
+    def add(self, event: NewsEvent) -> None:
+        """Добавить или обновить событие."""
+        assert event.id is not None
+        self._events[event.id] = event
+        heapq.heappush(self._heap, (start_time_of(event), event.id))
+        # Периодически вычищаем накопившиеся «мёртвые» записи
+        if len(self._heap) > 2 * len(self._events) + 1024:
+            self._heap = [(start_time_of(e), i) for i, e in self._events.items()]
+            heapq.heapify(self._heap)
+
+    def remove(self, event_id: int) -> NewsEvent | None:
+        """Убрать событие из индекса. Возвращает его, если было."""
+        return self._events.pop(event_id, None)
+
+    def _drop_stale(self) -> None:
+        """Снять с вершины кучи записи удалённых или изменённых событий."""
+        while self._heap:
+            start, event_id = self._heap[0]
+            event = self._events.get(event_id)
+            if event is not None and start_time_of(event) == start:
+                return
+            heapq.heappop(self._heap)
+
+    def next_deadline(self) -> datetime | None:
+        """Ближайшее время старта или None, если индекс пуст."""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> list[NewsEvent]:
+        """Извлечь все события, время старта которых наступило."""
+        due: list[NewsEvent] = []
+        while (deadline := self.next_deadline()) is not None and deadline <= now:
+            _, event_id = heapq.heappop(self._heap)
+            due.append(self._events.pop(event_id))
+        return due
+
+    def __contains__(self, event_id: object) -> bool:
+        return event_id in self._events
+
+    def __len__(self) -> int:
+        return len(self._events)
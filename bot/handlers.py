@@ -1,28 +1,41 @@
 """Обработчики команд Telegram бота."""
 
+import html
 import logging
-from datetime import datetime
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
 
-from telegram import Update
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
 
 from bot.config import settings
-from bot.database import add_event, delete_event, list_events
-from bot.mt5_client import MT5Client
+from bot.metrics import METRICS
+from bot.models import NewsEvent
+from bot.mt5_gateway import MT5Gateway
+from bot.mt5_shards import ShardedGateway
+from bot.repository import EventPage, EventRepository
 from bot.scheduler import TradingScheduler
 
 logger = logging.getLogger(__name__)
 
 # Глобальные ссылки (устанавливаются в main.py)
-mt5_client: MT5Client | None = None
+mt5_gateway: MT5Gateway | ShardedGateway | None = None
 trading_scheduler: TradingScheduler | None = None
+repository: EventRepository | None = None
 
 
-def set_dependencies(mt5: MT5Client, scheduler: TradingScheduler) -> None:
+def set_dependencies(
+    mt5: MT5Gateway | ShardedGateway,
+    scheduler: TradingScheduler,
+    repo: EventRepository,
+) -> None:
     """Установить зависимости для обработчиков."""
-    global mt5_client, trading_scheduler
-    mt5_client = mt5
+    global mt5_gateway, trading_scheduler, repository
+    mt5_gateway = mt5
     trading_scheduler = scheduler
+    repository = repo
 
 
 async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -34,10 +47,12 @@ async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         f"Режим: {mode}\n\n"
         "Команды:\n"
         "/add_event &lt;дата&gt; &lt;время&gt; &lt;пара&gt; — добавить новость\n"
-        "/list — расписание новостей\n"
+        "/list [пара] [с даты] [по дату] — расписание новостей\n"
         "/delete &lt;id&gt; — удалить новость\n"
+        "/import — загрузить календарь (CSV / ICS)\n"
         "/settings — текущие настройки\n"
-        "/status — статус бота\n\n"
+        "/status — статус бота\n"
+        "/metrics — задержки и счётчики\n\n"
         "Формат даты: <code>2025-01-31 15:30 EURUSD</code>"
     )
     await update.message.reply_text(text, parse_mode="HTML")
@@ -46,6 +61,8 @@ async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 async def cmd_add_event(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Команда /add_event — добавить новость в расписание."""
     assert update.message is not None
+    assert trading_scheduler is not None
+    assert repository is not None
 
     if not context.args or len(context.args) < 3:
         await update.message.reply_text(
@@ -74,7 +91,16 @@ async def cmd_add_event(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         return
 
     description = " ".join(context.args[3:]) if len(context.args) > 3 else ""
-    event_id = add_event(event_date, symbol, description)
+    try:
+        event_id = await repository.add_event(event_date, symbol, description)
+    except sqlite3.IntegrityError:
+        await update.message.reply_text("❌ Такая новость уже есть в расписании.")
+        return
+    trading_scheduler.schedule(
+        NewsEvent(
+            id=event_id, event_date=event_date, symbol=symbol, description=description
+        )
+    )
 
     await update.message.reply_text(
         f"✅ Новость добавлена (#{event_id}):\n"
@@ -85,28 +111,106 @@ async def cmd_add_event(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     logger.info("Добавлена новость #%d: %s %s", event_id, event_date, symbol)
 
 
-async def cmd_list(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Команда /list — показать расписание."""
-    assert update.message is not None
-
-    events = list_events(only_active=True)
-    if not events:
-        await update.message.reply_text("📭 Расписание пусто.")
-        return
+# Фильтр /list: символ ("" — все) и даты YYYYMMDD ("" — без границы)
+_ListFilter = tuple[str, str, str]
+_CURSOR_FORMAT = "%Y%m%d%H%M%S"
+
+
+def _parse_list_args(args: list[str]) -> _ListFilter | None:
+    """Аргументы /list: [пара] [с даты] [по дату] в любом порядке пар/дат."""
+    symbol = ""
+    dates: list[str] = []
+    for arg in args:
+        try:
+            dates.append(datetime.strptime(arg, "%Y-%m-%d").strftime("%Y%m%d"))
+        except ValueError:
+            if symbol or not arg.isalnum():
+                return None
+            symbol = arg.upper()
+    if len(dates) > 2:
+        return None
+    dates += [""] * (2 - len(dates))
+    return symbol, dates[0], dates[1]
+
+
+async def _list_page(
+    flt: _ListFilter, cursor: tuple[str, int] | None = None, forward: bool = True
+) -> tuple[str, InlineKeyboardMarkup | None]:
+    """Текст и кнопки страницы расписания."""
+    assert repository is not None
+    symbol, start, end = flt
+    date_from = datetime.strptime(start, "%Y%m%d") if start else None
+    # Конечная дата включительно: граница — начало следующего дня
+    date_to = datetime.strptime(end, "%Y%m%d") + timedelta(days=1) if end else None
+    page = await repository.list_page(
+        cursor, forward, settings.list_page_size, symbol, date_from, date_to
+    )
+    if not page.events:
+        return "📭 Расписание пусто.", None
 
-    lines: list[str] = ["📋 <b>Расписание новостей:</b>\n"]
-    for e in events:
-        assert e.event_date is not None
+    title = f"📋 <b>Расписание новостей{' ' + symbol if symbol else ''}:</b>\n"
+    lines: list[str] = [title]
+    for e in page.events:
         dt = e.event_date.strftime("%Y-%m-%d %H:%M")
-        desc = f" — {e.description}" if e.description else ""
+        desc = f" — {html.escape(e.description)}" if e.description else ""
         lines.append(f"#{e.id} | {dt} | {e.symbol}{desc}")
+    return "\n".join(lines), _list_keyboard(flt, page)
+
 
-    await update.message.reply_text("\n".join(lines), parse_mode="HTML")
+def _list_keyboard(flt: _ListFilter, page: EventPage) -> InlineKeyboardMarkup | None:
+    """Кнопки ◀️/▶️: в callback_data фильтр и крайняя новость страницы.
+
+    Формат l|n или p|дата|id|символ|с|по — укладывается в 64 байта Telegram.
+    """
+
+    def data(direction: str, index: int) -> str:
+        e = page.events[index]
+        stamp = e.event_date.strftime(_CURSOR_FORMAT)
+        return "|".join(("l", direction, stamp, str(e.id), *flt))
+
+    buttons = []
+    if page.has_prev:
+        buttons.append(InlineKeyboardButton("◀️", callback_data=data("p", 0)))
+    if page.has_next:
+        buttons.append(InlineKeyboardButton("▶️", callback_data=data("n", -1)))
+    return InlineKeyboardMarkup([buttons]) if buttons else None
+
+
+async def cmd_list(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Команда /list — расписание постранично, с фильтром по паре и датам."""
+    assert update.message is not None
+
+    flt = _parse_list_args(context.args or [])
+    if flt is None:
+        await update.message.reply_text(
+            "❌ Формат: /list [пара] [с даты] [по дату]\n"
+            "Пример: <code>/list EURUSD 2025-01-01 2025-01-31</code>",
+            parse_mode="HTML",
+        )
+        return
+    text, keyboard = await _list_page(flt)
+    await update.message.reply_text(text, parse_mode="HTML", reply_markup=keyboard)
+
+
+async def on_list_page(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Кнопки листания /list."""
+    query = update.callback_query
+    assert query is not None and query.data is not None
+    await query.answer()
+    _, direction, stamp, event_id, *flt = query.data.split("|")
+    event_date = datetime.strptime(stamp, _CURSOR_FORMAT)
+    cursor = (event_date.isoformat(), int(event_id))
+    text, keyboard = await _list_page(
+        (flt[0], flt[1], flt[2]), cursor, forward=direction == "n"
+    )
+    await query.edit_message_text(text, parse_mode="HTML", reply_markup=keyboard)
 
 
 async def cmd_delete(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Команда /delete — удалить новость."""
     assert update.message is not None
+    assert trading_scheduler is not None
+    assert repository is not None
 
     if not context.args or len(context.args) < 1:
         await update.message.reply_text("❌ Формат: /delete <id>")
@@ -118,12 +222,49 @@ async def cmd_delete(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
         await update.message.reply_text("❌ ID должен быть числом.")
         return
 
-    if delete_event(event_id):
+    trading_scheduler.unschedule(event_id)
+    if await repository.delete_event(event_id):
         await update.message.reply_text(f"🗑 Новость #{event_id} удалена.")
     else:
         await update.message.reply_text(f"❌ Новость #{event_id} не найдена.")
 
 
+async def cmd_import(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Импорт календаря: документ CSV/ICS (подпись — символ по умолчанию для ICS)."""
+    assert update.message is not None
+    assert trading_scheduler is not None
+    assert repository is not None
+
+    document = update.message.document
+    if document is None:
+        await update.message.reply_text(
+            "📎 Отправьте файл календаря .csv или .ics.\n"
+            "CSV: колонки <code>date,time,symbol,description</code>\n"
+            "ICS: символ в X-SYMBOL / CATEGORIES или в подписи к файлу",
+            parse_mode="HTML",
+        )
+        return
+
+    default_symbol = (update.message.caption or "").replace("/import", "").strip()
+    file = await document.get_file()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "calendar"
+        await file.download_to_drive(path)
+        report = await repository.import_calendar(
+            path, default_symbol.upper(), name=document.file_name or ""
+        )
+
+    if report.inserted:
+        await trading_scheduler.reload()
+    await update.message.reply_text(f"📥 Импорт календаря:\n\n{report.summary()}")
+    logger.info(
+        "Импорт календаря: %d добавлено, %d дублей за %.2f сек",
+        report.inserted,
+        report.duplicates,
+        report.seconds,
+    )
+
+
 async def cmd_settings(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Команда /settings — показать настройки."""
     assert update.message is not None
@@ -143,19 +284,34 @@ async def cmd_settings(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Команда /status — статус бота."""
     assert update.message is not None
-    assert mt5_client is not None
+    assert mt5_gateway is not None
     assert trading_scheduler is not None
+    assert repository is not None
 
-    events = list_events(only_active=True)
+    stats = await repository.stats()
     active_trades = trading_scheduler.get_active_count()
 
-    mt5_status = "✅ Подключён" if mt5_client.is_connected else "❌ Отключён"
-    mode = "Demo" if mt5_client.is_demo else "Live"
+    mt5_status = "✅ Подключён" if mt5_gateway.is_connected else "❌ Отключён"
+    mode = "Demo" if mt5_gateway.is_demo else "Live"
 
+    nearest = (
+        stats.next_event.strftime("%Y-%m-%d %H:%M") if stats.next_event else "—"
+    )
     text = (
         "📊 <b>Статус бота:</b>\n\n"
         f"MT5: {mt5_status} ({mode})\n"
-        f"Новостей в очереди: {len(events)}\n"
+        f"Новостей в очереди: {stats.active}\n"
+        f"Ближайшая новость: {nearest}\n"
         f"Активных торговых задач: {active_trades}"
     )
     await update.message.reply_text(text, parse_mode="HTML")
+
+
+async def cmd_metrics(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Команда /metrics — задержки и счётчики горячего пути."""
+    assert update.message is not None
+
+    # Лимит сообщения Telegram — 4096 символов
+    summary = html.escape(METRICS.summary())[:3800]
+    text = f"📈 <b>Метрики:</b>\n\n<pre>{summary}</pre>"
+    await update.message.reply_text(text, parse_mode="HTML")
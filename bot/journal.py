@@ -0,0 +1,353 @@
+"""Журнал сделок: бинарный append-only лог торговых действий.
+
+Каждое чтение цены, выставление, модификация, отмена и исполнение —
+запись фиксированного размера (RECORD_DTYPE) с id новости, ticket и
+метками времени (эпоха и monotonic, нс). Event loop только добавляет
+кортеж в список; фоновый поток раз в journal_flush_interval (или при
+накоплении _BATCH записей) пишет пакет одним write() и делает fsync по
+политике journal_fsync: batch — после каждого пакета, interval — не
+чаще journal_fsync_interval, never — на усмотрение ОС.
+
+Журнал режется на сегменты journal-NNNNNN.bin по journal_segment_records
+записей: 8 байт сигнатуры, uint32 длина JSON-заголовка, заголовок,
+затем записи подряд. Закрытый сегмент получает индекс .idx (JSON:
+диапазон номеров записей каждой новости и ticket), поэтому выборка по
+новости или ticket читает через mmap только нужный диапазон. Сегмент
+без индекса (текущий или оборванный падением) индексируется при чтении.
+
+CLI: python -m bot.journal [DIR] [--event ID] [--ticket N] [--csv FILE]
+"""
+
+import argparse
+import csv
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from datetime import datetime
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, BinaryIO
+
+import numpy as np
+
+from bot.clock import SYSTEM_CLOCK, Clock
+from bot.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FNJRNL01"
+_HEADER_LEN = struct.Struct("<I")
+_BATCH = 4096  # записей, после которых поток-писатель будится сразу
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("time_ns", "<i8"),  # время от эпохи
+        ("mono_ns", "<i8"),  # monotonic
+        ("event_id", "<i4"),  # 0 — вне новости
+        ("kind", "u1"),
+        ("ok", "u1"),
+        ("ticket", "<i8"),  # 0 — нет ордера
+        ("price", "<f8"),  # bid / цена ордера / цена исполнения
+        ("value", "<f8"),  # ask / лот / задержка вызова, сек
+        ("symbol", "S12"),
+    ]
+)
+
+_Record = tuple[int, int, int, int, int, int, float, float, str]
+
+
+class Kind(IntEnum):
+    """Тип записи журнала."""
+
+    PRICE = 1
+    PLACE = 2
+    MODIFY = 3
+    CANCEL = 4
+    FILL = 5
+
+
+class TradeJournal:
+    """Журнал с фоновой пакетной записью в сегменты."""
+
+    def __init__(
+        self,
+        directory: Path,
+        clock: Clock = SYSTEM_CLOCK,
+        segment_records: int | None = None,
+        fsync: str | None = None,
+    ) -> None:
+        self.directory = directory
+        self.clock = clock
+        self.segment_records = segment_records or settings.journal_segment_records
+        self.fsync = fsync or settings.journal_fsync
+        if self.fsync not in ("batch", "interval", "never"):
+            raise ValueError(f"Неизвестная политика fsync: {self.fsync}")
+        self.records: int = 0  # записано на диск
+        self._pending: list[_Record] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+        # Текущий сегмент: файл, номер, записей, индексы {ключ: [первая, последняя]}
+        self._file: BinaryIO | None = None
+        self._segment = 0
+        self._count = 0
+        self._events: dict[int, list[int]] = {}
+        self._tickets: dict[int, list[int]] = {}
+        self._synced_at = 0.0
+
+    # --- жизненный цикл -------------------------------------------------
+
+    def start(self) -> None:
+        """Открыть новый сегмент и запустить поток-писатель."""
+        if self._thread is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        existing = [_segment_number(p) for p in self.directory.glob("journal-*.bin")]
+        self._segment = max(existing, default=0) + 1
+        self._open_segment()
+        self._thread = threading.Thread(
+            target=self._run, name="journal-writer", daemon=True
+        )
+        self._thread.start()
+        logger.info("📒 Журнал сделок: %s", self._path(self._segment))
+
+    def stop(self) -> None:
+        """Дописать накопленное, закрыть сегмент с индексом."""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+        self._seal()
+
+    # --- запись (event loop) --------------------------------------------
+
+    def record(
+        self,
+        kind: Kind,
+        event_id: int | None,
+        symbol: str,
+        ticket: int | None = None,
+        price: float = float("nan"),
+        value: float = float("nan"),
+        ok: bool = True,
+    ) -> None:
+        """Добавить запись. Не ждёт диска."""
+        row = (
+            self.clock.time_ns(),
+            int(self.clock.monotonic() * 1e9),
+            event_id or 0,
+            int(kind),
+            int(ok),
+            ticket or 0,
+            price,
+            value,
+            symbol,
+        )
+        with self._lock:
+            self._pending.append(row)
+            full = len(self._pending) >= _BATCH
+        if full:
+            self._wakeup.set()
+
+    # --- поток-писатель -------------------------------------------------
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(settings.journal_flush_interval)
+            self._wakeup.clear()
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if batch:
+                try:
+                    self._write(np.array(batch, dtype=RECORD_DTYPE))
+                except Exception:
+                    logger.exception("Ошибка записи журнала сделок")
+            if self._stopping:
+                return
+
+    def _write(self, rows: np.ndarray) -> None:
+        while len(rows):
+            part = rows[: self.segment_records - self._count]
+            rows = rows[len(part) :]
+            assert self._file is not None
+            self._file.write(part.tobytes())
+            self._index(part, self._count)
+            self._count += len(part)
+            self.records += len(part)
+            if self._count >= self.segment_records:
+                self._seal()
+                self._segment += 1
+                self._open_segment()
+        self._sync()
+
+    def _sync(self) -> None:
+        assert self._file is not None
+        self._file.flush()
+        now = time.monotonic()
+        if self.fsync == "batch" or (
+            self.fsync == "interval"
+            and now - self._synced_at >= settings.journal_fsync_interval
+        ):
+            os.fsync(self._file.fileno())
+            self._synced_at = now
+
+    def _index(self, part: np.ndarray, start: int) -> None:
+        """Расширить диапазоны записей новостей и ticket на пакет part."""
+        for field, index in (("event_id", self._events), ("ticket", self._tickets)):
+            for key, first, last in _ranges(part[field]):
+                if key == 0:
+                    continue
+                span = index.get(key)
+                if span is None:
+                    index[key] = [start + first, start + last]
+                else:
+                    span[1] = start + last
+
+    def _path(self, segment: int) -> Path:
+        return self.directory / f"journal-{segment:06d}.bin"
+
+    def _open_segment(self) -> None:
+        header = json.dumps({"dtype": RECORD_DTYPE.descr}).encode("utf-8")
+        self._file = self._path(self._segment).open("wb")
+        self._file.write(MAGIC + _HEADER_LEN.pack(len(header)) + header)
+        self._count = 0
+        self._events, self._tickets = {}, {}
+
+    def _seal(self) -> None:
+        """Закрыть текущий сегмент и записать его индекс."""
+        if self._file is None:
+            return
+        self._file.flush()
+        if self.fsync != "never":
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        path = self._path(self._segment).with_suffix(".idx")
+        tmp = path.with_suffix(".tmp")
+        index = {
+            "records": self._count,
+            "events": self._events,
+            "tickets": self._tickets,
+        }
+        tmp.write_text(json.dumps(index))
+        tmp.replace(path)
+
+
+# --- чтение -------------------------------------------------------------
+
+
+def _segment_number(path: Path) -> int:
+    return int(path.stem.split("-")[1])
+
+
+def _ranges(keys: np.ndarray) -> list[tuple[int, int, int]]:
+    """(ключ, первая, последняя позиция) для каждого ключа в keys."""
+    unique, first = np.unique(keys, return_index=True)
+    _, last_reversed = np.unique(keys[::-1], return_index=True)
+    last = len(keys) - 1 - last_reversed
+    return list(zip(unique.tolist(), first.tolist(), last.tolist()))
+
+
+def _map_segment(path: Path) -> np.ndarray:
+    """Записи сегмента — вид на mmap (оборванный хвост отбрасывается)."""
+    size = path.stat().st_size
+    with path.open("rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: не файл журнала")
+        (header_size,) = _HEADER_LEN.unpack(f.read(_HEADER_LEN.size))
+        offset = len(MAGIC) + _HEADER_LEN.size + header_size
+        count = (size - offset) // RECORD_DTYPE.itemsize
+        if count <= 0:
+            return np.empty(0, RECORD_DTYPE)
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return np.frombuffer(buf, dtype=RECORD_DTYPE, count=count, offset=offset)
+
+
+def _segment_index(path: Path, records: np.ndarray) -> dict[str, Any]:
+    """Индекс сегмента из .idx, для незакрытого — по его записям."""
+    idx = path.with_suffix(".idx")
+    if idx.exists():
+        return json.loads(idx.read_text())  # type: ignore[no-any-return]
+    return {
+        "records": len(records),
+        "events": {str(k): [f, l] for k, f, l in _ranges(records["event_id"])},
+        "tickets": {str(k): [f, l] for k, f, l in _ranges(records["ticket"])},
+    }
+
+
+def read_journal(
+    directory: Path, event_id: int | None = None, ticket: int | None = None
+) -> np.ndarray:
+    """Записи журнала (RECORD_DTYPE), по новости и/или ticket."""
+    parts: list[np.ndarray] = []
+    for path in sorted(directory.glob("journal-*.bin"), key=_segment_number):
+        records = _map_segment(path)
+        if not len(records):
+            continue
+        if event_id is None and ticket is None:
+            parts.append(records)
+            continue
+        index = _segment_index(path, records)
+        low, high = 0, len(records) - 1
+        for key, name in ((event_id, "events"), (ticket, "tickets")):
+            if key is None:
+                continue
+            span = index[name].get(str(key))
+            if span is None:
+                low, high = 1, 0
+                break
+            low, high = max(low, span[0]), min(high, span[1])
+        if low > high:
+            continue
+        chunk = records[low : high + 1]
+        mask = np.ones(len(chunk), dtype=bool)
+        if event_id is not None:
+            mask &= chunk["event_id"] == event_id
+        if ticket is not None:
+            mask &= chunk["ticket"] == ticket
+        parts.append(chunk[mask])
+    return np.concatenate(parts) if parts else np.empty(0, RECORD_DTYPE)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Чтение журнала сделок")
+    parser.add_argument("directory", type=Path, nargs="?", default=None)
+    parser.add_argument("--event", type=int, default=None, help="id новости")
+    parser.add_argument("--ticket", type=int, default=None)
+    parser.add_argument("--csv", type=Path, default=None, help="сохранить в CSV")
+    args = parser.parse_args()
+
+    directory = args.directory or Path(settings.journal_dir)
+    rows = read_journal(directory, args.event, args.ticket)
+    out = csv.writer(args.csv.open("w", newline="") if args.csv else sys.stdout)
+    out.writerow(
+        ["time", "mono_ns", "event_id", "kind", "ok", "ticket", "symbol"]
+        + ["price", "value"]
+    )
+    for r in rows:
+        out.writerow(
+            [
+                datetime.fromtimestamp(r["time_ns"] / 1e9).isoformat(),
+                int(r["mono_ns"]),
+                int(r["event_id"]),
+                Kind(r["kind"]).name,
+                int(r["ok"]),
+                int(r["ticket"]),
+                r["symbol"].decode(),
+                f"{r['price']:.10g}",
+                f"{r['value']:.10g}",
+            ]
+        )
+    print(f"\nЗаписей: {len(rows)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,40 @@
 """Точка входа: запуск Telegram бота и планировщика."""
 
+import asyncio
 import logging
+from pathlib import Path
 
-from telegram.ext import ApplicationBuilder, CommandHandler
+from telegram.ext import (
+    Application,
+    ApplicationBuilder,
+    CallbackQueryHandler,
+    CommandHandler,
+    MessageHandler,
+    filters,
+)
 
 from bot.config import settings
 from bot.handlers import (
     cmd_add_event,
     cmd_delete,
+    cmd_import,
     cmd_list,
+    cmd_metrics,
     cmd_settings,
     cmd_start,
     cmd_status,
+    on_list_page,
     set_dependencies,
 )
+from bot.journal import TradeJournal
+from bot.metrics import monitor_loop_lag, serve_metrics
 from bot.mt5_client import MT5Client
+from bot.mt5_gateway import MT5Gateway
+from bot.mt5_shards import ShardedGateway
+from bot.notifier import Notifier
+from bot.repository import EventRepository
 from bot.scheduler import TradingScheduler
+from bot.webhook import run_webhook
 
 logging.basicConfig(
     level=logging.INFO,
@@ -30,33 +49,111 @@ def main() -> None:
         logger.error("❌ TELEGRAM_TOKEN не задан! Укажите его в .env")
         return
 
-    # MT5
-    mt5 = MT5Client()
-    mt5.connect()
+    # БД: поток-писатель с пакетными транзакциями + пул читателей
+    repo = EventRepository()
+    repo.start()
+
+    # MT5: все вызовы терминала идут через выделенный поток шлюза,
+    # при нескольких счетах — через процесс на каждый счёт
+    gateway: MT5Gateway | ShardedGateway
+    if settings.mt5_accounts:
+        gateway = ShardedGateway(settings.mt5_accounts)
+    else:
+        gateway = MT5Gateway(MT5Client())
+    gateway.start()
+
+    # Уведомления о сделках: очередь с лимитами Telegram, отправка — app.bot
+    async def send_notification(chat_id: int, text: str) -> None:
+        await app.bot.send_message(chat_id, text)
+
+    notifier = Notifier(send_notification, settings.notify_chat_ids)
+
+    # Журнал сделок: бинарный лог торговых действий, пишет фоновый поток
+    journal: TradeJournal | None = None
+    if settings.journal_enabled:
+        journal = TradeJournal(Path(settings.journal_dir))
+        journal.start()
+
+    # Планировщик (запускается внутри event loop приложения)
+    ticks_dir = Path(settings.ticks_dir) if settings.record_ticks else None
+    scheduler = TradingScheduler(
+        gateway, repo, ticks_dir=ticks_dir, notifier=notifier, journal=journal
+    )
+
+    # Фоновые задачи метрик: замер задержки loop и HTTP-эндпоинт
+    background: list[asyncio.Task[None]] = []
+    servers: list[asyncio.Server] = []
+
+    async def on_startup(_: Application) -> None:
+        background.append(asyncio.create_task(monitor_loop_lag(), name="loop-lag"))
+        if settings.metrics_port:
+            servers.append(
+                await serve_metrics(settings.metrics_host, settings.metrics_port)
+            )
+        notifier.start()
+        await scheduler.start()
+
+    async def on_stop(_: Application) -> None:
+        # До shutdown: бот ещё может отправлять сообщения
+        await notifier.stop()
 
-    # Планировщик
-    scheduler = TradingScheduler(mt5)
-    scheduler.start()
+    async def on_shutdown(_: Application) -> None:
+        await scheduler.stop()
+        for server in servers:
+            server.close()
+            await server.wait_closed()
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
 
     # Передаём зависимости в обработчики
-    set_dependencies(mt5, scheduler)
+    set_dependencies(gateway, scheduler, repo)
 
     # Telegram бот
-    app = ApplicationBuilder().token(settings.telegram_token).build()
+    builder = (
+        ApplicationBuilder()
+        .token(settings.telegram_token)
+        .post_init(on_startup)
+        .post_stop(on_stop)
+        .post_shutdown(on_shutdown)
+    )
+    if settings.telegram_api_url:
+        builder = builder.base_url(settings.telegram_api_url)
+    if settings.webhook_url:
+        # Обновления принимает свой HTTP-сервер, getUpdates не нужен
+        builder = builder.updater(None)
+    app = builder.build()
 
     app.add_handler(CommandHandler("start", cmd_start))
     app.add_handler(CommandHandler("add_event", cmd_add_event))
     app.add_handler(CommandHandler("list", cmd_list))
+    app.add_handler(CallbackQueryHandler(on_list_page, pattern=r"^l\|"))
     app.add_handler(CommandHandler("delete", cmd_delete))
+    app.add_handler(CommandHandler("import", cmd_import))
+    calendar_files = filters.Document.FileExtension(
+        "csv"
+    ) | filters.Document.FileExtension("ics")
+    app.add_handler(MessageHandler(calendar_files, cmd_import))
     app.add_handler(CommandHandler("settings", cmd_settings))
     app.add_handler(CommandHandler("status", cmd_status))
+    app.add_handler(CommandHandler("metrics", cmd_metrics))
 
-    logger.info("🤖 Бот запущен! Режим: %s", "Demo" if mt5.is_demo else "Live MT5")
-    app.run_polling(drop_pending_updates=True)
+    logger.info(
+        "🤖 Бот запущен! Режим: %s, счетов: %d, обновления: %s",
+        "Demo" if gateway.is_demo else "Live MT5",
+        len(settings.mt5_accounts) or 1,
+        "webhook" if settings.webhook_url else "polling",
+    )
+    if settings.webhook_url:
+        asyncio.run(run_webhook(app))
+    else:
+        app.run_polling(drop_pending_updates=True)
 
     # Cleanup
-    scheduler.stop()
-    mt5.disconnect()
+    if journal is not None:
+        journal.stop()
+    gateway.stop()
+    repo.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,307 @@
+"""Симулятор рынка для demo-режима MT5Client.
+
+Цена — геометрическое случайное блуждание со скачками (jump-diffusion),
+шаг dt. Приращения генерируются блоками NumPy по block_size шагов на
+символ, вызов quote() только берёт готовое значение, поэтому в одном
+процессе можно держать сотни символов. Вокруг объявленных новостей
+(expect_news) — скачок цены, всплеск волатильности, затухающий за
+burst_decay секунд, и расширение спреда. Отложенные стоп-ордера
+проверяются по всем шагам пути с прошлой проверки и исполняются в
+позиции. Задержка и доля отказов вызовов настраиваются.
+
+Параметры процесса относительные (доли цены), поэтому одинаково
+подходят и для EURUSD, и для USDJPY.
+"""
+
+import math
+import random
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
+
+from bot.clock import SYSTEM_CLOCK, Clock
+from bot.symbols import SymbolInfo
+
+if TYPE_CHECKING:
+    from bot.mt5_client import OrderBook, OrderRecord
+
+BASE_PRICES: dict[str, float] = {
+    "EURUSD": 1.08500,
+    "GBPUSD": 1.26300,
+    "USDJPY": 149.500,
+    "USDCHF": 0.87800,
+    "AUDUSD": 0.65200,
+    "USDCAD": 1.35600,
+    "NZDUSD": 0.60100,
+}
+
+
+@dataclass
+class SimConfig:
+    """Параметры симулятора (волатильность — доля цены за √сек)."""
+
+    seed: int | None = None
+    dt: float = 0.05  # шаг пути, сек
+    block_size: int = 4096  # шагов в блоке генерации
+    volatility: float = 0.00002
+    jump_rate: float = 0.01  # скачков в секунду в тихом рынке
+    jump_size: float = 0.0002
+    spread: float = 0.0001  # базовый спред, доля цены
+    news_jump: float = 0.002  # СКО скачка в момент новости
+    burst_volatility: float = 8.0  # множитель волатильности сразу после новости
+    burst_decay: float = 30.0  # время затухания всплеска, сек
+    spread_widening: float = 5.0  # множитель спреда у новости
+    spread_decay: float = 10.0  # сек, расширение спреда до и после новости
+    latency: float = 0.0  # задержка каждого вызова, сек
+    reject_rate: float = 0.0  # доля отклонённых торговых запросов
+    stops_level: int = 20  # минимальный отступ стоп-ордера, пунктов
+
+
+# Тик потока цен: (время в мс от эпохи, bid, ask)
+TickRow = tuple[int, float, float]
+
+
+class StopFill(NamedTuple):
+    """Сработавший стоп-ордер."""
+
+    order: "OrderRecord"
+    price: float
+    time: float  # секунды от эпохи
+
+
+@dataclass
+class _Burst:
+    """Добавка к лог-цене от одной новости, начиная с шага start."""
+
+    start: float  # шаг пути (дробный)
+    path: np.ndarray  # лог-добавка по шагам после новости
+
+
+@dataclass
+class _SymbolPath:
+    """Путь цены символа: текущий блок лог-приращений и курсор проверок."""
+
+    base: float
+    t0: float  # время шага 0, сек от эпохи
+    rng: np.random.Generator
+    block_start: int = 0  # номер шага первого элемента блока
+    walk: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    cursor: int = 0  # до какого шага стоп-ордера уже проверены
+    bursts: list[_Burst] = field(default_factory=list)
+
+
+class MarketEngine:
+    """Источник котировок и исполнения для demo-режима MT5Client.
+
+    Сам по себе — рынок без котировок и исполнений: наследники
+    переопределяют то, что моделируют.
+    """
+
+    def quote(self, symbol: str) -> tuple[float, float] | None:
+        """Текущие (bid, ask); None — котировки нет."""
+        return None
+
+    def ticks(self, symbol: str, since_msc: int, limit: int) -> list[TickRow]:
+        """Тики позже since_msc, не больше limit последних (0 — текущий тик)."""
+        return []
+
+    def symbol_info(self, symbol: str) -> SymbolInfo:
+        """Спецификация символа у «брокера»."""
+        return SymbolInfo.guess(symbol)
+
+    def advance(self, book: "OrderBook") -> list[StopFill]:
+        """Исполнить сработавшие стоп-ордера книги (удаляются из неё)."""
+        return []
+
+    def expect_news(self, symbol: str, when: datetime) -> None:
+        """Объявить новость по символу (движку, который её моделирует)."""
+
+    def delay(self) -> None:
+        """Задержка «сети» перед вызовом."""
+
+    def rejected(self) -> bool:
+        """Отклонить торговый запрос."""
+        return False
+
+
+class MarketSimulator(MarketEngine):
+    """Jump-diffusion с новостными всплесками, генерация блоками NumPy."""
+
+    def __init__(
+        self, config: SimConfig | None = None, clock: Clock = SYSTEM_CLOCK
+    ) -> None:
+        self.config = config or SimConfig()
+        self.clock = clock
+        self._paths: dict[str, _SymbolPath] = {}
+        self._news: dict[str, set[float]] = {}
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+
+    # --- путь цены ------------------------------------------------------
+
+    def _path(self, symbol: str) -> _SymbolPath:
+        path = self._paths.get(symbol)
+        if path is None:
+            # Свой генератор на символ: путь не зависит от порядка обращений
+            seed = None
+            if self.config.seed is not None:
+                seed = [self.config.seed, zlib.crc32(symbol.encode())]
+            path = _SymbolPath(
+                base=math.log(BASE_PRICES.get(symbol, 1.10000)),
+                t0=self.clock.time(),
+                rng=np.random.default_rng(seed),
+            )
+            self._paths[symbol] = path
+            for when in sorted(self._news.pop(symbol, set())):
+                self._add_burst(path, when)
+        return path
+
+    def _next_block(self, path: _SymbolPath) -> None:
+        c = self.config
+        n = c.block_size
+        steps = path.rng.standard_normal(n) * (c.volatility * math.sqrt(c.dt))
+        jumps = path.rng.random(n) < c.jump_rate * c.dt
+        steps[jumps] += path.rng.standard_normal(int(jumps.sum())) * c.jump_size
+        last = path.walk[-1] if len(path.walk) else path.base
+        path.block_start += len(path.walk)
+        path.walk = last + np.cumsum(steps)
+
+    def _add_burst(self, path: _SymbolPath, when: float) -> None:
+        c = self.config
+        n = int(5 * c.burst_decay / c.dt)
+        decay = np.exp(-np.arange(n) * c.dt / c.burst_decay)
+        sigma = c.volatility * math.sqrt(c.dt) * c.burst_volatility * decay
+        steps = path.rng.standard_normal(n) * sigma
+        steps[0] += path.rng.standard_normal() * c.news_jump
+        path.bursts.append(_Burst((when - path.t0) / c.dt, np.cumsum(steps)))
+
+    def _step_of(self, path: _SymbolPath, when: float) -> int:
+        return max(0, int((when - path.t0) / self.config.dt))
+
+    def _prices(self, path: _SymbolPath, i0: int, i1: int) -> tuple[np.ndarray, ...]:
+        """Шаги [i0, i1) текущего блока: (время, bid, ask)."""
+        c = self.config
+        steps = np.arange(i0, i1)
+        log_bid = path.walk[i0 - path.block_start : i1 - path.block_start].copy()
+        widening = np.zeros(len(steps))
+        for burst in path.bursts:
+            after = steps - burst.start
+            idx = np.clip(after.astype(np.int64), 0, len(burst.path) - 1)
+            log_bid += np.where(after >= 0, burst.path[idx], 0.0)
+            widening += np.exp(-np.abs(after) * c.dt / c.spread_decay)
+        bid = np.exp(log_bid)
+        ask = bid * (1 + c.spread * (1 + (c.spread_widening - 1) * widening))
+        return path.t0 + steps * c.dt, bid, ask
+
+    def _advance_to(
+        self,
+        path: _SymbolPath,
+        step: int,
+        orders: "list[OrderRecord]",
+        book: "OrderBook | None",
+    ) -> list[StopFill]:
+        """Догенерировать путь до шага step, проверяя orders на новых шагах."""
+        fills: list[StopFill] = []
+        while True:
+            block_end = path.block_start + len(path.walk)
+            end = min(step + 1, block_end)
+            if end > path.cursor:
+                if orders and book is not None:
+                    fills += self._trigger(path, orders, book, path.cursor, end)
+                    orders = [o for o in orders if o.ticket in book]
+                path.cursor = end
+            if step < block_end:
+                return fills
+            self._next_block(path)
+
+    def _trigger(
+        self,
+        path: _SymbolPath,
+        orders: "list[OrderRecord]",
+        book: "OrderBook",
+        i0: int,
+        i1: int,
+    ) -> list[StopFill]:
+        times, bid, ask = self._prices(path, max(i0, path.block_start), i1)
+        fills: list[StopFill] = []
+        for order in orders:
+            if order.order_type == "BUY_STOP":
+                hit, prices = ask >= order.price, ask
+            else:
+                hit, prices = bid <= order.price, bid
+            if hit.any():
+                i = int(hit.argmax())
+                book.remove(order.ticket)
+                fills.append(StopFill(order, float(prices[i]), float(times[i])))
+        return fills
+
+    # --- MarketEngine ---------------------------------------------------
+
+    def quote(self, symbol: str) -> tuple[float, float] | None:
+        # Стоп-ордера на пройденных шагах проверяет advance(), клиент
+        # вызывает его перед каждым обращением
+        with self._lock:
+            path = self._path(symbol)
+            step = self._step_of(path, self.clock.time())
+            self._advance_to(path, step, [], None)
+            _, bid, ask = self._prices(path, step, step + 1)
+        return round(float(bid[0]), 5), round(float(ask[0]), 5)
+
+    def ticks(self, symbol: str, since_msc: int, limit: int) -> list[TickRow]:
+        # Тик — каждый шаг пути; с since_msc <= 0 — только текущий
+        with self._lock:
+            path = self._path(symbol)
+            step = self._step_of(path, self.clock.time())
+            self._advance_to(path, step, [], None)
+            first = step
+            if since_msc > 0:
+                first = self._step_of(path, since_msc / 1000)
+            first = max(first, step + 1 - limit, path.block_start)
+            times, bid, ask = self._prices(path, first, step + 1)
+        rows = zip(
+            np.rint(times * 1000).astype(np.int64).tolist(),
+            np.round(bid, 5).tolist(),
+            np.round(ask, 5).tolist(),
+        )
+        return [row for row in rows if row[0] > since_msc]
+
+    def symbol_info(self, symbol: str) -> SymbolInfo:
+        info = SymbolInfo.guess(symbol)
+        return replace(info, stops_level=self.config.stops_level)
+
+    def advance(self, book: "OrderBook") -> list[StopFill]:
+        now = self.clock.time()
+        by_symbol: dict[str, list[OrderRecord]] = {}
+        for order in book:
+            by_symbol.setdefault(order.symbol, []).append(order)
+        fills: list[StopFill] = []
+        with self._lock:
+            for symbol in by_symbol:
+                self._path(symbol)
+            # Курсор двигаем у всех символов: новый ордер не должен
+            # исполниться по ценам до своего выставления
+            for symbol, path in self._paths.items():
+                step = self._step_of(path, now)
+                fills += self._advance_to(path, step, by_symbol.get(symbol, []), book)
+        return fills
+
+    def expect_news(self, symbol: str, when: datetime) -> None:
+        ts = when.astimezone().timestamp()
+        with self._lock:
+            path = self._paths.get(symbol)
+            if path is None:
+                self._news.setdefault(symbol, set()).add(ts)
+            elif all(b.start != (ts - path.t0) / self.config.dt for b in path.bursts):
+                self._add_burst(path, ts)
+
+    def delay(self) -> None:
+        if self.config.latency > 0:
+            time.sleep(self.config.latency)
+
+    def rejected(self) -> bool:
+        return self._random.random() < self.config.reject_rate
@@ -0,0 +1,304 @@
+"""Метрики горячего пути: гистограммы задержек, счётчики, gauge.
+
+Гистограммы с фиксированными корзинами (как в Prometheus): наблюдение —
+bisect и два сложения, без аллокаций. Серии создаются по имени и меткам
+при первом обращении; одну серию должен обновлять один поток (вызовы
+MT5 — поток шлюза, остальное — event loop). Отдаются через /metrics в
+Telegram и текстом Prometheus на localhost (settings.metrics_port).
+"""
+
+import asyncio
+import bisect
+import functools
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Границы корзин задержек, сек
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # последняя — +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля сверху: граница корзины, где набирается доля q."""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class Counter:
+    """Монотонный счётчик."""
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Gauge:
+    """Последнее значение."""
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Registry:
+    """Набор серий метрик по (имени, меткам)."""
+
+    def __init__(self) -> None:
+        self._series: dict[tuple[str, Labels], Histogram | Counter | Gauge] = {}
+        self._kinds: dict[str, str] = {}
+        self._help: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, name: str, labels: dict[str, str], factory: Any) -> Any:
+        key = (name, tuple(sorted(labels.items())))
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.get(key)
+                if series is None:
+                    self._kinds.setdefault(name, kind)
+                    series = self._series[key] = factory()
+        return series
+
+    def describe(self, name: str, text: str) -> None:
+        """Описание метрики (строка # HELP)."""
+        self._help[name] = text
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        series: Histogram = self._get("histogram", name, labels, Histogram)
+        return series
+
+    def counter(self, name: str, **labels: str) -> Counter:
+        series: Counter = self._get("counter", name, labels, Counter)
+        return series
+
+    def gauge(self, name: str, **labels: str) -> Gauge:
+        series: Gauge = self._get("gauge", name, labels, Gauge)
+        return series
+
+    def _sorted(self) -> list[tuple[tuple[str, Labels], Histogram | Counter | Gauge]]:
+        with self._lock:
+            return sorted(self._series.items(), key=lambda item: item[0])
+
+    def snapshot(self) -> list[tuple[str, str, Labels, Any]]:
+        """Состояние всех серий для передачи в другой процесс."""
+        result: list[tuple[str, str, Labels, Any]] = []
+        for (name, labels), series in self._sorted():
+            if isinstance(series, Histogram):
+                state: Any = (list(series.counts), series.sum, series.count)
+            else:
+                state = series.value
+            result.append((self._kinds[name], name, labels, state))
+        return result
+
+    def load(
+        self, snapshot: list[tuple[str, str, Labels, Any]], **extra: str
+    ) -> None:
+        """Заменить серии состоянием из snapshot(), добавив метки extra."""
+        factories = {"histogram": Histogram, "counter": Counter, "gauge": Gauge}
+        for kind, name, labels, state in snapshot:
+            series = self._get(kind, name, {**dict(labels), **extra}, factories[kind])
+            if isinstance(series, Histogram):
+                counts, series.sum, series.count = state
+                series.counts[:] = counts
+            else:
+                series.value = state
+
+    def render_prometheus(self) -> str:
+        """Текстовый формат экспозиции Prometheus 0.0.4."""
+        lines: list[str] = []
+        last_name = ""
+        for (name, labels), series in self._sorted():
+            if name != last_name:
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {self._kinds[name]}")
+                last_name = name
+            if isinstance(series, Histogram):
+                cumulative = 0
+                bounds = [*map(repr, series.bounds), "+Inf"]
+                for bound, n in zip(bounds, series.counts):
+                    cumulative += n
+                    lines.append(
+                        f"{name}_bucket{_fmt(labels, ('le', bound))} {cumulative}"
+                    )
+                lines.append(f"{name}_sum{_fmt(labels)} {series.sum!r}")
+                lines.append(f"{name}_count{_fmt(labels)} {series.count}")
+            else:
+                lines.append(f"{name}{_fmt(labels)} {series.value!r}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """Краткая сводка для Telegram: p50/p99 гистограмм и значения."""
+        lines: list[str] = []
+        for (name, labels), series in self._sorted():
+            tags = " ".join(v for _, v in labels)
+            title = f"{name} {tags}".strip()
+            if isinstance(series, Histogram):
+                if series.count == 0:
+                    continue
+                p50 = _ms(series.quantile(0.5))
+                p99 = _ms(series.quantile(0.99))
+                lines.append(f"{title}: n={series.count} p50≤{p50} p99≤{p99}")
+            else:
+                lines.append(f"{title}: {series.value:g}")
+        return "\n".join(lines) if lines else "Метрик пока нет."
+
+
+def _fmt(labels: Labels, *extra: tuple[str, str]) -> str:
+    items = [*labels, *extra]
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in items)
+    return "{" + body + "}"
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:g}мс" if seconds != float("inf") else "∞"
+
+
+METRICS = Registry()
+METRICS.describe("mt5_call_seconds", "Длительность вызова терминала MT5")
+METRICS.describe("order_modify_total", "Модификации ордеров по результату")
+METRICS.describe(
+    "orders_rejected_locally_total",
+    "Запросы, отклонённые локальной проверкой и не отправленные в терминал",
+)
+METRICS.describe(
+    "placement_burst_seconds", "От первого до последнего ответа в пакете выставления"
+)
+METRICS.describe(
+    "placement_lone_legs_total", "Стрэддлы, у которых выставилась одна нога"
+)
+METRICS.describe(
+    "oco_cancel_seconds", "От обнаружения исполнения до снятия встречного ордера"
+)
+METRICS.describe("oco_cancel_total", "Снятия встречных ордеров OCO по результату")
+METRICS.describe("event_loop_lag_seconds", "Задержка пробуждения event loop")
+METRICS.describe("feed_sleep_late_seconds", "Опоздание пробуждения опроса цены")
+METRICS.describe("feed_missed_polls_total", "Пропущенные слоты опроса цены")
+METRICS.describe("feed_ticks_total", "Тики, прочитанные из потока терминала")
+METRICS.describe("requote_late_seconds", "Опоздание перестановки от её дедлайна")
+METRICS.describe("requote_missed_ticks_total", "Пропущенные слоты перестановки")
+METRICS.describe("notifications_sent_total", "Отправленные уведомления Telegram")
+METRICS.describe("notifications_dropped_total", "Отброшенные уведомления Telegram")
+METRICS.describe(
+    "order_price_age_at_release_seconds",
+    "Возраст цены, по которой стоят ордера, в момент новости",
+)
+
+
+def timed(op: str, symbol_of: Callable[..., str]) -> Callable[[F], F]:
+    """Декоратор метода MT5Client: длительность в mt5_call_seconds{op, symbol}.
+
+    symbol_of получает те же аргументы, что и метод, и вызывается до него.
+    """
+
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            symbol = symbol_of(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                METRICS.histogram("mt5_call_seconds", op=op, symbol=symbol).observe(
+                    elapsed
+                )
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+async def monitor_loop_lag(interval: float = 0.5) -> None:
+    """Замерять, насколько позже заказанного просыпается event loop."""
+    loop = asyncio.get_running_loop()
+    histogram = METRICS.histogram("event_loop_lag_seconds")
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        histogram.observe(max(0.0, loop.time() - started - interval))
+
+
+async def _handle_scrape(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    try:
+        # Тело запроса не важно: дочитываем заголовки и отдаём все метрики
+        while await reader.readline() not in (b"\r\n", b"\n", b""):
+            pass
+        body = METRICS.render_prometheus().encode("utf-8")
+        writer.write(
+            b"HTTP/1.0 200 OK\r\n"
+            b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_metrics(host: str, port: int) -> asyncio.Server:
+    """Запустить HTTP-эндпоинт с метриками в формате Prometheus."""
+    server = await asyncio.start_server(_handle_scrape, host, port)
+    logger.info("📈 Метрики Prometheus: http://%s:%d/metrics", host, port)
+    return server
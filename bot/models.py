@@ -15,6 +15,15 @@ class NewsEvent(BaseModel):
     active: bool = True
 
 
+class TradeState(BaseModel):
+    """Ордера торговли по новости — переживают перезапуск бота."""
+
+    event_id: int
+    phase: str  # placed — ордера переставляются, released — новость вышла
+    buy_ticket: int
+    sell_ticket: int
+
+
 class PendingOrder(BaseModel):
     """Отложенный ордер."""
 
@@ -1,10 +1,15 @@
 """Клиент MetaTrader 5 с demo-заглушкой."""
 
 import logging
-import random
-from dataclasses import dataclass, field
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
 
-from bot.config import settings
+from bot.config import AccountConfig, settings
+from bot.market_sim import MarketEngine, MarketSimulator, SimConfig, TickRow
+from bot.metrics import METRICS, timed
+from bot.symbols import SymbolInfo
 
 logger = logging.getLogger(__name__)
 
@@ -19,25 +24,124 @@ except ImportError:
 
 
 @dataclass
-class MockOrder:
-    """Мок отложенного ордера для demo-режима."""
+class OrderRecord:
+    """Отложенный ордер в локальной книге."""
 
     ticket: int
     symbol: str
-    order_type: str
+    order_type: str  # BUY_STOP / SELL_STOP
     price: float
     lot: float
+    last_ack: float = 0.0  # time.time() последнего подтверждения терминалом
+
+
+@dataclass
+class MockOrder(OrderRecord):
+    """Мок отложенного ордера для demo-режима."""
+
+
+@dataclass
+class Position:
+    """Открытая позиция (demo: из сработавшего стоп-ордера)."""
+
+    ticket: int
+    symbol: str
+    side: str  # BUY / SELL
+    volume: float
+    price_open: float
+    time_open: float  # секунды от эпохи
+
+
+class OrderBook:
+    """Книга отложенных ордеров по ticket.
+
+    Используется и как локальный кэш выставленных клиентом ордеров,
+    и как хранилище «брокера» в demo-режиме.
+    """
+
+    def __init__(self) -> None:
+        self._orders: dict[int, OrderRecord] = {}
+
+    def add(self, order: OrderRecord) -> None:
+        """Добавить (или заменить) ордер."""
+        self._orders[order.ticket] = order
+
+    def get(self, ticket: int) -> OrderRecord | None:
+        """Ордер по ticket или None."""
+        return self._orders.get(ticket)
+
+    def modify(self, ticket: int, price: float) -> bool:
+        """Обновить цену ордера. False, если ордера нет."""
+        order = self._orders.get(ticket)
+        if order is None:
+            return False
+        order.price = price
+        order.last_ack = time.time()
+        return True
+
+    def remove(self, ticket: int) -> bool:
+        """Удалить ордер. False, если ордера нет."""
+        return self._orders.pop(ticket, None) is not None
+
+    def snapshot(self) -> list[OrderRecord]:
+        """Копия текущего состояния книги."""
+        return list(self._orders.values())
+
+    def reconcile(self, snapshot: Iterable[OrderRecord]) -> tuple[int, int]:
+        """Сверить книгу со снимком терминала.
+
+        Ордера из снимка, которых нет в книге, игнорируются (они не наши).
+        Возвращает (обновлено, удалено).
+        """
+        live = {o.ticket: o for o in snapshot}
+        now = time.time()
+        updated = 0
+        gone = [t for t in self._orders if t not in live]
+        for ticket in gone:
+            del self._orders[ticket]
+        for ticket, order in self._orders.items():
+            order.price = live[ticket].price
+            order.last_ack = now
+            updated += 1
+        return updated, len(gone)
+
+    def __contains__(self, ticket: object) -> bool:
+        return ticket in self._orders
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __iter__(self) -> Iterator[OrderRecord]:
+        return iter(list(self._orders.values()))
 
 
 class MT5Client:
     """Обёртка над MetaTrader5 с fallback на demo-режим."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self, engine: MarketEngine | None = None, account: AccountConfig | None = None
+    ) -> None:
+        self.account = account  # None — счёт из MT5_LOGIN / MT5_PASSWORD / ...
         self._connected: bool = False
         self._demo: bool = settings.demo_mode or not MT5_AVAILABLE
-        self._mock_orders: dict[int, MockOrder] = {}
+        self._orders = OrderBook()  # кэш ордеров, выставленных этим клиентом
+        self._mock_orders = OrderBook()  # demo: ордера на стороне «брокера»
+        self._mock_positions: dict[int, Position] = {}
+        # Выставленные клиентом ордера, исполнение которых ещё не сообщено
+        self._unfilled: set[int] = set()
         self._mock_ticket_counter: int = 1000
-        self._mock_prices: dict[str, float] = field(default_factory=dict) if False else {}
+        # Спецификации символов и monotonic-время их загрузки
+        self._symbols: dict[str, tuple[SymbolInfo, float]] = {}
+        # Последние (bid, ask), отданные вызывающему, — для проверки ордеров
+        self._quotes: dict[str, tuple[float, float]] = {}
+        # demo: котировки, исполнение стопов, задержка и отказы «брокера»
+        self.engine = engine or MarketSimulator(
+            SimConfig(
+                seed=settings.sim_seed,
+                latency=settings.sim_latency_ms / 1000,
+                reject_rate=settings.sim_reject_rate,
+            )
+        )
 
     def connect(self) -> bool:
         """Подключиться к MT5 или активировать demo-режим."""
@@ -46,15 +150,22 @@ class MT5Client:
             self._connected = True
             return True
 
-        if not mt5.initialize(path=settings.mt5_path or None):
+        account = self.account or AccountConfig(
+            name="default",
+            login=settings.mt5_login,
+            password=settings.mt5_password,
+            server=settings.mt5_server,
+            path=settings.mt5_path,
+        )
+        if not mt5.initialize(path=account.path or None):
             logger.error("Не удалось инициализировать MT5: %s", mt5.last_error())
             return False
 
-        if settings.mt5_login:
+        if account.login:
             auth = mt5.login(
-                login=settings.mt5_login,
-                password=settings.mt5_password,
-                server=settings.mt5_server,
+                login=account.login,
+                password=account.password,
+                server=account.server,
             )
             if not auth:
                 logger.error("Ошибка авторизации MT5: %s", mt5.last_error())
@@ -73,141 +184,422 @@ class MT5Client:
 
     def get_price(self, symbol: str) -> float | None:
         """Получить текущую цену (bid) по символу."""
+        quote = self.get_quote(symbol)
+        return quote[0] if quote is not None else None
+
+    @timed("quote", lambda self, symbol: symbol)
+    def get_quote(self, symbol: str) -> tuple[float, float] | None:
+        """Получить текущие (bid, ask) по символу."""
         if self._demo:
-            # Генерируем стабильную mock-цену с небольшим шумом
-            if symbol not in self._mock_prices:
-                base_prices: dict[str, float] = {
-                    "EURUSD": 1.08500,
-                    "GBPUSD": 1.26300,
-                    "USDJPY": 149.500,
-                    "USDCHF": 0.87800,
-                    "AUDUSD": 0.65200,
-                    "USDCAD": 1.35600,
-                    "NZDUSD": 0.60100,
-                }
-                self._mock_prices[symbol] = base_prices.get(symbol, 1.10000)
-            # Добавляем рыночный шум ±50 пунктов (5-й знак)
-            noise = random.uniform(-0.00050, 0.00050)
-            return round(self._mock_prices[symbol] + noise, 5)
-
-        tick = mt5.symbol_info_tick(symbol)
-        if tick is None:
-            logger.error("Не удалось получить цену %s", symbol)
+            self._sync_demo()
+            quote = self.engine.quote(symbol)
+        else:
+            tick = mt5.symbol_info_tick(symbol)
+            if tick is None:
+                logger.error("Не удалось получить цену %s", symbol)
+                return None
+            quote = float(tick.bid), float(tick.ask)
+        if quote is not None:
+            self._quotes[symbol] = quote
+        return quote
+
+    def symbol_info(self, symbol: str) -> SymbolInfo | None:
+        """Спецификация символа: из кэша, раз в symbol_info_ttl — из терминала."""
+        cached = self._symbols.get(symbol)
+        now = time.monotonic()
+        if cached is not None and now - cached[1] < settings.symbol_info_ttl:
+            return cached[0]
+        if self._demo:
+            info = self.engine.symbol_info(symbol)
+        else:
+            raw = mt5.symbol_info(symbol)
+            if raw is None:
+                logger.error("Нет спецификации %s: %s", symbol, mt5.last_error())
+                # Устаревшая спецификация лучше, чем никакой
+                return cached[0] if cached is not None else None
+            info = SymbolInfo(
+                symbol=symbol,
+                point=float(raw.point),
+                digits=int(raw.digits),
+                tick_size=float(raw.trade_tick_size),
+                stops_level=int(raw.trade_stops_level),
+                volume_min=float(raw.volume_min),
+                volume_max=float(raw.volume_max),
+                volume_step=float(raw.volume_step),
+            )
+        self._symbols[symbol] = (info, now)
+        return info
+
+    def _check_stop(
+        self, symbol: str, order_type: str, price: float, lot: float
+    ) -> tuple[float, float] | None:
+        """Нормализовать цену и объём стоп-ордера и проверить их до терминала.
+
+        None — запрос заведомо отклонил бы брокер; он не отправляется и
+        учитывается в orders_rejected_locally_total.
+        """
+        info = self.symbol_info(symbol)
+        if info is None:
+            return price, lot
+        price = info.normalize_price(price)
+        lot = info.normalize_volume(lot)
+        reason = ""
+        if lot <= 0:
+            reason = "volume"
+        elif (quote := self._market(symbol)) is not None:
+            bid, ask = quote
+            if order_type == "BUY_STOP" and price < ask + info.stops_distance:
+                reason = "stops_level"
+            elif order_type == "SELL_STOP" and price > bid - info.stops_distance:
+                reason = "stops_level"
+        if reason:
+            METRICS.counter(
+                "orders_rejected_locally_total", symbol=symbol, reason=reason
+            ).inc()
+            logger.warning(
+                "⛔ %s %s @ %.*f отклонён до отправки: %s",
+                order_type,
+                symbol,
+                info.digits,
+                price,
+                reason,
+            )
             return None
-        return float(tick.bid)
+        return price, lot
+
+    def _market(self, symbol: str) -> tuple[float, float] | None:
+        """(bid, ask) для проверки ордера: последняя котировка, отданная клиентом.
+
+        По ней вызывающий и считал цену ордера; отдельный запрос цены
+        удвоил бы вызовы терминала на каждой перестановке, а в demo
+        сдвинул бы путь цены мимо ещё не исполненных стоп-ордеров.
+        None — котировок по символу не было, проверку делает брокер.
+        """
+        return self._quotes.get(symbol)
 
+    @timed("ticks", lambda self, symbol, *_: symbol)
+    def copy_ticks(self, symbol: str, since_msc: int) -> list[TickRow]:
+        """Тики позже since_msc (мс от эпохи) — инкрементальное чтение потока.
+
+        Первый вызов (since_msc <= 0) отдаёт только текущий тик; дальше
+        вызывающий передаёт время последнего полученного тика.
+        """
+        rows = self._read_ticks(symbol, since_msc)
+        if rows:
+            _, bid, ask = rows[-1]
+            self._quotes[symbol] = (bid, ask)
+        return rows
+
+    def _read_ticks(self, symbol: str, since_msc: int) -> list[TickRow]:
+        limit = settings.stream_batch
+        if self._demo:
+            self._sync_demo()
+            return self.engine.ticks(symbol, since_msc, limit)
+
+        if since_msc <= 0:
+            tick = mt5.symbol_info_tick(symbol)
+            if tick is None:
+                logger.error("Не удалось получить цену %s", symbol)
+                return []
+            return [(int(tick.time_msc), float(tick.bid), float(tick.ask))]
+        since = datetime.fromtimestamp(since_msc / 1000, tz=timezone.utc)
+        ticks = mt5.copy_ticks_from(symbol, since, limit, mt5.COPY_TICKS_INFO)
+        if ticks is None:
+            logger.error("Не удалось получить тики %s: %s", symbol, mt5.last_error())
+            return []
+        return [
+            (int(t["time_msc"]), float(t["bid"]), float(t["ask"]))
+            for t in ticks
+            if t["time_msc"] > since_msc
+        ]
+
+    @timed("place", lambda self, symbol, *_: symbol)
     def place_buy_stop(self, symbol: str, price: float, lot: float) -> int | None:
         """Выставить Buy Stop ордер. Возвращает ticket."""
+        checked = self._check_stop(symbol, "BUY_STOP", price, lot)
+        if checked is None:
+            return None
+        price, lot = checked
         if self._demo:
+            if not self._accept_demo("BUY_STOP", symbol):
+                return None
             self._mock_ticket_counter += 1
             ticket = self._mock_ticket_counter
-            self._mock_orders[ticket] = MockOrder(
-                ticket=ticket,
-                symbol=symbol,
-                order_type="BUY_STOP",
-                price=price,
-                lot=lot,
+            self._mock_orders.add(
+                MockOrder(
+                    ticket=ticket,
+                    symbol=symbol,
+                    order_type="BUY_STOP",
+                    price=price,
+                    lot=lot,
+                )
             )
             logger.info(
                 "📈 [DEMO] Buy Stop: %s @ %.5f (ticket=%d)", symbol, price, ticket
             )
-            return ticket
-
-        request = {
-            "action": mt5.TRADE_ACTION_PENDING,
-            "symbol": symbol,
-            "volume": lot,
-            "type": mt5.ORDER_TYPE_BUY_STOP,
-            "price": price,
-            "type_filling": mt5.ORDER_FILLING_IOC,
-        }
-        result = mt5.order_send(request)
-        if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
-            logger.error("Ошибка Buy Stop: %s", result)
-            return None
-        logger.info("📈 Buy Stop: %s @ %.5f (ticket=%d)", symbol, price, result.order)
-        return int(result.order)
+        else:
+            request = {
+                "action": mt5.TRADE_ACTION_PENDING,
+                "symbol": symbol,
+                "volume": lot,
+                "type": mt5.ORDER_TYPE_BUY_STOP,
+                "price": price,
+                "type_filling": mt5.ORDER_FILLING_IOC,
+            }
+            result = mt5.order_send(request)
+            if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+                logger.error("Ошибка Buy Stop: %s", result)
+                return None
+            ticket = int(result.order)
+            logger.info("📈 Buy Stop: %s @ %.5f (ticket=%d)", symbol, price, ticket)
 
+        self._orders.add(
+            OrderRecord(ticket, symbol, "BUY_STOP", price, lot, last_ack=time.time())
+        )
+        self._unfilled.add(ticket)
+        return ticket
+
+    @timed("place", lambda self, symbol, *_: symbol)
     def place_sell_stop(self, symbol: str, price: float, lot: float) -> int | None:
         """Выставить Sell Stop ордер. Возвращает ticket."""
+        checked = self._check_stop(symbol, "SELL_STOP", price, lot)
+        if checked is None:
+            return None
+        price, lot = checked
         if self._demo:
+            if not self._accept_demo("SELL_STOP", symbol):
+                return None
             self._mock_ticket_counter += 1
             ticket = self._mock_ticket_counter
-            self._mock_orders[ticket] = MockOrder(
-                ticket=ticket,
-                symbol=symbol,
-                order_type="SELL_STOP",
-                price=price,
-                lot=lot,
+            self._mock_orders.add(
+                MockOrder(
+                    ticket=ticket,
+                    symbol=symbol,
+                    order_type="SELL_STOP",
+                    price=price,
+                    lot=lot,
+                )
             )
             logger.info(
                 "📉 [DEMO] Sell Stop: %s @ %.5f (ticket=%d)", symbol, price, ticket
             )
-            return ticket
-
-        request = {
-            "action": mt5.TRADE_ACTION_PENDING,
-            "symbol": symbol,
-            "volume": lot,
-            "type": mt5.ORDER_TYPE_SELL_STOP,
-            "price": price,
-            "type_filling": mt5.ORDER_FILLING_IOC,
-        }
-        result = mt5.order_send(request)
-        if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
-            logger.error("Ошибка Sell Stop: %s", result)
-            return None
-        logger.info("📉 Sell Stop: %s @ %.5f (ticket=%d)", symbol, price, result.order)
-        return int(result.order)
+        else:
+            request = {
+                "action": mt5.TRADE_ACTION_PENDING,
+                "symbol": symbol,
+                "volume": lot,
+                "type": mt5.ORDER_TYPE_SELL_STOP,
+                "price": price,
+                "type_filling": mt5.ORDER_FILLING_IOC,
+            }
+            result = mt5.order_send(request)
+            if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+                logger.error("Ошибка Sell Stop: %s", result)
+                return None
+            ticket = int(result.order)
+            logger.info("📉 Sell Stop: %s @ %.5f (ticket=%d)", symbol, price, ticket)
+
+        self._orders.add(
+            OrderRecord(ticket, symbol, "SELL_STOP", price, lot, last_ack=time.time())
+        )
+        self._unfilled.add(ticket)
+        return ticket
 
+    @timed("modify", lambda self, ticket, *_: self._symbol_of(ticket))
     def modify_order(self, ticket: int, new_price: float) -> bool:
         """Переместить отложенный ордер на новую цену."""
-        if self._demo:
-            if ticket in self._mock_orders:
-                old_price = self._mock_orders[ticket].price
-                self._mock_orders[ticket].price = new_price
-                logger.debug(
-                    "🔄 [DEMO] Ордер %d: %.5f → %.5f", ticket, old_price, new_price
-                )
-                return True
-            return False
-
-        order_info = mt5.orders_get(ticket=ticket)
-        if not order_info:
+        order = self._orders.get(ticket)
+        if order is None:
             logger.error("Ордер %d не найден", ticket)
             return False
-
-        request = {
-            "action": mt5.TRADE_ACTION_MODIFY,
-            "order": ticket,
-            "price": new_price,
-        }
-        result = mt5.order_send(request)
-        if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
-            logger.error("Ошибка модификации ордера %d: %s", ticket, result)
+        checked = self._check_stop(order.symbol, order.order_type, new_price, order.lot)
+        if checked is None:
             return False
+        new_price = checked[0]
+        if order.price == new_price:
+            return True
+
+        if self._demo:
+            if not self._accept_demo("MODIFY", order.symbol):
+                return False
+            if not self._mock_orders.modify(ticket, new_price):
+                self._orders.remove(ticket)
+                return False
+            logger.debug(
+                "🔄 [DEMO] Ордер %d: %.5f → %.5f", ticket, order.price, new_price
+            )
+        else:
+            request = {
+                "action": mt5.TRADE_ACTION_MODIFY,
+                "order": ticket,
+                "price": new_price,
+            }
+            result = mt5.order_send(request)
+            if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+                logger.error("Ошибка модификации ордера %d: %s", ticket, result)
+                return False
+
+        self._orders.modify(ticket, new_price)
         return True
 
+    @timed("cancel", lambda self, ticket: self._symbol_of(ticket))
     def cancel_order(self, ticket: int) -> bool:
         """Отменить отложенный ордер."""
-        if self._demo:
-            if ticket in self._mock_orders:
-                del self._mock_orders[ticket]
-                logger.info("❌ [DEMO] Ордер %d отменён", ticket)
-                return True
+        if ticket not in self._orders:
+            logger.error("Ордер %d не найден", ticket)
             return False
 
-        request = {
-            "action": mt5.TRADE_ACTION_REMOVE,
-            "order": ticket,
-        }
-        result = mt5.order_send(request)
-        if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
-            logger.error("Ошибка отмены ордера %d: %s", ticket, result)
+        if self._demo:
+            if not self._accept_demo("REMOVE", self._symbol_of(ticket)):
+                return False
+            if not self._mock_orders.remove(ticket):
+                self._orders.remove(ticket)
+                return False
+            logger.info("❌ [DEMO] Ордер %d отменён", ticket)
+        else:
+            request = {
+                "action": mt5.TRADE_ACTION_REMOVE,
+                "order": ticket,
+            }
+            result = mt5.order_send(request)
+            if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+                logger.error("Ошибка отмены ордера %d: %s", ticket, result)
+                return False
+            logger.info("❌ Ордер %d отменён", ticket)
+
+        self._orders.remove(ticket)
+        self._unfilled.discard(ticket)
+        return True
+
+    def _sync_demo(self) -> None:
+        """demo: задержка «сети» и исполнение сработавших стоп-ордеров."""
+        self.engine.delay()
+        for fill in self.engine.advance(self._mock_orders):
+            order = fill.order
+            side = "BUY" if order.order_type == "BUY_STOP" else "SELL"
+            self._mock_positions[order.ticket] = Position(
+                order.ticket, order.symbol, side, order.lot, fill.price, fill.time
+            )
+            logger.info(
+                "💥 [DEMO] Сработал %s %s @ %.5f (ордер %.5f, ticket=%d)",
+                order.order_type,
+                order.symbol,
+                fill.price,
+                order.price,
+                order.ticket,
+            )
+
+    def _accept_demo(self, action: str, symbol: str) -> bool:
+        """demo: синхронизировать рынок и решить, примет ли «брокер» запрос."""
+        self._sync_demo()
+        if self.engine.rejected():
+            logger.error("[DEMO] Запрос %s по %s отклонён", action, symbol)
             return False
-        logger.info("❌ Ордер %d отменён", ticket)
         return True
 
+    def expect_news(self, symbol: str, when: datetime) -> None:
+        """demo: сообщить симулятору о новости (всплеск волатильности)."""
+        if self._demo:
+            self.engine.expect_news(symbol, when)
+
+    @property
+    def positions(self) -> list[Position]:
+        """demo: позиции из сработавших стоп-ордеров."""
+        return list(self._mock_positions.values())
+
+    def take_fills(self) -> list[Position]:
+        """Позиции, открытые нашими стоп-ордерами после прошлого вызова.
+
+        Ticket позиции — ticket исполненного ордера (identifier в MT5).
+        """
+        if not self._unfilled:
+            return []
+        if self._demo:
+            self._sync_demo()
+            positions = list(self._mock_positions.values())
+        else:
+            raw = mt5.positions_get()
+            if raw is None:
+                logger.error("Не удалось получить позиции: %s", mt5.last_error())
+                return []
+            positions = [
+                Position(
+                    ticket=int(p.identifier),
+                    symbol=p.symbol,
+                    side="BUY" if p.type == mt5.POSITION_TYPE_BUY else "SELL",
+                    volume=float(p.volume),
+                    price_open=float(p.price_open),
+                    time_open=p.time_msc / 1000,
+                )
+                for p in raw
+            ]
+        fills = [p for p in positions if p.ticket in self._unfilled]
+        for position in fills:
+            self._unfilled.discard(position.ticket)
+        return fills
+
+    def _symbol_of(self, ticket: int) -> str:
+        order = self._orders.get(ticket)
+        return order.symbol if order is not None else ""
+
+    def _terminal_orders(self) -> list[OrderRecord] | None:
+        """Все отложенные ордера счёта одним запросом orders_get()."""
+        if self._demo:
+            self._sync_demo()
+            return self._mock_orders.snapshot()
+        orders = mt5.orders_get()
+        if orders is None:
+            logger.error("Не удалось получить ордера: %s", mt5.last_error())
+            return None
+        types = {
+            mt5.ORDER_TYPE_BUY_STOP: "BUY_STOP",
+            mt5.ORDER_TYPE_SELL_STOP: "SELL_STOP",
+        }
+        return [
+            OrderRecord(
+                ticket=int(o.ticket),
+                symbol=o.symbol,
+                order_type=types.get(o.type, str(o.type)),
+                price=float(o.price_open),
+                lot=float(o.volume_current),
+            )
+            for o in orders
+        ]
+
+    def adopt_orders(self, tickets: Iterable[int]) -> list[OrderRecord]:
+        """Взять в кэш ордера с данными ticket (после перезапуска бота).
+
+        Один запрос orders_get(); возвращает найденные в терминале ордера.
+        """
+        wanted = set(tickets)
+        snapshot = self._terminal_orders()
+        if snapshot is None:
+            return []
+        now = time.time()
+        found = [replace(o, last_ack=now) for o in snapshot if o.ticket in wanted]
+        for order in found:
+            self._orders.add(replace(order))
+            self._unfilled.add(order.ticket)
+        return found
+
+    def reconcile_orders(self) -> tuple[int, int]:
+        """Сверить кэш ордеров с терминалом одним запросом orders_get().
+
+        Возвращает (обновлено, удалено из кэша).
+        """
+        snapshot = self._terminal_orders()
+        if snapshot is None:
+            return 0, 0
+        updated, removed = self._orders.reconcile(snapshot)
+        if removed:
+            logger.info("Сверка ордеров: %d исчезли из терминала", removed)
+        return updated, removed
+
+    @property
+    def orders(self) -> OrderBook:
+        """Локальный кэш выставленных ордеров."""
+        return self._orders
+
     @property
     def is_demo(self) -> bool:
         """Работаем в demo-режиме?"""
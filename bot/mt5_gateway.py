@@ -0,0 +1,313 @@
+"""Асинхронный шлюз к MT5: все вызовы терминала в одном выделенном потоке."""
+
+import asyncio
+import concurrent.futures
+import itertools
+import logging
+import queue
+import threading
+from collections.abc import Callable
+from datetime import datetime
+from enum import IntEnum
+from typing import Any, TypeVar
+
+from bot.config import settings
+from bot.market_sim import TickRow
+from bot.mt5_client import MT5Client, OrderRecord, Position
+from bot.symbols import SymbolInfo
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    """Полосы приоритета очереди: меньше — раньше."""
+
+    CONTROL = 0  # connect / disconnect
+    CANCEL = 1
+    MODIFY = 2
+    PLACE = 3
+    READ = 4
+
+
+# Начатые терминалом выставление и модификация по таймауту не бросаем:
+# order_send всё равно дойдёт до брокера, а вызывающий, решив, что ордера
+# нет, выставил бы второй. Не начатые ещё запросы снимаются с очереди.
+IRREVOCABLE = frozenset({Priority.PLACE, Priority.MODIFY})
+
+_STOP = object()
+
+
+class MT5Gateway:
+    """Шлюз к MT5Client.
+
+    MetaTrader5 API глобален для процесса и блокирующий, поэтому им владеет
+    единственный рабочий поток, обслуживающий очередь с приоритетами.
+    Корутины получают результат через await и не блокируют event loop.
+    Demo-клиент ходит тем же путём.
+
+    inline=True выполняет вызовы прямо в потоке event loop — только для
+    клиентов, которые не блокируются (воспроизведение тиков в бэктесте).
+    """
+
+    def __init__(
+        self, client: MT5Client, timeout: float | None = None, inline: bool = False
+    ) -> None:
+        self.client = client
+        self.inline = inline
+        self.timeout = timeout if timeout is not None else settings.mt5_call_timeout
+        self._queue: queue.PriorityQueue[tuple[int, int, Any]] = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._thread: threading.Thread | None = None
+        self.timeouts: int = 0  # вызовов, не уложившихся в таймаут
+
+    # --- жизненный цикл -------------------------------------------------
+
+    def start(self) -> bool:
+        """Запустить рабочий поток и подключиться к MT5 из него."""
+        if self.inline:
+            return self.client.connect()
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="mt5-gateway", daemon=True
+            )
+            self._thread.start()
+        return self._submit(Priority.CONTROL, self.client.connect).result()
+
+    def stop(self) -> None:
+        """Отключиться от MT5 и остановить рабочий поток."""
+        if self.inline:
+            self.client.disconnect()
+            return
+        if self._thread is None:
+            return
+        self._submit(Priority.CONTROL, self.client.disconnect).result()
+        self._queue.put((Priority.CONTROL, next(self._seq), _STOP))
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            _, _, item = self._queue.get()
+            if item is _STOP:
+                return
+            fn, args, future = item
+            # Запрос, отменённый по таймауту до начала выполнения, пропускаем
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def _submit(
+        self, priority: Priority, fn: Callable[..., T], *args: Any
+    ) -> "concurrent.futures.Future[T]":
+        if self._thread is None:
+            raise RuntimeError("MT5Gateway не запущен")
+        future: concurrent.futures.Future[T] = concurrent.futures.Future()
+        self._queue.put((priority, next(self._seq), (fn, args, future)))
+        return future
+
+    async def call(
+        self,
+        priority: Priority,
+        fn: Callable[..., T],
+        *args: Any,
+        timeout: float | None = None,
+    ) -> T:
+        """Выполнить fn(*args) в потоке MT5. По таймауту — asyncio.TimeoutError.
+
+        Запрос из IRREVOCABLE, который поток MT5 уже начал, таймаутом не
+        прерывается: результат дожидаемся, чтобы не потерять ticket.
+        """
+        if self.inline:
+            return fn(*args)
+        submitted = self._submit(priority, fn, *args)
+        future = asyncio.wrap_future(submitted)
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(future), timeout or self.timeout
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            # cancel() не снимет запрос, который поток уже начал
+            if submitted.cancel() or priority not in IRREVOCABLE:
+                raise
+            logger.warning(
+                "⏳ %s не уложился в таймаут, ждём ответа терминала", fn.__name__
+            )
+            return await future
+
+    # --- торговые операции ------------------------------------------------
+
+    async def get_price(
+        self, symbol: str, timeout: float | None = None
+    ) -> float | None:
+        """Текущая цена (bid). None при ошибке или таймауте."""
+        try:
+            return await self.call(
+                Priority.READ, self.client.get_price, symbol, timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Таймаут получения цены %s", symbol)
+            return None
+
+    async def get_quote(
+        self, symbol: str, timeout: float | None = None
+    ) -> tuple[float, float] | None:
+        """Текущие (bid, ask). None при ошибке или таймауте."""
+        try:
+            return await self.call(
+                Priority.READ, self.client.get_quote, symbol, timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Таймаут получения цены %s", symbol)
+            return None
+
+    async def symbol_info(
+        self, symbol: str, timeout: float | None = None
+    ) -> SymbolInfo | None:
+        """Спецификация символа (из кэша клиента). None при ошибке или таймауте."""
+        try:
+            return await self.call(
+                Priority.READ, self.client.symbol_info, symbol, timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Таймаут получения спецификации %s", symbol)
+            return None
+
+    async def copy_ticks(
+        self, symbol: str, since_msc: int, timeout: float | None = None
+    ) -> list[TickRow]:
+        """Тики позже since_msc. Пустой список при ошибке или таймауте."""
+        try:
+            return await self.call(
+                Priority.READ,
+                self.client.copy_ticks,
+                symbol,
+                since_msc,
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Таймаут получения тиков %s", symbol)
+            return []
+
+    async def place_buy_stop(
+        self, symbol: str, price: float, lot: float, timeout: float | None = None
+    ) -> int | None:
+        """Выставить Buy Stop. Возвращает ticket или None."""
+        try:
+            return await self.call(
+                Priority.PLACE,
+                self.client.place_buy_stop,
+                symbol,
+                price,
+                lot,
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.error("Таймаут выставления Buy Stop %s", symbol)
+            return None
+
+    async def place_sell_stop(
+        self, symbol: str, price: float, lot: float, timeout: float | None = None
+    ) -> int | None:
+        """Выставить Sell Stop. Возвращает ticket или None."""
+        try:
+            return await self.call(
+                Priority.PLACE,
+                self.client.place_sell_stop,
+                symbol,
+                price,
+                lot,
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.error("Таймаут выставления Sell Stop %s", symbol)
+            return None
+
+    async def modify_order(
+        self, ticket: int, new_price: float, timeout: float | None = None
+    ) -> bool:
+        """Переместить отложенный ордер."""
+        try:
+            return await self.call(
+                Priority.MODIFY,
+                self.client.modify_order,
+                ticket,
+                new_price,
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Таймаут модификации ордера %d", ticket)
+            return False
+
+    async def cancel_order(self, ticket: int, timeout: float | None = None) -> bool:
+        """Отменить отложенный ордер."""
+        try:
+            return await self.call(
+                Priority.CANCEL, self.client.cancel_order, ticket, timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.error("Таймаут отмены ордера %d", ticket)
+            return False
+
+    async def reconcile_orders(self, timeout: float | None = None) -> tuple[int, int]:
+        """Сверить кэш ордеров клиента с терминалом. Возвращает (обновлено, удалено)."""
+        try:
+            return await self.call(
+                Priority.READ, self.client.reconcile_orders, timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Таймаут сверки ордеров")
+            return 0, 0
+
+    async def adopt_orders(
+        self, tickets: list[int], timeout: float | None = None
+    ) -> list[OrderRecord]:
+        """Найти ордера в терминале и взять их в кэш клиента (после рестарта)."""
+        try:
+            return await self.call(
+                Priority.READ, self.client.adopt_orders, tickets, timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Таймаут чтения ордеров")
+            return []
+
+    async def take_fills(self, timeout: float | None = None) -> list[Position]:
+        """Новые исполнения наших стоп-ордеров (см. MT5Client.take_fills)."""
+        try:
+            return await self.call(
+                Priority.READ, self.client.take_fills, timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Таймаут чтения позиций")
+            return []
+
+    async def expect_news(self, symbol: str, when: datetime) -> None:
+        """Сообщить demo-симулятору о предстоящей новости."""
+        try:
+            await self.call(Priority.CONTROL, self.client.expect_news, symbol, when)
+        except asyncio.TimeoutError:
+            logger.warning("Таймаут регистрации новости %s", symbol)
+
+    def account_of(self, ticket: int) -> str:
+        """Имя счёта, на котором стоит ордер; у шлюза один счёт."""
+        return self.client.account.name if self.client.account else ""
+
+    @property
+    def is_demo(self) -> bool:
+        """Работаем в demo-режиме?"""
+        return self.client.is_demo
+
+    @property
+    def is_connected(self) -> bool:
+        """Подключены к MT5?"""
+        return self.client.is_connected
+
+    @property
+    def pending(self) -> int:
+        """Запросов в очереди."""
+        return self._queue.qsize()
@@ -0,0 +1,590 @@
+"""Несколько счетов MT5: по рабочему процессу на счёт.
+
+API MetaTrader5 глобален для процесса — одно подключение к одному
+терминалу. Поэтому каждый счёт из settings.mt5_accounts обслуживает свой
+процесс: в нём MT5Client этого счёта и обычный MT5Gateway с очередью
+приоритетов. Главный процесс (Telegram, TradingScheduler) работает с
+ShardedGateway — тем же асинхронным API, что у MT5Gateway: вызов уходит
+по pipe в процесс счёта, за которым закреплён символ, ответ приходит в
+поток-читатель и завершает future. Метрики процессов приезжают снимками
+раз в секунду и попадают в общий реестр с меткой account.
+
+Символ закрепляется за счётом, в списке symbols которого он есть;
+остальные символы раскладываются хешем по счетам без списка (или по
+всем, если таких нет). Тикеты разных счетов могут совпадать, поэтому
+наружу отдаётся глобальный тикет: локальный, сдвинутый на _ACCOUNT_BITS,
+плюс ключ счёта — CRC32 его имени. Глобальные тикеты хранятся в таблице
+trades, так что ключ зависит только от имени счёта: добавление, удаление
+и перестановка счетов в MT5_ACCOUNTS не ломают восстановление торговель.
+"""
+
+import asyncio
+import concurrent.futures
+import itertools
+import logging
+import multiprocessing
+import threading
+import zlib
+from dataclasses import replace
+from datetime import datetime
+from multiprocessing.connection import Connection
+from multiprocessing.context import SpawnContext
+from typing import Any
+
+from bot.config import AccountConfig, settings
+from bot.market_sim import TickRow
+from bot.metrics import METRICS
+from bot.mt5_client import MT5Client, OrderRecord, Position
+from bot.mt5_gateway import IRREVOCABLE, MT5Gateway, Priority
+from bot.symbols import SymbolInfo
+
+logger = logging.getLogger(__name__)
+
+_METRICS_INTERVAL = 1.0  # сек между снимками метрик процесса счёта
+_START_TIMEOUT = 60.0  # сек на запуск процесса и подключение к терминалу
+_ACCOUNT_BITS = 16  # младшие биты глобального тикета — ключ счёта
+_ACCOUNT_MASK = (1 << _ACCOUNT_BITS) - 1
+
+
+# --- процесс счёта ----------------------------------------------------------
+
+
+def _worker_main(account: AccountConfig, inbox: Connection, outbox: Connection) -> None:
+    """Тело процесса счёта: принимает вызовы и отправляет результаты."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"%(asctime)s | {account.name} | %(name)s | %(levelname)s | %(message)s",
+    )
+    client = MT5Client(account=account)
+    gateway = MT5Gateway(client)
+    send_lock = threading.Lock()
+    inflight: dict[int, concurrent.futures.Future[Any]] = {}
+
+    def send(message: tuple[Any, ...]) -> None:
+        with send_lock:
+            outbox.send(message)
+
+    def reply(call_id: int, future: concurrent.futures.Future[Any]) -> None:
+        inflight.pop(call_id, None)
+        if future.cancelled():
+            send(("cancelled", call_id))
+            return
+        error = future.exception()
+        if error is None:
+            send(("result", call_id, True, future.result()))
+        else:
+            send(("result", call_id, False, RuntimeError(repr(error))))
+
+    def report(stop: threading.Event) -> None:
+        while not stop.wait(_METRICS_INTERVAL):
+            send(("state", client.is_connected, METRICS.snapshot()))
+
+    connected = gateway.start()
+    send(("ready", connected, client.is_demo))
+    stop = threading.Event()
+    reporter = threading.Thread(target=report, args=(stop,), daemon=True)
+    reporter.start()
+    try:
+        while True:
+            try:
+                message = inbox.recv()
+            except EOFError:
+                break
+            if message is None:
+                break
+            if message[0] == "cancel":
+                if (future := inflight.get(message[1])) is not None:
+                    future.cancel()
+                continue
+            _, call_id, priority, method, args = message
+            future = gateway._submit(priority, getattr(client, method), *args)
+            inflight[call_id] = future
+            future.add_done_callback(lambda f, call_id=call_id: reply(call_id, f))
+    finally:
+        stop.set()
+        gateway.stop()
+        send(("state", client.is_connected, METRICS.snapshot()))
+        outbox.close()
+
+
+# --- главный процесс --------------------------------------------------------
+
+
+class _Shard:
+    """Процесс одного счёта и ожидающие ответа вызовы."""
+
+    def __init__(
+        self, index: int, account: AccountConfig, context: SpawnContext
+    ) -> None:
+        self.index = index
+        self.account = account
+        # Ключ счёта в глобальном тикете: не зависит от порядка счетов
+        self.key = zlib.crc32(account.name.encode()) & _ACCOUNT_MASK
+        inbox, self._requests = context.Pipe(duplex=False)
+        self._responses, outbox = context.Pipe(duplex=False)
+        self._worker_ends = (inbox, outbox)
+        self.process = context.Process(
+            target=_worker_main,
+            args=(account, inbox, outbox),
+            name=f"mt5-{account.name}",
+            daemon=True,
+        )
+        self.ready: concurrent.futures.Future[bool] = concurrent.futures.Future()
+        self.is_demo = True
+        self.is_connected = False
+        self._calls: dict[int, concurrent.futures.Future[Any]] = {}
+        self._seq = itertools.count()
+        self._send_lock = threading.Lock()
+        self._reader: threading.Thread | None = None
+
+    def start(self) -> None:
+        self.process.start()
+        # Свои копии концов процесса закрываем, иначе EOF не придёт никогда
+        for conn in self._worker_ends:
+            conn.close()
+        self._reader = threading.Thread(
+            target=self._read, name=f"mt5-{self.account.name}-reader", daemon=True
+        )
+        self._reader.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        try:
+            self._send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            logger.warning(
+                "Процесс счёта %s не завершился, прерываем", self.account.name
+            )
+            self.process.terminate()
+            self.process.join()
+        if self._reader is not None:
+            self._reader.join(timeout)
+        self._requests.close()
+
+    def _send(self, message: Any) -> None:
+        with self._send_lock:
+            self._requests.send(message)
+
+    def submit(
+        self, priority: Priority, method: str, *args: Any
+    ) -> tuple[int, "concurrent.futures.Future[Any]"]:
+        """Отправить вызов метода MT5Client в процесс счёта."""
+        call_id = next(self._seq)
+        future: concurrent.futures.Future[Any] = concurrent.futures.Future()
+        self._calls[call_id] = future
+        try:
+            self._send(("call", call_id, priority, method, args))
+        except OSError as e:
+            self._calls.pop(call_id, None)
+            raise ConnectionError(
+                f"Процесс счёта {self.account.name} недоступен"
+            ) from e
+        return call_id, future
+
+    def cancel(self, call_id: int) -> None:
+        """Снять вызов, ещё не начатый процессом (по таймауту).
+
+        Процесс ответит результатом, если вызов уже начат, или "cancelled".
+        """
+        try:
+            self._send(("cancel", call_id))
+        except OSError:
+            pass
+
+    @property
+    def pending(self) -> int:
+        return len(self._calls)
+
+    def _read(self) -> None:
+        while True:
+            try:
+                message = self._responses.recv()
+            except (EOFError, OSError):
+                break
+            kind = message[0]
+            if kind == "result":
+                _, call_id, ok, value = message
+                future = self._calls.pop(call_id, None)
+                if future is None:
+                    continue
+                try:
+                    if ok:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+                except concurrent.futures.InvalidStateError:
+                    pass  # отменён по таймауту
+            elif kind == "cancelled":
+                future = self._calls.pop(message[1], None)
+                if future is not None:
+                    future.cancel()
+            elif kind == "state":
+                _, self.is_connected, snapshot = message
+                METRICS.load(snapshot, account=self.account.name)
+            elif kind == "ready":
+                _, connected, self.is_demo = message
+                self.is_connected = connected
+                self.ready.set_result(connected)
+        # Процесс завершился: ожидающим вызовам ответа уже не будет
+        self.is_connected = False
+        if not self.ready.done():
+            self.ready.set_result(False)
+        error = ConnectionError(f"Процесс счёта {self.account.name} завершился")
+        for future in list(self._calls.values()):
+            if not future.done():
+                future.set_exception(error)
+        self._calls.clear()
+
+
+class ShardedGateway:
+    """Шлюз к нескольким счетам MT5 с API MT5Gateway."""
+
+    def __init__(
+        self, accounts: list[AccountConfig], timeout: float | None = None
+    ) -> None:
+        if not accounts:
+            raise ValueError("Нужен хотя бы один счёт")
+        # spawn: MetaTrader5 и потоки родителя не должны наследоваться через fork
+        context = multiprocessing.get_context("spawn")
+        self.timeout = timeout if timeout is not None else settings.mt5_call_timeout
+        self.shards = [_Shard(i, a, context) for i, a in enumerate(accounts)]
+        self._by_key: dict[int, _Shard] = {}
+        for shard in self.shards:
+            other = self._by_key.setdefault(shard.key, shard)
+            if other is not shard:
+                raise ValueError(
+                    f"Счета {other.account.name} и {shard.account.name} дают"
+                    " один ключ тикета, переименуйте один из них"
+                )
+        self._pinned: dict[str, _Shard] = {}
+        for shard in self.shards:
+            for symbol in shard.account.symbols:
+                self._pinned.setdefault(symbol.upper(), shard)
+        floating = [s for s in self.shards if not s.account.symbols]
+        self._floating = floating or self.shards
+        self.timeouts: int = 0  # вызовов, не уложившихся в таймаут
+
+    # --- жизненный цикл -------------------------------------------------
+
+    def start(self) -> bool:
+        """Запустить процессы счетов. True, если подключились все."""
+        for shard in self.shards:
+            shard.start()
+        results = []
+        for shard in self.shards:
+            try:
+                connected = shard.ready.result(_START_TIMEOUT)
+            except concurrent.futures.TimeoutError:
+                connected = False
+            logger.info(
+                "%s Счёт %s (процесс %s)",
+                "✅" if connected else "❌",
+                shard.account.name,
+                shard.process.pid,
+            )
+            results.append(connected)
+        return all(results)
+
+    def stop(self) -> None:
+        """Отключить счета и дождаться завершения процессов."""
+        for shard in self.shards:
+            shard.stop()
+
+    # --- маршрутизация --------------------------------------------------
+
+    def shard_for(self, symbol: str) -> _Shard:
+        """Процесс счёта, за которым закреплён символ."""
+        symbol = symbol.upper()
+        shard = self._pinned.get(symbol)
+        if shard is None:
+            pool = self._floating
+            shard = pool[zlib.crc32(symbol.encode()) % len(pool)]
+        return shard
+
+    def account_of(self, ticket: int) -> str:
+        """Имя счёта, на котором стоит ордер (пусто, если счёта уже нет)."""
+        shard, _ = self._local_ticket(ticket)
+        return shard.account.name if shard is not None else ""
+
+    @staticmethod
+    def _global_ticket(shard: _Shard, ticket: int) -> int:
+        return ticket << _ACCOUNT_BITS | shard.key
+
+    def _local_ticket(self, ticket: int) -> tuple[_Shard | None, int]:
+        """Счёт и локальный тикет; счёта нет, если его убрали из MT5_ACCOUNTS."""
+        return self._by_key.get(ticket & _ACCOUNT_MASK), ticket >> _ACCOUNT_BITS
+
+    async def call(
+        self,
+        shard: _Shard,
+        priority: Priority,
+        method: str,
+        *args: Any,
+        timeout: float | None = None,
+    ) -> Any:
+        """Вызвать метод MT5Client в процессе счёта. По таймауту — TimeoutError.
+
+        Вызов из IRREVOCABLE по таймауту снимается, только если процесс его
+        ещё не начал; иначе дожидаемся результата (см. MT5Gateway.call).
+        """
+        call_id, submitted = shard.submit(priority, method, *args)
+        future = asyncio.wrap_future(submitted)
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(future), timeout or self.timeout
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            shard.cancel(call_id)
+            if priority not in IRREVOCABLE:
+                raise
+        try:
+            result = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not submitted.cancelled():
+                raise  # отменили саму задачу, а не вызов
+            raise asyncio.TimeoutError from None
+        logger.warning(
+            "⏳ %s (%s) не уложился в таймаут, ответ терминала получен",
+            method,
+            shard.account.name,
+        )
+        return result
+
+    # --- торговые операции ------------------------------------------------
+
+    async def get_price(
+        self, symbol: str, timeout: float | None = None
+    ) -> float | None:
+        """Текущая цена (bid). None при ошибке или таймауте."""
+        quote = await self.get_quote(symbol, timeout)
+        return quote[0] if quote else None
+
+    async def get_quote(
+        self, symbol: str, timeout: float | None = None
+    ) -> tuple[float, float] | None:
+        """Текущие (bid, ask). None при ошибке или таймауте."""
+        try:
+            quote: tuple[float, float] | None = await self.call(
+                self.shard_for(symbol),
+                Priority.READ,
+                "get_quote",
+                symbol,
+                timeout=timeout,
+            )
+            return quote
+        except asyncio.TimeoutError:
+            logger.warning("Таймаут получения цены %s", symbol)
+        except (ConnectionError, RuntimeError) as e:
+            logger.error("Ошибка получения цены %s: %s", symbol, e)
+        return None
+
+    async def symbol_info(
+        self, symbol: str, timeout: float | None = None
+    ) -> SymbolInfo | None:
+        """Спецификация символа на его счёте. None при ошибке или таймауте."""
+        try:
+            info: SymbolInfo | None = await self.call(
+                self.shard_for(symbol),
+                Priority.READ,
+                "symbol_info",
+                symbol,
+                timeout=timeout,
+            )
+            return info
+        except asyncio.TimeoutError:
+            logger.warning("Таймаут получения спецификации %s", symbol)
+        except (ConnectionError, RuntimeError) as e:
+            logger.error("Ошибка получения спецификации %s: %s", symbol, e)
+        return None
+
+    async def copy_ticks(
+        self, symbol: str, since_msc: int, timeout: float | None = None
+    ) -> list[TickRow]:
+        """Тики позже since_msc. Пустой список при ошибке или таймауте."""
+        try:
+            ticks: list[TickRow] = await self.call(
+                self.shard_for(symbol),
+                Priority.READ,
+                "copy_ticks",
+                symbol,
+                since_msc,
+                timeout=timeout,
+            )
+            return ticks
+        except asyncio.TimeoutError:
+            logger.warning("Таймаут получения тиков %s", symbol)
+        except (ConnectionError, RuntimeError) as e:
+            logger.error("Ошибка получения тиков %s: %s", symbol, e)
+        return []
+
+    async def _place(
+        self, method: str, symbol: str, price: float, lot: float, timeout: float | None
+    ) -> int | None:
+        shard = self.shard_for(symbol)
+        try:
+            ticket = await self.call(
+                shard, Priority.PLACE, method, symbol, price, lot, timeout=timeout
+            )
+            return None if ticket is None else self._global_ticket(shard, ticket)
+        except asyncio.TimeoutError:
+            logger.error("Таймаут выставления ордера %s (%s)", symbol, method)
+        except (ConnectionError, RuntimeError) as e:
+            logger.error("Ошибка выставления ордера %s (%s): %s", symbol, method, e)
+        return None
+
+    async def place_buy_stop(
+        self, symbol: str, price: float, lot: float, timeout: float | None = None
+    ) -> int | None:
+        """Выставить Buy Stop. Возвращает глобальный ticket или None."""
+        return await self._place("place_buy_stop", symbol, price, lot, timeout)
+
+    async def place_sell_stop(
+        self, symbol: str, price: float, lot: float, timeout: float | None = None
+    ) -> int | None:
+        """Выставить Sell Stop. Возвращает глобальный ticket или None."""
+        return await self._place("place_sell_stop", symbol, price, lot, timeout)
+
+    async def modify_order(
+        self, ticket: int, new_price: float, timeout: float | None = None
+    ) -> bool:
+        """Переместить отложенный ордер."""
+        shard, local = self._local_ticket(ticket)
+        if shard is None:
+            logger.error("Ордер %d: счёта нет в MT5_ACCOUNTS", ticket)
+            return False
+        try:
+            ok: bool = await self.call(
+                shard,
+                Priority.MODIFY,
+                "modify_order",
+                local,
+                new_price,
+                timeout=timeout,
+            )
+            return ok
+        except asyncio.TimeoutError:
+            logger.warning("Таймаут модификации ордера %d", ticket)
+        except (ConnectionError, RuntimeError) as e:
+            logger.error("Ошибка модификации ордера %d: %s", ticket, e)
+        return False
+
+    async def cancel_order(self, ticket: int, timeout: float | None = None) -> bool:
+        """Отменить отложенный ордер."""
+        shard, local = self._local_ticket(ticket)
+        if shard is None:
+            logger.error("Ордер %d: счёта нет в MT5_ACCOUNTS", ticket)
+            return False
+        try:
+            ok: bool = await self.call(
+                shard, Priority.CANCEL, "cancel_order", local, timeout=timeout
+            )
+            return ok
+        except asyncio.TimeoutError:
+            logger.error("Таймаут отмены ордера %d", ticket)
+        except (ConnectionError, RuntimeError) as e:
+            logger.error("Ошибка отмены ордера %d: %s", ticket, e)
+        return False
+
+    async def reconcile_orders(self, timeout: float | None = None) -> tuple[int, int]:
+        """Сверить кэши ордеров всех счетов. Возвращает (обновлено, удалено)."""
+        results = await asyncio.gather(
+            *(
+                self.call(shard, Priority.READ, "reconcile_orders", timeout=timeout)
+                for shard in self.shards
+            ),
+            return_exceptions=True,
+        )
+        updated = removed = 0
+        for shard, result in zip(self.shards, results):
+            if isinstance(result, BaseException):
+                name = shard.account.name
+                logger.warning("Сверка ордеров счёта %s: %r", name, result)
+                continue
+            updated += result[0]
+            removed += result[1]
+        return updated, removed
+
+    async def adopt_orders(
+        self, tickets: list[int], timeout: float | None = None
+    ) -> list[OrderRecord]:
+        """Найти ордера на их счетах и взять в кэш; ticket — глобальные."""
+        local: dict[int, list[int]] = {}
+        for ticket in tickets:
+            shard, local_ticket = self._local_ticket(ticket)
+            if shard is None:
+                logger.warning("Ордер %d: счёта нет в MT5_ACCOUNTS", ticket)
+                continue
+            local.setdefault(shard.index, []).append(local_ticket)
+        shards = [self.shards[index] for index in local]
+        results = await asyncio.gather(
+            *(
+                self.call(
+                    shard,
+                    Priority.READ,
+                    "adopt_orders",
+                    local[shard.index],
+                    timeout=timeout,
+                )
+                for shard in shards
+            ),
+            return_exceptions=True,
+        )
+        found: list[OrderRecord] = []
+        for shard, result in zip(shards, results):
+            if isinstance(result, BaseException):
+                name = shard.account.name
+                logger.warning("Чтение ордеров счёта %s: %r", name, result)
+                continue
+            found.extend(
+                replace(order, ticket=self._global_ticket(shard, order.ticket))
+                for order in result
+            )
+        return found
+
+    async def take_fills(self, timeout: float | None = None) -> list[Position]:
+        """Новые исполнения на всех счетах, с глобальными ticket."""
+        results = await asyncio.gather(
+            *(
+                self.call(shard, Priority.READ, "take_fills", timeout=timeout)
+                for shard in self.shards
+            ),
+            return_exceptions=True,
+        )
+        fills: list[Position] = []
+        for shard, result in zip(self.shards, results):
+            if isinstance(result, BaseException):
+                name = shard.account.name
+                logger.warning("Чтение позиций счёта %s: %r", name, result)
+                continue
+            fills.extend(
+                replace(pos, ticket=self._global_ticket(shard, pos.ticket))
+                for pos in result
+            )
+        return fills
+
+    async def expect_news(self, symbol: str, when: datetime) -> None:
+        """Сообщить demo-симулятору счёта о предстоящей новости."""
+        try:
+            await self.call(
+                self.shard_for(symbol), Priority.CONTROL, "expect_news", symbol, when
+            )
+        except (asyncio.TimeoutError, ConnectionError, RuntimeError):
+            logger.warning("Не удалось зарегистрировать новость %s", symbol)
+
+    @property
+    def is_demo(self) -> bool:
+        """Все счета в demo-режиме?"""
+        return all(shard.is_demo for shard in self.shards)
+
+    @property
+    def is_connected(self) -> bool:
+        """Подключены все счета?"""
+        return all(shard.is_connected for shard in self.shards)
+
+    @property
+    def pending(self) -> int:
+        """Вызовов, ожидающих ответа."""
+        return sum(shard.pending for shard in self.shards)
@@ -0,0 +1,143 @@
+"""Исходящие уведомления в Telegram: очередь с учётом лимитов API.
+
+Торговые задачи только кладут сообщение в ограниченную очередь
+(notify() не ждёт и не блокирует); при переполнении сообщение
+отбрасывается и учитывается в метрике. Сообщения одной новости (ключ
+group) копятся notify_merge_window секунд и уходят одной сводкой — в
+крупный релиз десяток задач даёт одно сообщение, а не десяток.
+
+Отправляет один фоновый sender: токен-бакеты на все чаты (около 30
+сообщений в секунду у Telegram) и на каждый чат (1 в секунду), а на
+RetryAfter (флуд-контроль) ждёт указанное время и повторяет.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+from telegram.error import RetryAfter, TelegramError
+
+from bot.clock import SYSTEM_CLOCK, Clock
+from bot.config import settings
+from bot.metrics import METRICS
+from bot.requote import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+SendFn = Callable[[int, str], Awaitable[object]]
+
+# Лимит сообщения Telegram — 4096 символов
+_MAX_TEXT = 4000
+_DRAIN_TIMEOUT = 5.0  # сек на досылку очереди при остановке
+
+
+class Notifier:
+    """Ограниченная очередь уведомлений и фоновый отправитель."""
+
+    def __init__(
+        self,
+        send: SendFn,
+        chat_ids: list[int],
+        maxsize: int | None = None,
+        merge_window: float | None = None,
+        clock: Clock = SYSTEM_CLOCK,
+    ) -> None:
+        self.send = send
+        self.chat_ids = chat_ids
+        self.clock = clock
+        self.merge_window = (
+            merge_window if merge_window is not None else settings.notify_merge_window
+        )
+        self._queue: asyncio.Queue[tuple[int, str]] = asyncio.Queue(
+            maxsize if maxsize is not None else settings.notify_queue_size
+        )
+        self._global = TokenBucket(settings.notify_global_rate, clock=clock)
+        self._per_chat: dict[int, TokenBucket] = {}
+        self._groups: dict[str, list[str]] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        """Запустить отправителя (внутри event loop)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="notifier")
+
+    async def stop(self) -> None:
+        """Дослать накопленные сводки и остановить отправителя."""
+        for group in list(self._groups):
+            self._flush(group)
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), _DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("Не досланы уведомления: %d", self.pending)
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def notify(self, text: str, group: str | None = None) -> None:
+        """Поставить уведомление в очередь. Не ждёт; group — ключ сводки."""
+        if not self.chat_ids:
+            return
+        if group is None:
+            self._enqueue(text)
+            return
+        lines = self._groups.get(group)
+        if lines is None:
+            lines = self._groups[group] = []
+            asyncio.get_running_loop().call_later(
+                self.merge_window, self._flush, group
+            )
+        lines.append(text)
+
+    def _flush(self, group: str) -> None:
+        lines = self._groups.pop(group, None)
+        if lines:
+            self._enqueue("\n".join(lines))
+
+    def _enqueue(self, text: str) -> None:
+        if len(text) > _MAX_TEXT:
+            text = text[: _MAX_TEXT - 1] + "…"
+        for chat_id in self.chat_ids:
+            try:
+                self._queue.put_nowait((chat_id, text))
+            except asyncio.QueueFull:
+                METRICS.counter("notifications_dropped_total").inc()
+                logger.warning("Очередь уведомлений переполнена, сообщение отброшено")
+
+    @property
+    def pending(self) -> int:
+        """Сообщений в очереди."""
+        return self._queue.qsize()
+
+    async def _take(self, bucket: TokenBucket) -> None:
+        while not bucket.try_acquire():
+            await self.clock.sleep(1 / bucket.rate)
+
+    async def _run(self) -> None:
+        sent = METRICS.counter("notifications_sent_total")
+        while True:
+            chat_id, text = await self._queue.get()
+            try:
+                await self._deliver(chat_id, text)
+                sent.inc()
+            except TelegramError as e:
+                METRICS.counter("notifications_dropped_total").inc()
+                logger.error("Ошибка отправки уведомления в %d: %s", chat_id, e)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, chat_id: int, text: str) -> None:
+        bucket = self._per_chat.get(chat_id)
+        if bucket is None:
+            bucket = self._per_chat[chat_id] = TokenBucket(
+                settings.notify_chat_rate, burst=1.0, clock=self.clock
+            )
+        while True:
+            await self._take(bucket)
+            await self._take(self._global)
+            try:
+                await self.send(chat_id, text)
+                return
+            except RetryAfter as e:
+                logger.warning("Флуд-контроль Telegram, пауза %s сек", e.retry_after)
+                await self.clock.sleep(float(e.retry_after))
@@ -0,0 +1,189 @@
+"""Пакетное выставление стрэддлов для новостей, стартующих одновременно.
+
+Задачи торговли не шлют ордера сами по очереди, а отдают пару цен
+координатору. Он собирает в пакет все задачи, стартовавшие в одно
+мгновение (ждёт заявленных через reserve(), но не дольше
+placement_window), сортирует их по приоритету — раньше новость, раньше
+ордера — и отправляет все ноги сразу. Шлюз MT5 исполняет их подряд без
+возвратов в event loop, а при нескольких счетах — параллельно в
+процессах счетов. Одиночная нога (вторая не выставилась) перевыставляется
+placement_retries раз, затем отменяется.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from bot.clock import SYSTEM_CLOCK, Clock
+from bot.config import settings
+from bot.metrics import METRICS
+from bot.mt5_gateway import MT5Gateway
+from bot.mt5_shards import ShardedGateway
+
+logger = logging.getLogger(__name__)
+
+Straddle = tuple[int | None, int | None]
+
+
+@dataclass
+class PlacementRequest:
+    """Пара стоп-ордеров одной новости."""
+
+    priority: datetime  # время новости: раньше новость — раньше в пакете
+    symbol: str
+    buy_price: float
+    sell_price: float
+    lot: float
+    future: "asyncio.Future[Straddle]" = field(repr=False)
+
+
+class PlacementCoordinator:
+    """Сборка одновременных выставлений в один конкурентный пакет."""
+
+    def __init__(
+        self,
+        mt5: MT5Gateway | ShardedGateway,
+        window: float | None = None,
+        clock: Clock = SYSTEM_CLOCK,
+    ) -> None:
+        self.mt5 = mt5
+        self.clock = clock
+        self.window = window if window is not None else settings.placement_window
+        self._batch: list[PlacementRequest] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._expected = 0  # задач, заявивших выставление и ещё не пришедших
+        self._running: set[asyncio.Task[None]] = set()
+
+    def reserve(self) -> None:
+        """Заявить, что задача скоро выставит ордера: пакет её подождёт."""
+        self._expected += 1
+
+    def release(self) -> None:
+        """Снять заявку (задача завершилась, не дойдя до выставления)."""
+        self._expected = max(0, self._expected - 1)
+        if self._batch and not self._expected:
+            self._flush()
+
+    async def place(
+        self,
+        symbol: str,
+        buy_price: float,
+        sell_price: float,
+        lot: float,
+        priority: datetime,
+    ) -> Straddle:
+        """Выставить Buy Stop и Sell Stop в составе пакета.
+
+        Возвращает (buy, sell) ticket; (None, None), если пару выставить
+        не удалось (одиночная нога к этому моменту отменена).
+        """
+        future: asyncio.Future[Straddle] = asyncio.get_running_loop().create_future()
+        self._batch.append(
+            PlacementRequest(priority, symbol, buy_price, sell_price, lot, future)
+        )
+        self._expected = max(0, self._expected - 1)
+        if not self._expected:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.window, self._flush
+            )
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._batch = self._batch, []
+        if batch:
+            task = asyncio.create_task(self._run_batch(batch), name="placement")
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch: list[PlacementRequest]) -> None:
+        # Задачи, отменённые до отправки пакета, ордеров не получают
+        batch = sorted(
+            (r for r in batch if not r.future.done()), key=lambda r: r.priority
+        )
+        started = self.clock.monotonic()
+        acks: list[float] = []  # моменты ответов терминала по каждой ноге
+        results = await asyncio.gather(
+            *(self._place_pair(r, acks) for r in batch), return_exceptions=True
+        )
+        elapsed = self.clock.monotonic() - started
+        if acks:
+            METRICS.histogram("placement_burst_seconds").observe(
+                max(acks) - min(acks)
+            )
+        placed = 0
+        for request, result in zip(batch, results):
+            if isinstance(result, BaseException):
+                logger.error("Ошибка выставления %s: %r", request.symbol, result)
+                result = (None, None)
+            placed += sum(ticket is not None for ticket in result)
+            if not request.future.done():
+                request.future.set_result(result)
+                continue
+            # Задачу отменили, пока шёл пакет: её ордера никто не поведёт
+            for ticket in result:
+                if ticket is not None:
+                    await self.mt5.cancel_order(ticket)
+        if len(batch) > 1:
+            logger.info(
+                "📦 Пакет выставления: новостей %d, ордеров %d за %.1f мс",
+                len(batch),
+                placed,
+                elapsed * 1000,
+            )
+
+    async def _acked(
+        self, placing: Awaitable[int | None], acks: list[float]
+    ) -> int | None:
+        """Выставить ногу и запомнить момент ответа."""
+        ticket = await placing
+        acks.append(self.clock.monotonic())
+        return ticket
+
+    async def _place_pair(
+        self, request: PlacementRequest, acks: list[float]
+    ) -> Straddle:
+        symbol, lot = request.symbol, request.lot
+        buy_stop, sell_stop = self.mt5.place_buy_stop, self.mt5.place_sell_stop
+        buy, sell = await asyncio.gather(
+            self._acked(buy_stop(symbol, request.buy_price, lot), acks),
+            self._acked(sell_stop(symbol, request.sell_price, lot), acks),
+        )
+        if (buy is None) == (sell is None):
+            return buy, sell
+
+        # Одна нога не выставилась: без пары стрэддл не работает
+        for _ in range(settings.placement_retries):
+            if buy is None:
+                buy = await self._acked(buy_stop(symbol, request.buy_price, lot), acks)
+            else:
+                sell = await self._acked(
+                    sell_stop(symbol, request.sell_price, lot), acks
+                )
+            if buy is not None and sell is not None:
+                METRICS.counter(
+                    "placement_lone_legs_total", symbol=symbol, result="retried"
+                ).inc()
+                return buy, sell
+
+        lone = buy if buy is not None else sell
+        assert lone is not None
+        cancelled = await self.mt5.cancel_order(lone)
+        METRICS.counter(
+            "placement_lone_legs_total",
+            symbol=symbol,
+            result="cancelled" if cancelled else "orphaned",
+        ).inc()
+        logger.error(
+            "Вторая нога %s не выставилась, ордер %d %s",
+            symbol,
+            lone,
+            "отменён" if cancelled else "НЕ отменён",
+        )
+        return None, None
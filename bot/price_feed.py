@@ -0,0 +1,283 @@
+"""Общий поток цен: один опросчик на символ для всех торговых задач.
+
+Два источника (settings.price_source): poll — symbol_info_tick по таймеру
+с интервалом подписчиков; stream — частое инкрементальное чтение новых
+тиков терминала (copy_ticks_from с курсором по времени последнего тика).
+В режиме stream подписчики просыпаются только на приход нового тика, а
+пачка тиков за одно чтение сворачивается в последний.
+"""
+
+import asyncio
+import dataclasses
+import logging
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+from bot.clock import SYSTEM_CLOCK, Clock
+from bot.config import settings
+from bot.metrics import METRICS
+from bot.mt5_gateway import MT5Gateway
+from bot.mt5_shards import ShardedGateway
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class Tick:
+    """Последняя полученная цена по символу."""
+
+    symbol: str
+    price: float  # bid
+    ask: float
+    seq: int  # порядковый номер тика (растёт с каждой новой ценой)
+    received_at: float  # Clock.monotonic(), когда цена последний раз подтверждена
+
+
+class _SymbolPoller:
+    """Опросчик одного символа: запрашивает цену и раздаёт её подписчикам."""
+
+    def __init__(self, feed: "PriceFeed", symbol: str) -> None:
+        self.feed = feed
+        self.symbol = symbol
+        self.subscribers: set[PriceSubscription] = set()
+        self.latest: Tick | None = None
+        self._seq: int = 0
+        self._cursor: int = 0  # stream: время (мс) последнего полученного тика
+        self._updated = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._inflight: asyncio.Future[Tick | None] | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name=f"price-feed:{self.symbol}")
+        logger.debug("Поток цен %s запущен", self.symbol)
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        # Будим ожидающих, чтобы они не зависли на остановленном опросчике
+        self._updated.set()
+        logger.debug("Поток цен %s остановлен", self.symbol)
+
+    async def _run(self) -> None:
+        # Опросы привязаны к сетке next_at += interval, время самого опроса
+        # не накапливается; пропущенные из-за долгого опроса слоты считаются
+        clock = self.feed.clock
+        late = METRICS.histogram("feed_sleep_late_seconds", symbol=self.symbol)
+        missed = METRICS.counter("feed_missed_polls_total", symbol=self.symbol)
+        next_at = clock.monotonic()
+        while True:
+            await self.poll()
+            interval = self.interval
+            next_at += interval
+            now = clock.monotonic()
+            if now > next_at:
+                skipped = int((now - next_at) // interval) + 1
+                missed.inc(skipped)
+                next_at += skipped * interval
+            await clock.sleep(next_at - now)
+            late.observe(max(0.0, clock.monotonic() - next_at))
+
+    async def poll(self) -> Tick | None:
+        """Запросить цену сейчас. Одновременные запросы объединяются в один."""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetch())
+            self._inflight.add_done_callback(self._fetched)
+        return await asyncio.shield(self._inflight)
+
+    async def _fetch(self) -> Tick | None:
+        try:
+            if self.feed.streaming:
+                return await self._fetch_stream()
+            quote = await self.feed.gateway.get_quote(self.symbol)
+        except Exception:
+            logger.exception("Ошибка опроса цены %s", self.symbol)
+            return None
+        if quote is None:
+            return None
+        self._publish(*quote)
+        return self.latest
+
+    async def _fetch_stream(self) -> Tick | None:
+        ticks = await self.feed.gateway.copy_ticks(self.symbol, self._cursor)
+        if ticks:
+            METRICS.counter("feed_ticks_total", symbol=self.symbol).inc(len(ticks))
+            self._cursor, bid, ask = ticks[-1]
+            self._publish(bid, ask)
+        elif self.latest is not None:
+            # Новых тиков нет — последняя цена всё ещё актуальна: обновляем
+            # время подтверждения, не будя подписчиков
+            self.latest = dataclasses.replace(
+                self.latest, received_at=self.feed.clock.monotonic()
+            )
+        return self.latest
+
+    def _fetched(self, _: "asyncio.Future[Tick | None]") -> None:
+        self._inflight = None
+
+    @property
+    def interval(self) -> float:
+        """Интервал опроса: самый частый из запрошенных подписчиками."""
+        if self.feed.streaming:
+            return self.feed.stream_interval
+        return min(
+            (s.interval for s in self.subscribers), default=self.feed.interval
+        )
+
+    def _publish(self, bid: float, ask: float) -> None:
+        self._seq += 1
+        self.latest = Tick(
+            self.symbol, bid, ask, self._seq, self.feed.clock.monotonic()
+        )
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+    async def wait_newer(self, seq: int) -> Tick:
+        """Дождаться свежего тика с номером больше seq."""
+        while True:
+            tick = self.latest
+            if (
+                tick is not None
+                and tick.seq > seq
+                and self.feed.age_of(tick) <= self.feed.stale_after
+            ):
+                return tick
+            if self._task is None:
+                raise RuntimeError(f"Поток цен {self.symbol} остановлен")
+            await self._updated.wait()
+
+
+class PriceSubscription:
+    """Подписка задачи на цены символа. Каждый тик выдаётся не более одного раза."""
+
+    def __init__(self, feed: "PriceFeed", poller: _SymbolPoller) -> None:
+        self._feed = feed
+        self._poller = poller
+        self._last_seq: int = 0
+        self._closed: bool = False
+        # Желаемый интервал опроса; опросчик берёт минимум по подписчикам
+        self.interval: float = feed.interval
+
+    @property
+    def symbol(self) -> str:
+        return self._poller.symbol
+
+    async def next(self, timeout: float | None = None) -> Tick | None:
+        """Следующий непросмотренный свежий тик или None по таймауту."""
+        try:
+            tick = await asyncio.wait_for(
+                self._poller.wait_newer(self._last_seq), timeout
+            )
+        except asyncio.TimeoutError:
+            return None
+        self._last_seq = tick.seq
+        return tick
+
+    async def fresh(self, max_age: float) -> Tick | None:
+        """Тик не старше max_age: последний полученный или запрошенный сейчас."""
+        tick = self._poller.latest
+        if tick is None or self._feed.age_of(tick) > max_age:
+            tick = await self._poller.poll()
+        if tick is not None:
+            self._last_seq = max(self._last_seq, tick.seq)
+        return tick
+
+    def __aiter__(self) -> AsyncIterator[Tick]:
+        return self
+
+    async def __anext__(self) -> Tick:
+        """async for: новые тики, пропущенные за время обработки — схлопнуты."""
+        if self._closed:
+            raise StopAsyncIteration
+        try:
+            tick = await self._poller.wait_newer(self._last_seq)
+        except RuntimeError:
+            raise StopAsyncIteration from None
+        self._last_seq = tick.seq
+        return tick
+
+    def close(self) -> None:
+        """Отписаться от символа (повторный вызов безопасен)."""
+        if not self._closed:
+            self._closed = True
+            self._feed._release(self)
+
+    def __enter__(self) -> "PriceSubscription":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+class PriceFeed:
+    """Пул опросчиков цен с подсчётом ссылок."""
+
+    def __init__(
+        self,
+        gateway: MT5Gateway | ShardedGateway,
+        interval: float | None = None,
+        stale_after: float | None = None,
+        clock: Clock = SYSTEM_CLOCK,
+        source: str | None = None,
+    ) -> None:
+        self.gateway = gateway
+        self.clock = clock
+        self.streaming = (source or settings.price_source) == "stream"
+        self.stream_interval = settings.stream_poll_interval
+        self.interval = interval if interval is not None else settings.update_interval
+        self.stale_after = (
+            stale_after if stale_after is not None else settings.price_stale_seconds
+        )
+        self._pollers: dict[str, _SymbolPoller] = {}
+
+    def subscribe(self, symbol: str) -> PriceSubscription:
+        """Подписаться на символ. Первый подписчик запускает опросчик."""
+        symbol = symbol.upper()
+        poller = self._pollers.get(symbol)
+        if poller is None:
+            poller = _SymbolPoller(self, symbol)
+            self._pollers[symbol] = poller
+            poller.start()
+        subscription = PriceSubscription(self, poller)
+        poller.subscribers.add(subscription)
+        return subscription
+
+    def _release(self, subscription: "PriceSubscription") -> None:
+        """Снять ссылку. Последний отписавшийся останавливает опросчик."""
+        poller = self._pollers.get(subscription.symbol)
+        if poller is None:
+            return
+        poller.subscribers.discard(subscription)
+        if not poller.subscribers:
+            del self._pollers[subscription.symbol]
+            poller.stop()
+
+    def latest(self, symbol: str) -> Tick | None:
+        """Последний тик по символу (может быть устаревшим)."""
+        poller = self._pollers.get(symbol.upper())
+        return poller.latest if poller else None
+
+    def age_of(self, tick: Tick) -> float:
+        """Возраст тика в секундах."""
+        return self.clock.monotonic() - tick.received_at
+
+    def tick_age(self, symbol: str) -> float | None:
+        """Возраст последнего тика в секундах (None — тиков ещё не было)."""
+        tick = self.latest(symbol)
+        return self.age_of(tick) if tick else None
+
+    def is_stale(self, symbol: str) -> bool:
+        """Тик отсутствует или старше порога stale_after."""
+        age = self.tick_age(symbol)
+        return age is None or age > self.stale_after
+
+    @property
+    def symbols(self) -> dict[str, int]:
+        """Активные символы и число подписчиков."""
+        return {s: len(p.subscribers) for s, p in self._pollers.items()}
+
+    def stop(self) -> None:
+        """Остановить все опросчики."""
+        for poller in self._pollers.values():
+            poller.stop()
+        self._pollers.clear()
@@ -0,0 +1,302 @@
+"""Асинхронный фасад над bot/database.py для обработчиков и планировщика.
+
+Записи идут через один поток-писатель: всё, что поставлено в очередь за
+один проход event loop, уходит в БД одной транзакцией (каждая операция —
+в своём SAVEPOINT, ошибка одной не откатывает остальные). Чтения
+выполняются параллельно в пуле потоков, у каждого потока своё
+соединение (WAL позволяет читать во время записи). Сводка для /status
+кэшируется до следующей записи. Состояние торговли пишется write-behind:
+вызывающий код не ждёт транзакции.
+"""
+
+import asyncio
+import concurrent.futures
+import contextlib
+import logging
+import queue
+import sqlite3
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, TypeVar
+
+from bot import database
+from bot.calendar_import import ImportReport, import_path
+from bot.models import NewsEvent, TradeState
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Операция записи: функция над соединением писателя + future для результата
+_WriteOp = tuple[Callable[[sqlite3.Connection], Any], "concurrent.futures.Future[Any]"]
+
+_STOP = None
+
+
+@dataclass(frozen=True)
+class EventPage:
+    """Страница расписания и есть ли соседние страницы."""
+
+    events: list[NewsEvent]
+    has_prev: bool
+    has_next: bool
+
+
+@dataclass(frozen=True)
+class ScheduleStats:
+    """Сводка расписания для /status."""
+
+    active: int
+    next_event: datetime | None
+
+
+class EventRepository:
+    """Хранилище расписания с async API."""
+
+    def __init__(self, path: Path | None = None, readers: int = 4) -> None:
+        self.path = path
+        self._writes: queue.Queue[list[_WriteOp] | None] = queue.Queue()
+        self._writer: threading.Thread | None = None
+        self._pending: list[_WriteOp] = []
+        self._flush_scheduled: bool = False
+        self._readers = concurrent.futures.ThreadPoolExecutor(
+            max_workers=readers, thread_name_prefix="db-reader"
+        )
+        self._local = threading.local()
+        self._read_conns: list[sqlite3.Connection] = []
+        self._read_conns_lock = threading.Lock()
+        self.batches: int = 0  # транзакций записи
+        self.writes: int = 0  # операций записи
+        # Сводка и номер записи, после которой она посчитана
+        self._version: int = 0
+        self._stats: tuple[int, ScheduleStats] | None = None
+
+    # --- жизненный цикл -------------------------------------------------
+
+    def start(self) -> None:
+        """Запустить поток-писатель."""
+        if self._writer is None:
+            # Схему создаём заранее, чтобы читатели не гонялись за ней
+            database.connect(self.path).close()
+            self._writer = threading.Thread(
+                target=self._run_writer, name="db-writer", daemon=True
+            )
+            self._writer.start()
+
+    def stop(self) -> None:
+        """Дописать очередь и остановить потоки."""
+        if self._pending:
+            self._writes.put(self._pending)
+            self._pending = []
+        if self._writer is not None:
+            self._writes.put(_STOP)
+            self._writer.join()
+            self._writer = None
+        self._readers.shutdown(wait=True)
+        with self._read_conns_lock:
+            for conn in self._read_conns:
+                conn.close()
+            self._read_conns.clear()
+
+    # --- запись ---------------------------------------------------------
+
+    def _run_writer(self) -> None:
+        conn = database.connect(self.path)
+        conn.isolation_level = None  # транзакциями управляем сами
+        try:
+            while (batch := self._writes.get()) is not _STOP:
+                # Забираем всё, что успело накопиться, в ту же транзакцию
+                while True:
+                    try:
+                        more = self._writes.get_nowait()
+                    except queue.Empty:
+                        break
+                    if more is _STOP:
+                        self._writes.put(_STOP)
+                        break
+                    batch.extend(more)
+                try:
+                    self._apply(conn, batch)
+                except Exception as e:
+                    # Пакет целиком не записан (например, БД занята другим
+                    # процессом): отказываем его ожидающим, поток продолжает
+                    logger.exception("Ошибка пакета записи БД, пакет отклонён")
+                    self._fail(conn, batch, e)
+        finally:
+            conn.close()
+
+    def _apply(self, conn: sqlite3.Connection, batch: list[_WriteOp]) -> None:
+        results: list[tuple[concurrent.futures.Future[Any], Any, bool]] = []
+        conn.execute("BEGIN IMMEDIATE")
+        for op, future in batch:
+            # Отменённая запись всё равно выполняется, но результат её
+            # future уже никто не ждёт — выставлять его нельзя
+            waiting = future.set_running_or_notify_cancel()
+            conn.execute("SAVEPOINT op")
+            try:
+                value, ok = op(conn), True
+                conn.execute("RELEASE op")
+            except Exception as e:
+                conn.execute("ROLLBACK TO op")
+                conn.execute("RELEASE op")
+                value, ok = e, False
+            if waiting:
+                results.append((future, value, ok))
+        try:
+            conn.execute("COMMIT")
+        except Exception as e:
+            logger.exception("Ошибка фиксации транзакции БД")
+            conn.execute("ROLLBACK")
+            results = [(f, e, False) for f, _, _ in results]
+        self.batches += 1
+        self.writes += len(batch)
+        self._version += 1  # кэш сводки устарел
+        for future, value, ok in results:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def _fail(
+        self, conn: sqlite3.Connection, batch: list[_WriteOp], error: Exception
+    ) -> None:
+        if conn.in_transaction:
+            with contextlib.suppress(sqlite3.Error):
+                conn.execute("ROLLBACK")
+        for _, future in batch:
+            if future.done():
+                continue
+            if future.running() or future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+    async def _write(self, op: Callable[[sqlite3.Connection], T]) -> T:
+        """Поставить запись в пакет текущего прохода loop и дождаться её."""
+        if self._writer is None:
+            raise RuntimeError("EventRepository не запущен")
+        future: concurrent.futures.Future[T] = concurrent.futures.Future()
+        self._pending.append((op, future))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+        return await asyncio.wrap_future(future)
+
+    def _write_behind(self, op: Callable[[sqlite3.Connection], Any]) -> None:
+        """Поставить запись в пакет, не дожидаясь её; ошибка — в лог."""
+        if self._writer is None:
+            raise RuntimeError("EventRepository не запущен")
+        future: concurrent.futures.Future[Any] = concurrent.futures.Future()
+        future.add_done_callback(_log_write_error)
+        self._pending.append((op, future))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        if self._pending:
+            self._writes.put(self._pending)
+            self._pending = []
+
+    async def add_event(
+        self, event_date: datetime, symbol: str, description: str = ""
+    ) -> int:
+        """Добавить новость в расписание. Возвращает id."""
+        return await self._write(
+            lambda c: database.insert_event(c, event_date, symbol, description)
+        )
+
+    async def delete_event(self, event_id: int) -> bool:
+        """Удалить новость по id. Возвращает True если удалена."""
+        return await self._write(lambda c: database.delete_events(c, [event_id]) > 0)
+
+    async def deactivate_event(self, event_id: int) -> None:
+        """Деактивировать новость (после отработки)."""
+        await self._write(lambda c: database.deactivate_events(c, [event_id]))
+
+    def save_trade(self, state: TradeState) -> None:
+        """Сохранить ордера и фазу торговли по новости (write-behind)."""
+        self._write_behind(lambda c: database.upsert_trade(c, state))
+
+    def finish_trade(self, event_id: int) -> None:
+        """Удалить состояние торговли: её ордера больше не ведутся (write-behind)."""
+        self._write_behind(lambda c: database.delete_trade(c, event_id))
+
+    async def import_calendar(
+        self, path: Path, default_symbol: str = "", name: str = ""
+    ) -> ImportReport:
+        """Импортировать календарь (CSV/ICS) одной транзакцией писателя."""
+        return await self._write(lambda c: import_path(c, path, default_symbol, name))
+
+    # --- чтение ---------------------------------------------------------
+
+    def _read_conn(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = database.connect(self.path)
+            self._local.conn = conn
+            with self._read_conns_lock:
+                self._read_conns.append(conn)
+        return conn
+
+    async def _read(self, op: Callable[[sqlite3.Connection], T]) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, lambda: op(self._read_conn()))
+
+    async def list_events(self, only_active: bool = True) -> list[NewsEvent]:
+        """Получить список новостей."""
+        return await self._read(lambda c: database.select_events(c, only_active))
+
+    async def list_trades(self) -> list[TradeState]:
+        """Сохранённые состояния незавершённых торговель."""
+        return await self._read(database.select_trades)
+
+    async def get_events(self, event_ids: list[int]) -> list[NewsEvent]:
+        """Новости по id, включая неактивные."""
+        return await self._read(lambda c: database.select_events_by_id(c, event_ids))
+
+    async def list_page(
+        self,
+        cursor: tuple[str, int] | None = None,
+        forward: bool = True,
+        limit: int = 20,
+        symbol: str = "",
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> EventPage:
+        """Страница активных новостей после (forward) или до cursor.
+
+        cursor — (event_date ISO, id) крайней новости соседней страницы,
+        None — первая страница. Диапазон дат [date_from, date_to).
+        """
+        start = cursor or ("", 0)
+        low = date_from.isoformat() if date_from else ""
+        high = date_to.isoformat() if date_to else "~"
+        # Строкой больше, чтобы узнать, есть ли страница дальше
+        events = await self._read(
+            lambda c: database.select_page(
+                c, start, forward, limit + 1, symbol, low, high
+            )
+        )
+        more = len(events) > limit
+        if forward:
+            return EventPage(events[:limit], cursor is not None, more)
+        return EventPage(events[-limit:], more, True)
+
+    async def stats(self) -> ScheduleStats:
+        """Сводка расписания: из кэша, после записи — одним запросом."""
+        cached = self._stats
+        if cached is not None and cached[0] == self._version:
+            return cached[1]
+        version = self._version
+        count, first = await self._read(database.select_stats)
+        stats = ScheduleStats(count, first)
+        self._stats = (version, stats)
+        return stats
+
+
+def _log_write_error(future: "concurrent.futures.Future[Any]") -> None:
+    if (error := future.exception()) is not None:
+        logger.error("Ошибка отложенной записи в БД: %s", error)
@@ -0,0 +1,142 @@
+"""Политики перестановки (requote) отложенных ордеров."""
+
+from dataclasses import dataclass
+
+from bot.clock import SYSTEM_CLOCK, Clock
+from bot.config import settings
+
+
+@dataclass
+class RequoteStats:
+    """Счётчики решений политики."""
+
+    requested: int = 0  # сколько раз задачи хотели переставить ордер
+    sent: int = 0  # сколько модификаций пропущено в терминал
+    skipped_small: int = 0  # сдвиг меньше порога
+    throttled: int = 0  # упёрлись в лимит модификаций в секунду
+
+    @property
+    def saved(self) -> int:
+        """Сэкономлено запросов к брокеру."""
+        return self.skipped_small + self.throttled
+
+
+class TokenBucket:
+    """Ограничитель частоты: rate токенов в секунду, ёмкость burst."""
+
+    def __init__(
+        self, rate: float, burst: float | None = None, clock: Clock = SYSTEM_CLOCK
+    ) -> None:
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1.0)
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock.monotonic()
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Забрать токены, если они есть."""
+        now = self.clock.monotonic()
+        refill = (now - self._updated) * self.rate
+        self._tokens = min(self.capacity, self._tokens + refill)
+        self._updated = now
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+
+class RequotePolicy:
+    """Базовая политика: переставлять на каждом тике с фиксированным интервалом."""
+
+    def __init__(self) -> None:
+        self.stats = RequoteStats()
+
+    def interval(self, symbol: str, time_to_release: float) -> float:
+        """Желаемый интервал между опросами цены, сек."""
+        return settings.update_interval
+
+    def observe(self, symbol: str, price: float, point: float) -> None:
+        """Учесть новый тик по символу."""
+
+    def should_modify(
+        self, symbol: str, current: float, target: float, point: float
+    ) -> bool:
+        """Нужно ли двигать ордер с current на target."""
+        self.stats.requested += 1
+        if current == target:
+            self.stats.skipped_small += 1
+            return False
+        self.stats.sent += 1
+        return True
+
+
+class AdaptiveRequotePolicy(RequotePolicy):
+    """Порог минимального сдвига, адаптивный интервал и лимит модификаций.
+
+    - ордер не двигается, если цена ушла меньше чем на min_points пунктов;
+    - в тихом рынке интервал растягивается до max_interval, в активном
+      возвращается к базовому, в последние fast_window секунд до новости
+      сжимается до fast_interval;
+    - на аккаунт не больше max_per_second модификаций в секунду.
+    """
+
+    def __init__(
+        self,
+        min_points: float | None = None,
+        base_interval: float | None = None,
+        fast_interval: float | None = None,
+        max_interval: float | None = None,
+        fast_window: float | None = None,
+        max_per_second: float | None = None,
+        clock: Clock = SYSTEM_CLOCK,
+    ) -> None:
+        super().__init__()
+        s = settings
+        self.min_points = min_points if min_points is not None else s.requote_min_points
+        self.base_interval = (
+            base_interval if base_interval is not None else s.update_interval
+        )
+        self.fast_interval = (
+            fast_interval if fast_interval is not None else s.requote_fast_interval
+        )
+        self.max_interval = (
+            max_interval if max_interval is not None else s.requote_max_interval
+        )
+        self.fast_window = (
+            fast_window if fast_window is not None else s.requote_fast_window
+        )
+        self._bucket = TokenBucket(
+            max_per_second if max_per_second is not None else s.requote_max_per_second,
+            clock=clock,
+        )
+        self._last_price: dict[str, float] = {}
+        # Экспоненциальное среднее доли тиков со значимым сдвигом, 0..1
+        self._activity: dict[str, float] = {}
+
+    def interval(self, symbol: str, time_to_release: float) -> float:
+        if time_to_release <= self.fast_window:
+            return self.fast_interval
+        activity = self._activity.get(symbol, 1.0)
+        return self.max_interval - (self.max_interval - self.base_interval) * activity
+
+    def observe(self, symbol: str, price: float, point: float) -> None:
+        last = self._last_price.get(symbol)
+        self._last_price[symbol] = price
+        if last is None:
+            return
+        moved = abs(price - last) / point >= self.min_points
+        prev = self._activity.get(symbol, 1.0)
+        self._activity[symbol] = 0.8 * prev + 0.2 * float(moved)
+
+    def should_modify(
+        self, symbol: str, current: float, target: float, point: float
+    ) -> bool:
+        self.stats.requested += 1
+        if abs(target - current) / point < self.min_points:
+            self.stats.skipped_small += 1
+            return False
+        if not self._bucket.try_acquire():
+            self.stats.throttled += 1
+            return False
+        self.stats.sent += 1
+        return True
@@ -2,14 +2,29 @@
 
 import asyncio
 import logging
-from datetime import datetime, timedelta
+import math
+from collections.abc import Callable
+from datetime import timedelta
+from pathlib import Path
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
+from bot.clock import SYSTEM_CLOCK, Clock
 from bot.config import settings
-from bot.database import deactivate_event, list_events
-from bot.models import NewsEvent
-from bot.mt5_client import MT5Client
+from bot.event_index import EventIndex, start_time_of
+from bot.journal import Kind, TradeJournal
+from bot.metrics import METRICS
+from bot.models import NewsEvent, TradeState
+from bot.mt5_client import OrderRecord, Position
+from bot.mt5_gateway import MT5Gateway
+from bot.mt5_shards import ShardedGateway
+from bot.notifier import Notifier
+from bot.placement import PlacementCoordinator
+from bot.price_feed import PriceFeed, PriceSubscription
+from bot.repository import EventRepository
+from bot.requote import AdaptiveRequotePolicy, RequotePolicy
+from bot.symbols import SymbolInfo
+from bot.tick_recorder import TickRecorder
 
 logger = logging.getLogger(__name__)
 
@@ -17,141 +32,744 @@ logger = logging.getLogger(__name__)
 class TradingScheduler:
     """Планировщик: за 5 минут до новости выставляет и двигает ордера."""
 
-    def __init__(self, mt5: MT5Client) -> None:
+    def __init__(
+        self,
+        mt5: MT5Gateway | ShardedGateway,
+        repo: EventRepository,
+        policy_factory: Callable[[], RequotePolicy] | None = None,
+        clock: Clock = SYSTEM_CLOCK,
+        ticks_dir: Path | None = None,
+        notifier: Notifier | None = None,
+        journal: TradeJournal | None = None,
+    ) -> None:
         self.mt5 = mt5
+        self.repo = repo
+        self.clock = clock
+        self.ticks_dir = ticks_dir  # None — тики не записываются
+        self.notifier = notifier  # None — уведомления не отправляются
+        self.journal = journal  # None — журнал сделок не ведётся
+        self.feed = PriceFeed(mt5, clock=clock)
+        self.placer = PlacementCoordinator(mt5, clock=clock)
+        # Политика перестановки — своя на каждый счёт MT5: лимит модификаций
+        # в секунду у брокера на счёт, а не на бота
+        self._policy_factory = policy_factory or (
+            lambda: AdaptiveRequotePolicy(clock=clock)
+        )
+        self._policies: dict[str, RequotePolicy] = {}
         self.scheduler = AsyncIOScheduler()
+        self.index = EventIndex()
+        self._wakeup = asyncio.Event()
+        self._timer: asyncio.Task[None] | None = None
         self._active_tasks: dict[int, asyncio.Task[None]] = {}
+        # Выставленные ордера, об исполнении которых ещё не сообщили
+        self._tickets: dict[int, tuple[NewsEvent, int]] = {}  # → (новость, digits)
+        # Стрэддлы после новости (OCO): ticket → (встречный ticket, новость,
+        # конец наблюдения на шкале monotonic)
+        self._oco: dict[int, tuple[int, NewsEvent, float]] = {}
+        self._oco_task: asyncio.Task[None] | None = None
+        # Дозапись тиков после фиксации ордеров (см. _record_after_freeze)
+        self._recordings: set[asyncio.Task[None]] = set()
 
-    def start(self) -> None:
-        """Запустить планировщик."""
+    async def start(self) -> None:
+        """Загрузить расписание, восстановить прерванные торговли, запустить таймер."""
+        events = await self.repo.list_events(only_active=True)
+        for event in events:
+            self.index.add(event)
+        await self._recover_trades({e.id: e for e in events if e.id is not None})
+        self._timer = asyncio.create_task(self._run_timer(), name="event-timer")
         self.scheduler.add_job(
-            self._sync_events,
+            self._reconcile_orders,
             "interval",
-            seconds=30,
-            id="sync_events",
+            seconds=settings.order_reconcile_interval,
+            id="reconcile_orders",
             replace_existing=True,
         )
         self.scheduler.start()
-        logger.info("📅 Планировщик запущен")
+        logger.info("📅 Планировщик запущен, в расписании %d новостей", len(self.index))
 
-    def stop(self) -> None:
-        """Остановить планировщик и отменить все задачи."""
-        for task in self._active_tasks.values():
+    async def stop(self) -> None:
+        """Остановить планировщик и отменить все задачи (с отменой ордеров)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        tasks = list(self._active_tasks.values())
+        for task in tasks:
             task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
         self._active_tasks.clear()
+        recordings = list(self._recordings)
+        for task in recordings:
+            task.cancel()
+        await asyncio.gather(*recordings, return_exceptions=True)
+        if self._oco_task is not None:
+            self._oco_task.cancel()
+            await asyncio.gather(self._oco_task, return_exceptions=True)
+            self._oco_task = None
+        self.feed.stop()
         self.scheduler.shutdown(wait=False)
         logger.info("📅 Планировщик остановлен")
 
-    async def _sync_events(self) -> None:
-        """Проверить расписание и запланировать торговлю."""
-        events = list_events(only_active=True)
-        now = datetime.now()
+    async def reload(self) -> None:
+        """Перечитать расписание из БД (после массового импорта)."""
+        for event in await self.repo.list_events(only_active=True):
+            if event.id not in self._active_tasks:
+                self.index.add(event)
+        self._wakeup.set()
 
-        for event in events:
-            if event.id is None:
-                continue
+    def schedule(self, event: NewsEvent) -> None:
+        """Добавить новость в индекс и разбудить таймер."""
+        self.index.add(event)
+        self._wakeup.set()
+
+    def unschedule(self, event_id: int) -> bool:
+        """Убрать новость из индекса; идущая по ней торговля отменяется."""
+        removed = self.index.remove(event_id) is not None
+        task = self._active_tasks.get(event_id)
+        if task is not None:
+            task.cancel()
+            removed = True
+        self._wakeup.set()
+        return removed
+
+    async def _run_timer(self) -> None:
+        """Спать ровно до ближайшего дедлайна и запускать наступившие новости."""
+        while True:
+            self._wakeup.clear()
+            deadline = self.index.next_deadline()
+            timeout = None
+            if deadline is not None:
+                wake_at = self.clock.monotonic_at(deadline)
+                timeout = max(0.0, wake_at - self.clock.monotonic())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            for event in self.index.pop_due(self.clock.now()):
+                await self._launch(event)
+
+    async def _recover_trades(self, events: dict[int, NewsEvent]) -> None:
+        """Продолжить или завершить торговли, прерванные перезапуском бота.
 
-            # Пропускаем уже запущенные
-            if event.id in self._active_tasks:
+        Ордера всех таких новостей ищутся в терминале одним orders_get():
+        если до новости ещё есть время и оба ордера на месте — торговля
+        продолжается с ними, иначе ордера, не зафиксированные к новости,
+        отменяются и новость деактивируется (второй пары ордеров не будет).
+        Стрэддл, вышедший из новости меньше oco_window назад, снова
+        ставится под наблюдение OCO на остаток окна.
+        """
+        trades = await self.repo.list_trades()
+        if not trades:
+            return
+        started = self.clock.monotonic()
+        tickets = [t for s in trades for t in (s.buy_ticket, s.sell_ticket)]
+        live = {o.ticket: o for o in await self.mt5.adopt_orders(tickets)}
+        # Новости вышедших стрэддлов уже неактивны — читаем их отдельно
+        released_ids = [s.event_id for s in trades if s.phase == "released"]
+        released = (
+            {e.id: e for e in await self.repo.get_events(released_ids)}
+            if released_ids
+            else {}
+        )
+        now = self.clock.now()
+        resumed = 0
+        for state in trades:
+            self.index.remove(state.event_id)
+            event = events.get(state.event_id)
+            buy = live.get(state.buy_ticket)
+            sell = live.get(state.sell_ticket)
+            if state.phase == "released":
+                event = released.get(state.event_id)
+                resumed += await self._recover_straddle(state, event, buy, sell)
+                continue
+            if (
+                event is not None
+                and state.phase == "placed"
+                and buy is not None
+                and sell is not None
+                and now < event.event_date
+            ):
+                await self._launch(event, resume=(buy, sell))
+                resumed += 1
                 continue
+            cancelled = 0
+            for order in (buy, sell):
+                if order is not None and await self._cancel(
+                    state.event_id, order.symbol, order.ticket
+                ):
+                    cancelled += 1
+            await self.repo.deactivate_event(state.event_id)
+            logger.info(
+                "🧹 Прерванная торговля по новости #%d завершена, отменено ордеров: %d",
+                state.event_id,
+                cancelled,
+            )
+        logger.info(
+            "♻️ Восстановление после перезапуска: продолжено %d из %d за %.0f мс",
+            resumed,
+            len(trades),
+            (self.clock.monotonic() - started) * 1000,
+        )
+
+    async def _recover_straddle(
+        self,
+        state: TradeState,
+        event: NewsEvent | None,
+        buy: OrderRecord | None,
+        sell: OrderRecord | None,
+    ) -> bool:
+        """Вернуть под OCO стрэддл вышедшей новости; True — наблюдение продолжено."""
+        remaining = 0.0
+        if event is not None:
+            until = event.event_date + timedelta(seconds=settings.oco_window)
+            remaining = (until - self.clock.now()).total_seconds()
+        if remaining > 0 and buy is not None and sell is not None:
+            assert event is not None
+            self._watch_straddle(event, buy.ticket, sell.ticket, remaining)
+            logger.info(
+                "♻️ OCO по новости #%d продолжено ещё на %.0f сек",
+                state.event_id,
+                remaining,
+            )
+            return True
+        lone = buy if sell is None else sell if buy is None else None
+        if remaining > 0 and lone is not None:
+            # Встречная нога исполнилась, пока бот был остановлен
+            ok = await self._cancel(state.event_id, lone.symbol, lone.ticket)
+            logger.info(
+                "✂️ OCO %s: встречная нога исполнилась до перезапуска, ордер %d %s",
+                lone.symbol,
+                lone.ticket,
+                "снят" if ok else "снять не удалось",
+            )
+        self.repo.finish_trade(state.event_id)
+        return False
 
-            start_time = event.event_date - timedelta(seconds=settings.pre_news_seconds)
+    async def _launch(
+        self, event: NewsEvent, resume: tuple[OrderRecord, OrderRecord] | None = None
+    ) -> None:
+        """Запустить торговлю по новости, у которой наступило время старта.
 
-            # Если время старта уже наступило или через <30 сек — запускаем
-            if start_time <= now + timedelta(seconds=30):
-                if event.event_date < now:
-                    # Новость уже прошла — деактивируем
-                    deactivate_event(event.id)
-                    logger.info("⏭ Новость #%d пропущена (прошла)", event.id)
-                    continue
+        resume — уже стоящие (buy, sell) ордера прерванной торговли.
+        """
+        assert event.id is not None
+        if event.id in self._active_tasks:
+            return
 
-                task = asyncio.create_task(self._trade_on_news(event))
-                self._active_tasks[event.id] = task
-                logger.info(
-                    "🚀 Запущена торговля для %s (%s) — новость #%d",
-                    event.symbol,
-                    event.event_date.strftime("%H:%M:%S"),
-                    event.id,
+        if event.event_date < self.clock.now():
+            # Новость уже прошла — деактивируем
+            await self.repo.deactivate_event(event.id)
+            logger.info("⏭ Новость #%d пропущена (прошла)", event.id)
+            return
+
+        # demo: симулятор рынка готовит всплеск волатильности к новости
+        await self.mt5.expect_news(event.symbol, event.event_date)
+        task = asyncio.create_task(self._trade_on_news(event, resume))
+        self._active_tasks[event.id] = task
+        logger.info(
+            "🚀 Запущена торговля для %s (%s) — новость #%d",
+            event.symbol,
+            event.event_date.strftime("%H:%M:%S"),
+            event.id,
+        )
+
+    async def _reconcile_orders(self) -> None:
+        """Сверить кэш ордеров с терминалом и сообщить об исполнениях."""
+        if self._active_tasks:
+            await self.mt5.reconcile_orders()
+        if not self._tickets:
+            return
+        fills = await self.mt5.take_fills()
+        if fills:
+            await self._on_fills(fills, self.clock.monotonic())
+        # Ордера, не исполнившиеся за notify_fill_window после новости, не ждём
+        expired = self.clock.now() - timedelta(seconds=settings.notify_fill_window)
+        for ticket, (event, _) in list(self._tickets.items()):
+            if event.event_date < expired:
+                del self._tickets[ticket]
+
+    def _watch_straddle(
+        self,
+        event: NewsEvent,
+        buy_ticket: int,
+        sell_ticket: int,
+        window: float | None = None,
+    ) -> None:
+        """Следить за стрэддлом после новости: исполнилась нога — снять другую.
+
+        По завершении наблюдения состояние торговли удаляется из БД.
+        """
+        if window is None:
+            window = settings.oco_window
+        until = self.clock.monotonic() + window
+        self._oco[buy_ticket] = (sell_ticket, event, until)
+        self._oco[sell_ticket] = (buy_ticket, event, until)
+        if self._oco_task is None or self._oco_task.done():
+            self._oco_task = asyncio.create_task(self._watch_fills(), name="oco")
+
+    async def _watch_fills(self) -> None:
+        """Опрос исполнений всех стрэддлов одним запросом позиций за цикл."""
+        while self._oco:
+            await self.clock.sleep(settings.oco_poll_interval)
+            fills = await self.mt5.take_fills()
+            if fills:
+                await self._on_fills(fills, self.clock.monotonic())
+            now = self.clock.monotonic()
+            for ticket, (opposite, event, until) in list(self._oco.items()):
+                if until <= now and ticket in self._oco:
+                    del self._oco[ticket]
+                    self._oco.pop(opposite, None)
+                    self._finish_trade(event)
+
+    async def _on_fills(self, fills: list[Position], detected: float) -> None:
+        """Сообщить об исполнениях и снять встречные ноги стрэддлов."""
+        filled = {position.ticket for position in fills}
+        cancels = []
+        for position in fills:
+            symbol = position.symbol
+            placed = self._tickets.pop(position.ticket, None)
+            if placed is not None:
+                event, digits = placed
+                self._notify(
+                    event,
+                    f"💥 Сработал {position.side} {symbol} "
+                    f"@ {position.price_open:.{digits}f} (ticket={position.ticket})",
                 )
+            watched = self._oco.pop(position.ticket, None)
+            owner = watched[1] if watched else placed[0] if placed else None
+            self._journal(
+                Kind.FILL,
+                owner.id if owner is not None else None,
+                symbol,
+                position.ticket,
+                position.price_open,
+                position.volume,
+            )
+            if watched is None:
+                continue
+            opposite, event, _ = watched
+            self._oco.pop(opposite, None)
+            if opposite in filled:
+                logger.warning("⚠️ OCO %s: обе ноги исполнены до обнаружения", symbol)
+                self._finish_trade(event)
+                continue
+            cancels.append(self._cancel_opposite(event, opposite, detected))
+        await asyncio.gather(*cancels)
+
+    async def _cancel_opposite(
+        self, event: NewsEvent, ticket: int, detected: float
+    ) -> None:
+        """Снять встречную ногу и учесть задержку от обнаружения исполнения."""
+        symbol = event.symbol
+        ok = await self._cancel(event.id, symbol, ticket)
+        latency = self.clock.monotonic() - detected
+        METRICS.histogram("oco_cancel_seconds", symbol=symbol).observe(latency)
+        METRICS.counter(
+            "oco_cancel_total", symbol=symbol, result="ok" if ok else "fail"
+        ).inc()
+        if ok:
+            logger.info(
+                "✂️ OCO %s: ордер %d снят через %.1f мс после исполнения встречного",
+                symbol,
+                ticket,
+                latency * 1000,
+            )
+        else:
+            logger.warning("⚠️ OCO %s: ордер %d снять не удалось", symbol, ticket)
+        self._finish_trade(event)
+
+    def _policy(self, ticket: int) -> RequotePolicy:
+        """Политика перестановки счёта, на котором стоит ордер."""
+        account = self.mt5.account_of(ticket)
+        policy = self._policies.get(account)
+        if policy is None:
+            policy = self._policies[account] = self._policy_factory()
+        return policy
+
+    def _finish_trade(self, event: NewsEvent) -> None:
+        if event.id is not None:
+            self.repo.finish_trade(event.id)
+
+    def _notify(self, event: NewsEvent, text: str) -> None:
+        """Уведомление в сводку новости (не ждёт отправки)."""
+        if self.notifier is not None:
+            self.notifier.notify(text, group=event.event_date.isoformat())
 
-    async def _trade_on_news(self, event: NewsEvent) -> None:
+    async def _trade_on_news(
+        self, event: NewsEvent, resume: tuple[OrderRecord, OrderRecord] | None = None
+    ) -> None:
         """Основная торговая логика для одной новости."""
         assert event.id is not None
         symbol = event.symbol
         offset = settings.offset_points
         lot = settings.lot_size
-
-        # Определяем множитель пункта (JPY пары: 0.01, остальные: 0.00001)
-        if "JPY" in symbol.upper():
-            point = 0.01
-        else:
-            point = 0.00001
-
-        offset_price = offset * point
         buy_ticket: int | None = None
         sell_ticket: int | None = None
+        recorder: TickRecorder | None = None
+        reserved = False  # ждёт ли нас пакет выставления
+
+        # Старт, последняя перестановка и новость — на шкале monotonic:
+        # перевод системных часов (NTP, летнее время) их не сдвигает
+        clock = self.clock
+        start_at = clock.monotonic_at(start_time_of(event))
+        release_at = clock.monotonic_at(event.event_date)
+        freeze_at = release_at - settings.requote_last_offset
 
         try:
             # Ждём время начала (за 5 мин до новости)
-            start_time = event.event_date - timedelta(seconds=settings.pre_news_seconds)
-            now = datetime.now()
-            if start_time > now:
-                wait_sec = (start_time - now).total_seconds()
+            wait_sec = start_at - clock.monotonic()
+            if wait_sec > 0:
                 logger.info(
                     "⏳ Ожидание %.0f сек до начала торговли по %s", wait_sec, symbol
                 )
-                await asyncio.sleep(wait_sec)
+                await clock.sleep_until_monotonic(start_at)
+            # Новости с тем же временем старта выставятся одним пакетом
+            if resume is None:
+                self.placer.reserve()
+                reserved = True
 
-            # Получаем цену и выставляем ордера
-            price = self.mt5.get_price(symbol)
-            if price is None:
-                logger.error("Не удалось получить цену %s — пропуск", symbol)
-                return
+            # Пункт и точность цены — из спецификации символа (кэш клиента)
+            info = await self.mt5.symbol_info(symbol)
+            if info is None:
+                info = SymbolInfo.guess(symbol)
+                logger.warning(
+                    "Нет спецификации %s, пункт %g по имени символа", symbol, info.point
+                )
+            point = info.point
+            offset_price = offset * point
+
+            # Подписываемся на общий поток цен символа и выставляем ордера
+            with self.feed.subscribe(symbol) as prices:
+                tick = await prices.next(timeout=settings.price_stale_seconds)
+                if tick is None:
+                    logger.error("Не удалось получить цену %s — пропуск", symbol)
+                    return
+                self._journal(Kind.PRICE, event.id, symbol, None, tick.price, tick.ask)
+
+                if resume is None:
+                    buy_price = info.normalize_price(tick.price + offset_price)
+                    sell_price = info.normalize_price(tick.price - offset_price)
+                    reserved = False
+                    buy_ticket, sell_ticket = await self.placer.place(
+                        symbol, buy_price, sell_price, lot, priority=event.event_date
+                    )
+                else:
+                    # Ордера пережили перезапуск — двигаем их же
+                    buy_ticket, buy_price = resume[0].ticket, resume[0].price
+                    sell_ticket, sell_price = resume[1].ticket, resume[1].price
+                    logger.info(
+                        "♻️ Торговля по %s продолжена с ордерами buy=%d, sell=%d",
+                        symbol,
+                        buy_ticket,
+                        sell_ticket,
+                    )
 
-            buy_price = round(price + offset_price, 5)
-            sell_price = round(price - offset_price, 5)
+                if resume is None:
+                    for leg_ticket, leg_price in (
+                        (buy_ticket, buy_price),
+                        (sell_ticket, sell_price),
+                    ):
+                        self._journal(
+                            Kind.PLACE,
+                            event.id,
+                            symbol,
+                            leg_ticket,
+                            leg_price,
+                            lot,
+                            ok=leg_ticket is not None,
+                        )
+                if buy_ticket is None or sell_ticket is None:
+                    logger.error("Не удалось выставить ордера для %s", symbol)
+                    self._notify(event, f"⚠️ {symbol}: не удалось выставить ордера")
+                    return
+                # Тикеты — в БД без ожидания: после падения бот их подхватит
+                self.repo.save_trade(
+                    TradeState(
+                        event_id=event.id,
+                        phase="placed",
+                        buy_ticket=buy_ticket,
+                        sell_ticket=sell_ticket,
+                    )
+                )
+                digits = info.digits
+                self._notify(
+                    event,
+                    f"📌 {symbol}: buy stop {buy_price:.{digits}f}, "
+                    f"sell stop {sell_price:.{digits}f}",
+                )
+                # Когда получена цена, по которой сейчас стоит каждый ордер
+                buy_priced_at = sell_priced_at = tick.received_at
 
-            buy_ticket = self.mt5.place_buy_stop(symbol, buy_price, lot)
-            sell_ticket = self.mt5.place_sell_stop(symbol, sell_price, lot)
+                if self.ticks_dir is not None:
+                    recorder = TickRecorder.for_event(
+                        self.ticks_dir, event, self._recorder_capacity(), info
+                    )
+                    recorder.record(
+                        self.clock.time_ns(),
+                        tick.price,
+                        tick.ask,
+                        buy_price,
+                        sell_price,
+                    )
 
-            if buy_ticket is None or sell_ticket is None:
-                logger.error("Не удалось выставить ордера для %s", symbol)
-                return
+                # Двигаем ордера до последней перестановки за
+                # requote_last_offset до новости: в режиме stream — по приходу
+                # тика, иначе по сетке дедлайнов deadline += interval;
+                # частоту и пропуск мелких сдвигов решает политика
+                # Обе ноги выставлены по символу на один счёт
+                policy = self._policy(buy_ticket)
+                late = METRICS.histogram("requote_late_seconds", symbol=symbol)
+                missed = METRICS.counter("requote_missed_ticks_total", symbol=symbol)
+                deadline = clock.monotonic()
+                interval = policy.interval(symbol, release_at - deadline)
+                last_seq = tick.seq
+                final = False
+                while not final:
+                    if self.feed.streaming:
+                        # Тики, пришедшие во время модификации, схлопываются:
+                        # next() отдаёт последний из них
+                        tick = await prices.next(
+                            timeout=max(0.0, freeze_at - clock.monotonic())
+                        )
+                        if tick is not None and tick.received_at < freeze_at:
+                            deadline = tick.received_at
+                        else:
+                            deadline, final = freeze_at, True
+                            await clock.sleep_until_monotonic(deadline, precise=True)
+                    else:
+                        interval = policy.interval(symbol, release_at - deadline)
+                        prices.interval = interval
+                        deadline += interval
+                        now = clock.monotonic()
+                        if now > deadline:
+                            # Прошлая перестановка не уложилась в интервал
+                            skipped = int((now - deadline) // interval) + 1
+                            deadline += skipped * interval
+                            missed.inc(skipped)
+                            logger.warning(
+                                "⚠️ Перестановка %s не уложилась в %.0f мс, "
+                                "пропущено тиков: %d",
+                                symbol,
+                                interval * 1000,
+                                skipped,
+                            )
+                        if deadline >= freeze_at:
+                            deadline, final = freeze_at, True
+                        await clock.sleep_until_monotonic(deadline, precise=final)
+                    lateness = clock.monotonic() - deadline
+                    late.observe(max(0.0, lateness))
+                    if clock.monotonic() >= release_at:
+                        break
 
-            # Двигаем ордера каждые ~1.5 сек до момента новости
-            while datetime.now() < event.event_date:
-                await asyncio.sleep(settings.update_interval)
+                    # Последней перестановке — цена, запрошенная прямо сейчас
+                    if final or not self.feed.streaming:
+                        tick = await prices.fresh(0.0 if final else interval)
+                    if tick is None:
+                        continue
+                    if tick.seq != last_seq:
+                        last_seq = tick.seq
+                        policy.observe(symbol, tick.price, point)
+                        self._journal(
+                            Kind.PRICE, event.id, symbol, None, tick.price, tick.ask
+                        )
 
-                if datetime.now() >= event.event_date:
-                    break
+                    time_ns = clock.time_ns()
 
-                current_price = self.mt5.get_price(symbol)
-                if current_price is None:
-                    continue
+                    new_buy = info.normalize_price(tick.price + offset_price)
+                    new_sell = info.normalize_price(tick.price - offset_price)
 
-                new_buy = round(current_price + offset_price, 5)
-                new_sell = round(current_price - offset_price, 5)
+                    started = clock.monotonic()
+                    modified = False
+                    if policy.should_modify(symbol, buy_price, new_buy, point):
+                        modified = True
+                        if await self._modify(event, buy_ticket, new_buy):
+                            buy_price, buy_priced_at = new_buy, tick.received_at
+                    if policy.should_modify(symbol, sell_price, new_sell, point):
+                        modified = True
+                        if await self._modify(event, sell_ticket, new_sell):
+                            sell_price, sell_priced_at = new_sell, tick.received_at
 
-                self.mt5.modify_order(buy_ticket, new_buy)
-                self.mt5.modify_order(sell_ticket, new_sell)
+                    if recorder is not None:
+                        latency = (
+                            clock.monotonic() - started
+                            if modified
+                            else float("nan")
+                        )
+                        recorder.record(
+                            time_ns,
+                            tick.price,
+                            tick.ask,
+                            buy_price,
+                            sell_price,
+                            latency,
+                        )
 
+                logger.info(
+                    "🎯 Последняя перестановка %s: %+.1f мс от цели",
+                    symbol,
+                    lateness * 1000,
+                )
+                if recorder is not None:
+                    # Подписка берётся до выхода из with: опросчик не встаёт
+                    self._record_after_freeze(
+                        recorder,
+                        symbol,
+                        buy_price,
+                        sell_price,
+                        release_at + self._post_record_seconds(),
+                    )
+                    recorder = None
+
+            # Ордера зафиксированы — ждём выхода новости
+            await clock.sleep_until_monotonic(release_at, precise=True)
+            price_age = clock.monotonic() - min(buy_priced_at, sell_priced_at)
+            METRICS.gauge("order_price_age_at_release_seconds", symbol=symbol).set(
+                price_age
+            )
             logger.info(
-                "📰 Новость вышла! Ордера %s зафиксированы (buy=%s, sell=%s)",
+                "📰 Новость вышла! Ордера %s зафиксированы (buy=%s, sell=%s), "
+                "возраст цены %.2f сек",
                 symbol,
                 buy_ticket,
                 sell_ticket,
+                price_age,
+            )
+            self._notify(
+                event,
+                f"📰 {symbol}: новость вышла, buy {buy_price:.{digits}f} "
+                f"/ sell {sell_price:.{digits}f}",
+            )
+            self.repo.save_trade(
+                TradeState(
+                    event_id=event.id,
+                    phase="released",
+                    buy_ticket=buy_ticket,
+                    sell_ticket=sell_ticket,
+                )
+            )
+            if settings.oco_window > 0:
+                self._watch_straddle(event, buy_ticket, sell_ticket)
+            else:
+                self.repo.finish_trade(event.id)
+            if self.notifier is not None:
+                self._tickets[buy_ticket] = self._tickets[sell_ticket] = (event, digits)
+            logger.info(
+                "Перестановки: отправлено %d, сэкономлено %d",
+                policy.stats.sent,
+                policy.stats.saved,
             )
 
         except asyncio.CancelledError:
             logger.info("Торговля по %s отменена", symbol)
             # Отменяем ордера при отмене задачи
             if buy_ticket:
-                self.mt5.cancel_order(buy_ticket)
+                await self._cancel(event.id, symbol, buy_ticket)
             if sell_ticket:
-                self.mt5.cancel_order(sell_ticket)
+                await self._cancel(event.id, symbol, sell_ticket)
         finally:
-            deactivate_event(event.id)
+            if reserved:
+                self.placer.release()
+            if recorder is not None:
+                recorder.close()
             self._active_tasks.pop(event.id, None)
+            await self.repo.deactivate_event(event.id)
+
+    @staticmethod
+    def _post_record_seconds() -> float:
+        """Сколько писать тики после новости: не меньше окна OCO."""
+        return max(settings.oco_window, settings.tick_record_post_seconds)
+
+    def _post_record_interval(self) -> float:
+        """Интервал цен после фиксации ордеров — как в последние секунды до новости."""
+        if self.feed.streaming:
+            return self.feed.stream_interval
+        return settings.requote_fast_interval
+
+    def _recorder_capacity(self) -> int:
+        """Буфер вмещает всё окно после новости: в него не попадает сброс на диск."""
+        post_rows = math.ceil(
+            (self._post_record_seconds() + settings.requote_last_offset)
+            / self._post_record_interval()
+        )
+        return max(settings.tick_recorder_capacity, post_rows + 1)
+
+    def _record_after_freeze(
+        self,
+        recorder: TickRecorder,
+        symbol: str,
+        buy_price: float,
+        sell_price: float,
+        until: float,
+    ) -> None:
+        """Дописывать тики в файл после фиксации ордеров до until (monotonic).
+
+        Бэктест и перебор параметров считают исполнения и PnL по ценам
+        после новости, поэтому запись идёт и после выхода торговой задачи.
+        """
+        recorder.flush()  # строки до фиксации — на диск, буфер — окну после
+        prices = self.feed.subscribe(symbol)
+        prices.interval = self._post_record_interval()
+        task = asyncio.create_task(
+            self._record_ticks(recorder, prices, buy_price, sell_price, until),
+            name=f"tick-recorder:{symbol}",
+        )
+        self._recordings.add(task)
+        task.add_done_callback(self._recordings.discard)
+
+    async def _record_ticks(
+        self,
+        recorder: TickRecorder,
+        prices: PriceSubscription,
+        buy_price: float,
+        sell_price: float,
+        until: float,
+    ) -> None:
+        try:
+            with prices:
+                while (left := until - self.clock.monotonic()) > 0:
+                    tick = await prices.next(timeout=left)
+                    if tick is None:
+                        break
+                    recorder.record(
+                        self.clock.time_ns(),
+                        tick.price,
+                        tick.ask,
+                        buy_price,
+                        sell_price,
+                    )
+        finally:
+            recorder.close()
+
+    async def _modify(self, event: NewsEvent, ticket: int, price: float) -> bool:
+        """Переставить ордер и учесть результат в метриках и журнале."""
+        started = self.clock.monotonic()
+        ok = await self.mt5.modify_order(ticket, price)
+        latency = self.clock.monotonic() - started
+        METRICS.counter(
+            "order_modify_total", symbol=event.symbol, result="ok" if ok else "fail"
+        ).inc()
+        self._journal(Kind.MODIFY, event.id, event.symbol, ticket, price, latency, ok)
+        return ok
+
+    async def _cancel(self, event_id: int | None, symbol: str, ticket: int) -> bool:
+        """Отменить ордер и записать результат в журнал."""
+        started = self.clock.monotonic()
+        ok = await self.mt5.cancel_order(ticket)
+        latency = self.clock.monotonic() - started
+        self._journal(Kind.CANCEL, event_id, symbol, ticket, value=latency, ok=ok)
+        return ok
+
+    def _journal(
+        self,
+        kind: Kind,
+        event_id: int | None,
+        symbol: str,
+        ticket: int | None = None,
+        price: float = float("nan"),
+        value: float = float("nan"),
+        ok: bool = True,
+    ) -> None:
+        if self.journal is not None:
+            self.journal.record(kind, event_id, symbol, ticket, price, value, ok)
 
     def get_active_count(self) -> int:
         """Количество активных торговых задач."""
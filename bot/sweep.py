@@ -0,0 +1,261 @@
+"""Перебор параметров стратегии по записанным тикам.
+
+Сетка: отступ ордеров (offset_points), интервал перестановки
+(update_interval) и время входа до новости (pre_news_seconds). Для
+каждой новости и каждой комбинации считаются цены исполнения Buy/Sell
+Stop, сработали ли обе стороны и PnL через N секунд после новости.
+
+Модель упрощена относительно бэктеста (bot/backtest.py): ордера
+переставляются строго раз в интервал на bid ± отступ, без порога
+минимального сдвига и лимита модификаций, с фиксацией в момент
+новости. Зато вся сетка отступов считается одним проходом NumPy:
+ордер срабатывает на первом тике, где отклонение цены от опорного
+bid достигает отступа, а это searchsorted по накопленному максимуму
+отклонения. Символы считаются параллельно в пуле процессов.
+
+CLI: python -m bot.sweep ticks/*.tick [--offsets 50:400:10] [--top 20]
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from bot import tickfile
+from bot.symbols import SymbolInfo
+
+
+@dataclass(frozen=True)
+class SweepGrid:
+    """Сетка параметров: отступы (пункты), интервалы и упреждение (сек)."""
+
+    offsets: np.ndarray
+    intervals: np.ndarray
+    leads: np.ndarray
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return len(self.leads), len(self.intervals), len(self.offsets)
+
+    @property
+    def size(self) -> int:
+        return len(self.leads) * len(self.intervals) * len(self.offsets)
+
+
+@dataclass
+class SweepResult:
+    """Итоги по всем новостям символа, массивы формы (новости, L, I, O)."""
+
+    symbol: str
+    event_dates: list[datetime]
+    buy_fill: np.ndarray  # цена исполнения Buy Stop, NaN — не сработал
+    sell_fill: np.ndarray
+    pnl: np.ndarray  # пункты через horizon секунд после новости
+
+    @property
+    def both(self) -> np.ndarray:
+        """Сработали обе стороны."""
+        return ~np.isnan(self.buy_fill) & ~np.isnan(self.sell_fill)
+
+
+def _first_reach(excursion: np.ndarray, levels: np.ndarray) -> np.ndarray:
+    """Индекс первого элемента excursion >= level для каждого level (n — нет)."""
+    return np.searchsorted(np.maximum.accumulate(excursion), levels, side="left")
+
+
+def evaluate_window(
+    time_ns: np.ndarray,
+    bid: np.ndarray,
+    ask: np.ndarray,
+    event_ns: int,
+    grid: SweepGrid,
+    point: float,
+    horizon: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Цены исполнения и PnL одной новости по всей сетке: массивы (L, I, O)."""
+    buy_fill = np.full(grid.shape, np.nan)
+    sell_fill = np.full(grid.shape, np.nan)
+    pnl = np.zeros(grid.shape)
+
+    end = int(np.searchsorted(time_ns, event_ns + int(horizon * 1e9), side="right"))
+    if end == 0:
+        return buy_fill, sell_fill, pnl
+    # Закрытие по рынку на горизонте: покупка — по bid, продажа — по ask
+    exit_bid, exit_ask = bid[end - 1], ask[end - 1]
+    levels = grid.offsets * point
+
+    for li, lead in enumerate(grid.leads):
+        start_ns = event_ns - int(lead * 1e9)
+        i0 = int(np.searchsorted(time_ns, start_ns, side="left"))
+        if i0 >= end:
+            continue
+        t = time_ns[i0:end]
+        for ii, interval in enumerate(grid.intervals):
+            step = int(interval * 1e9)
+            # Последняя перестановка до новости, дальше ордера не двигаются
+            last = (event_ns - 1 - start_ns) // step
+            k = np.minimum((t - start_ns) // step, last)
+            anchor = np.searchsorted(time_ns, start_ns + k * step, side="right") - 1
+            anchor_bid = bid[np.maximum(anchor, 0)]
+
+            up = _first_reach(ask[i0:end] - anchor_bid, levels)
+            down = _first_reach(anchor_bid - bid[i0:end], levels)
+            hit_up = up < len(t)
+            hit_down = down < len(t)
+            buy = np.where(hit_up, ask[i0 + np.minimum(up, len(t) - 1)], np.nan)
+            sell = np.where(hit_down, bid[i0 + np.minimum(down, len(t) - 1)], np.nan)
+            buy_fill[li, ii] = buy
+            sell_fill[li, ii] = sell
+            pnl[li, ii] = (
+                np.where(hit_up, exit_bid - buy, 0.0)
+                + np.where(hit_down, sell - exit_ask, 0.0)
+            ) / point
+    return buy_fill, sell_fill, pnl
+
+
+def sweep_symbol(
+    symbol: str, paths: list[Path], grid: SweepGrid, horizon: float
+) -> SweepResult:
+    """Посчитать сетку по всем новостям одного символа."""
+    dates: list[datetime] = []
+    buys, sells, pnls = [], [], []
+    for path in paths:
+        arrays, meta = tickfile.read(path)
+        point = SymbolInfo.from_meta(symbol, meta).point
+        event_date = datetime.fromisoformat(str(meta["event_date"]))
+        event_ns = int(event_date.timestamp() * 1e9)
+        buy, sell, pnl = evaluate_window(
+            arrays["time_ns"],
+            arrays["bid"],
+            arrays["ask"],
+            event_ns,
+            grid,
+            point,
+            horizon,
+        )
+        dates.append(event_date)
+        buys.append(buy)
+        sells.append(sell)
+        pnls.append(pnl)
+    return SweepResult(symbol, dates, np.stack(buys), np.stack(sells), np.stack(pnls))
+
+
+def group_by_symbol(paths: list[Path]) -> dict[str, list[Path]]:
+    """Разложить тиковые файлы по символу из метаданных."""
+    groups: dict[str, list[Path]] = defaultdict(list)
+    for path in paths:
+        _, meta = tickfile.read_header(path)
+        if "symbol" in meta and "event_date" in meta:
+            groups[str(meta["symbol"]).upper()].append(path)
+    return dict(groups)
+
+
+def run_sweep(
+    paths: list[Path],
+    grid: SweepGrid,
+    horizon: float = 60.0,
+    workers: int | None = None,
+) -> list[SweepResult]:
+    """Перебрать сетку по всем файлам, символы — в пуле процессов."""
+    groups = group_by_symbol(paths)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(sweep_symbol, symbol, files, grid, horizon)
+            for symbol, files in groups.items()
+        ]
+        return [f.result() for f in futures]
+
+
+def rank(results: list[SweepResult], grid: SweepGrid) -> list[dict[str, float]]:
+    """Сводка по комбинациям (все символы вместе), лучшие по PnL — первыми."""
+    pnl = np.concatenate([r.pnl for r in results])
+    both = np.concatenate([r.both for r in results])
+    filled = np.concatenate(
+        [~np.isnan(r.buy_fill) | ~np.isnan(r.sell_fill) for r in results]
+    )
+    releases = len(pnl)
+    total = pnl.sum(axis=0)
+    wins = (pnl > 0).sum(axis=0)
+    rows: list[dict[str, float]] = []
+    for flat in np.argsort(-total, axis=None):
+        li, ii, oi = np.unravel_index(flat, grid.shape)
+        rows.append(
+            {
+                "offset_points": float(grid.offsets[oi]),
+                "update_interval": float(grid.intervals[ii]),
+                "pre_news_seconds": float(grid.leads[li]),
+                "pnl_total": float(total[li, ii, oi]),
+                "pnl_mean": float(total[li, ii, oi] / releases),
+                "win_rate": float(wins[li, ii, oi] / releases),
+                "fill_rate": float(filled[:, li, ii, oi].mean()),
+                "both_rate": float(both[:, li, ii, oi].mean()),
+            }
+        )
+    return rows
+
+
+def _range(spec: str) -> np.ndarray:
+    """'50:400:10' — диапазон с шагом (конец включительно), '1,1.5,3' — список."""
+    if ":" in spec:
+        start, stop, step = (float(x) for x in spec.split(":"))
+        return np.arange(start, stop + step / 2, step)
+    return np.array([float(x) for x in spec.split(",")])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Перебор параметров на тиках")
+    parser.add_argument("paths", type=Path, nargs="+")
+    parser.add_argument("--offsets", default="50:400:10", help="отступы, пункты")
+    parser.add_argument("--intervals", default="0.5,1,1.5,2,3,5", help="сек")
+    parser.add_argument("--leads", default="60,120,300", help="сек до новости")
+    parser.add_argument(
+        "--horizon", type=float, default=60.0, help="PnL через N сек после новости"
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--csv", type=Path, default=None, help="вся сводка в CSV")
+    args = parser.parse_args()
+
+    grid = SweepGrid(_range(args.offsets), _range(args.intervals), _range(args.leads))
+    started = time.perf_counter()
+    results = run_sweep(args.paths, grid, args.horizon, args.workers)
+    if not results:
+        print("Нет тиковых файлов с symbol/event_date", file=sys.stderr)
+        return
+    rows = rank(results, grid)
+    elapsed = time.perf_counter() - started
+
+    if args.csv:
+        with args.csv.open("w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    print(
+        f"{'offset':>7} {'interval':>8} {'lead':>6} {'pnl':>10} "
+        f"{'mean':>8} {'win':>6} {'fill':>6} {'both':>6}"
+    )
+    for row in rows[: args.top]:
+        print(
+            f"{row['offset_points']:>7.0f} {row['update_interval']:>8.2f} "
+            f"{row['pre_news_seconds']:>6.0f} {row['pnl_total']:>10.1f} "
+            f"{row['pnl_mean']:>8.2f} {row['win_rate']:>6.1%} "
+            f"{row['fill_rate']:>6.1%} {row['both_rate']:>6.1%}"
+        )
+    releases = sum(len(r.event_dates) for r in results)
+    print(
+        f"\nНовостей: {releases}, комбинаций: {grid.size}, "
+        f"время: {elapsed:.2f} сек",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
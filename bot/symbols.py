@@ -0,0 +1,65 @@
+"""Параметры торгового символа: пункт, точность цены, стоп-уровень, объём.
+
+В live-режиме загружаются из symbol_info терминала (MT5Client кэширует
+их с TTL), без терминала (demo, бэктест) — угадываются по имени символа.
+"""
+
+import math
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True, slots=True)
+class SymbolInfo:
+    """Спецификация символа для нормализации и проверки ордеров."""
+
+    symbol: str
+    point: float
+    digits: int
+    tick_size: float = 0.0  # шаг цены, 0 — равен point
+    stops_level: int = 0  # минимальный отступ стоп-ордера от цены, пунктов
+    volume_min: float = 0.01
+    volume_max: float = 100.0
+    volume_step: float = 0.01
+
+    @classmethod
+    def guess(cls, symbol: str) -> "SymbolInfo":
+        """Параметры по имени: металлы — 2 знака, JPY — 3, остальное — 5."""
+        name = symbol.upper()
+        if name.startswith("XAU"):
+            digits = 2
+        elif "JPY" in name or name.startswith("XAG"):
+            digits = 3
+        else:
+            digits = 5
+        return cls(symbol, 10.0**-digits, digits)
+
+    @classmethod
+    def from_meta(cls, symbol: str, meta: Mapping[str, Any]) -> "SymbolInfo":
+        """Из метаданных тикового файла (to_meta), иначе guess()."""
+        if "point" not in meta or "digits" not in meta:
+            return cls.guess(symbol)
+        return cls(symbol, float(meta["point"]), int(meta["digits"]))
+
+    def to_meta(self) -> dict[str, Any]:
+        """Поля для метаданных тикового файла."""
+        return {"point": self.point, "digits": self.digits}
+
+    @property
+    def stops_distance(self) -> float:
+        """Минимальное расстояние стоп-ордера от рынка в цене."""
+        return self.stops_level * self.point
+
+    def normalize_price(self, price: float) -> float:
+        """Округлить цену до шага цены символа."""
+        step = self.tick_size or self.point
+        return round(round(price / step) * step, self.digits)
+
+    def normalize_volume(self, volume: float) -> float:
+        """Объём вниз до шага и в пределы [min, max]; 0 — меньше минимума."""
+        steps = math.floor(volume / self.volume_step + 1e-9)
+        volume = round(steps * self.volume_step, 8)
+        if volume < self.volume_min:
+            return 0.0
+        return min(volume, self.volume_max)
@@ -0,0 +1,127 @@
+"""Запись тиков окна вокруг новости в тиковый файл (bot/tickfile.py).
+
+Строка: время тика, bid/ask, наши цены Buy/Sell Stop после обработки
+тика и задержка модификации ордеров (NaN, если модификации не было).
+Строки пишутся в заранее выделенные массивы NumPy; заполненный буфер
+копируется и дописывается блоком в файл в отдельном потоке, поэтому
+event loop на диск не ждёт. Запись продолжается и после новости (см.
+TICK_RECORD_POST_SECONDS), так что файл подходит как вход для
+bot/backtest.py и bot/sweep.py (в метаданных symbol и event_date).
+"""
+
+import concurrent.futures
+import logging
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from bot import tickfile
+from bot.models import NewsEvent
+from bot.symbols import SymbolInfo
+
+logger = logging.getLogger(__name__)
+
+RECORD_COLUMNS: dict[str, str] = {
+    **tickfile.MARKET_COLUMNS,
+    "buy_price": "<f8",
+    "sell_price": "<f8",
+    "modify_latency": "<f8",  # секунд, NaN — без модификации
+}
+
+# Один поток на все записи: блоки одного файла уходят строго по порядку
+_writer = concurrent.futures.ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="tick-writer"
+)
+
+
+class TickRecorder:
+    """Кольцевой буфер тиков с фоновой дозаписью в файл."""
+
+    def __init__(
+        self, path: Path, meta: Mapping[str, Any] | None = None, capacity: int = 4096
+    ) -> None:
+        self.path = path
+        self.capacity = capacity
+        self.rows: int = 0  # всего записано строк
+        self._buffers = {
+            name: np.empty(capacity, dtype=dtype)
+            for name, dtype in RECORD_COLUMNS.items()
+        }
+        self._n = 0
+        self._last: concurrent.futures.Future[None] = _writer.submit(
+            tickfile.create, path, RECORD_COLUMNS, meta
+        )
+
+    @classmethod
+    def for_event(
+        cls,
+        directory: Path,
+        event: NewsEvent,
+        capacity: int = 4096,
+        info: SymbolInfo | None = None,
+    ) -> "TickRecorder":
+        """Рекордер для новости: файл {id}_{symbol}_{дата}.tick.
+
+        info — спецификация символа: пункт и точность попадают в метаданные.
+        """
+        stamp = event.event_date.strftime("%Y%m%d_%H%M%S")
+        path = directory / f"{event.id}_{event.symbol}_{stamp}.tick"
+        meta = {
+            "symbol": event.symbol,
+            "event_date": event.event_date.isoformat(),
+            "event_id": event.id,
+            **(info.to_meta() if info is not None else {}),
+        }
+        return cls(path, meta, capacity)
+
+    def record(
+        self,
+        time_ns: int,
+        bid: float,
+        ask: float,
+        buy_price: float,
+        sell_price: float,
+        modify_latency: float = float("nan"),
+    ) -> None:
+        """Добавить строку (без аллокаций, пока буфер не заполнен)."""
+        i = self._n
+        b = self._buffers
+        b["time_ns"][i] = time_ns
+        b["bid"][i] = bid
+        b["ask"][i] = ask
+        b["buy_price"][i] = buy_price
+        b["sell_price"][i] = sell_price
+        b["modify_latency"][i] = modify_latency
+        self._n = i + 1
+        self.rows += 1
+        if self._n == self.capacity:
+            self.flush()
+
+    def flush(self) -> None:
+        """Отдать накопленные строки потоку записи."""
+        if self._n == 0:
+            return
+        n, self._n = self._n, 0
+        chunk = {name: column[:n].copy() for name, column in self._buffers.items()}
+        self._last = _writer.submit(tickfile.append, self.path, chunk)
+        self._last.add_done_callback(self._log_error)
+
+    def close(self) -> None:
+        """Дописать остаток (не дожидаясь записи на диск)."""
+        self.flush()
+        logger.info("💾 Тики записаны: %s (%d строк)", self.path, self.rows)
+
+    def wait(self, timeout: float | None = None) -> None:
+        """Дождаться записи всех отправленных блоков."""
+        self._last.result(timeout)
+
+    def _log_error(self, future: concurrent.futures.Future[None]) -> None:
+        if (error := future.exception()) is not None:
+            logger.error("Ошибка записи тиков %s: %s", self.path, error)
+
+
+def read_ticks(path: Path) -> tuple[dict[str, np.ndarray], dict[str, Any]]:
+    """Прочитать записанное окно: колонки RECORD_COLUMNS и метаданные."""
+    return tickfile.read(path)
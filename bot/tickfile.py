@@ -0,0 +1,106 @@
+"""Компактный колоночный бинарный формат тиковых файлов.
+
+Файл: 8 байт сигнатуры, uint32 длина заголовка, JSON-заголовок
+(колонки с dtype NumPy и произвольные метаданные), затем блоки:
+uint64 число строк и данные колонок подряд, каждая колонка непрерывно.
+Новые блоки только дописываются в конец, поэтому файл можно
+наращивать без перезаписи. Чтение — через mmap без копирования,
+если блок один.
+"""
+
+import json
+import mmap
+import struct
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+MAGIC = b"FNTICK01"
+_HEADER_LEN = struct.Struct("<I")
+_BLOCK_LEN = struct.Struct("<Q")
+
+# Колонки рыночных тиков: время (нс от эпохи), bid, ask
+MARKET_COLUMNS: dict[str, str] = {"time_ns": "<i8", "bid": "<f8", "ask": "<f8"}
+
+
+def create(
+    path: Path, columns: Mapping[str, str], meta: Mapping[str, Any] | None = None
+) -> None:
+    """Создать пустой файл с заголовком (существующий перезаписывается)."""
+    header = json.dumps(
+        {"columns": list(columns.items()), "meta": dict(meta or {})},
+        ensure_ascii=False,
+    ).encode("utf-8")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as f:
+        f.write(MAGIC)
+        f.write(_HEADER_LEN.pack(len(header)))
+        f.write(header)
+
+
+def append(path: Path, arrays: Mapping[str, np.ndarray]) -> None:
+    """Дописать блок. Колонки — в порядке заголовка, одинаковой длины."""
+    columns, _ = read_header(path)
+    n = len(next(iter(arrays.values())))
+    with path.open("ab") as f:
+        f.write(_BLOCK_LEN.pack(n))
+        for name, dtype in columns:
+            column = np.ascontiguousarray(arrays[name], dtype=dtype)
+            if len(column) != n:
+                raise ValueError(f"Колонка {name}: {len(column)} строк вместо {n}")
+            f.write(column.tobytes())
+
+
+def write(
+    path: Path,
+    arrays: Mapping[str, np.ndarray],
+    columns: Mapping[str, str] = MARKET_COLUMNS,
+    meta: Mapping[str, Any] | None = None,
+) -> None:
+    """Создать файл и записать один блок."""
+    create(path, columns, meta)
+    append(path, arrays)
+
+
+def read_header(path: Path) -> tuple[list[tuple[str, str]], dict[str, Any]]:
+    """Колонки [(имя, dtype)] и метаданные файла."""
+    with path.open("rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: не тиковый файл")
+        (size,) = _HEADER_LEN.unpack(f.read(_HEADER_LEN.size))
+        header = json.loads(f.read(size))
+    return [tuple(c) for c in header["columns"]], header["meta"]  # type: ignore[misc]
+
+
+def read(path: Path) -> tuple[dict[str, np.ndarray], dict[str, Any]]:
+    """Прочитать все колонки (через mmap) и метаданные."""
+    columns, meta = read_header(path)
+    dtypes = [(name, np.dtype(dtype)) for name, dtype in columns]
+    with path.open("rb") as f:
+        size = path.stat().st_size
+        if size == 0:
+            raise ValueError(f"{path}: пустой файл")
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    (header_size,) = _HEADER_LEN.unpack_from(buf, len(MAGIC))
+    offset = len(MAGIC) + _HEADER_LEN.size + header_size
+    blocks: dict[str, list[np.ndarray]] = {name: [] for name, _ in dtypes}
+    while offset + _BLOCK_LEN.size <= size:
+        (n,) = _BLOCK_LEN.unpack_from(buf, offset)
+        offset += _BLOCK_LEN.size
+        end = offset + sum(n * dtype.itemsize for _, dtype in dtypes)
+        if end > size:
+            break  # недописанный хвост (запись прервалась)
+        for name, dtype in dtypes:
+            column = np.frombuffer(buf, dtype=dtype, count=n, offset=offset)
+            blocks[name].append(column)
+            offset += n * dtype.itemsize
+    result: dict[str, np.ndarray] = {}
+    for name, dtype in dtypes:
+        parts = blocks[name]
+        if len(parts) == 1:
+            result[name] = parts[0]  # без копирования — вид на mmap
+        else:
+            result[name] = np.concatenate(parts) if parts else np.empty(0, dtype)
+    return result, meta
@@ -0,0 +1,191 @@
+"""Приём обновлений Telegram через webhook вместо long polling.
+
+В режиме webhook Telegram сам присылает каждое обновление POST-запросом
+на WEBHOOK_URL: команда не ждёт очередного цикла getUpdates, а бот не
+обязан быть единственным потребителем обновлений. Локальный HTTP-сервер
+работает в том же event loop, что и TradingScheduler, сверяет заголовок
+X-Telegram-Bot-Api-Secret-Token и передаёт обновление приложению.
+Обработчики выполняются параллельно, но не более WEBHOOK_MAX_CONCURRENT
+одновременно: когда все слоты заняты, ответ Telegram задерживается, и
+тот не шлёт больше WEBHOOK_MAX_CONNECTIONS обновлений сразу.
+
+TLS завершается на обратном прокси (nginx и т. п.): Telegram принимает
+только HTTPS на портах 443, 80, 88 и 8443, сервер слушает HTTP локально.
+"""
+
+import asyncio
+import contextlib
+import hmac
+import json
+import logging
+import secrets
+import signal
+from urllib.parse import urlsplit
+
+from telegram import Update
+from telegram.ext import Application
+
+from bot.config import settings
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+_MAX_BODY = 1 << 20  # обновление Telegram заметно меньше мегабайта
+_END_OF_HEADERS = (b"\r\n", b"\n", b"")
+_STATUS = {
+    200: "OK",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+}
+
+
+class WebhookServer:
+    """HTTP-сервер, принимающий обновления Telegram."""
+
+    def __init__(
+        self,
+        app: Application,
+        path: str,
+        secret: str,
+        max_concurrent: int | None = None,
+    ) -> None:
+        self.app = app
+        self.path = path or "/"
+        self.secret = secret.encode()
+        self._slots = asyncio.Semaphore(
+            max_concurrent or settings.webhook_max_concurrent
+        )
+        self._tasks: set[asyncio.Task[None]] = set()
+        # Открытые соединения: при остановке закрываются, их обработчики ждём
+        self._connections: dict[asyncio.Task[None], asyncio.StreamWriter] = {}
+        self._server: asyncio.Server | None = None
+
+    async def start(self, host: str, port: int) -> None:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        logger.info("🌐 Webhook: http://%s:%d%s", host, port, self.path)
+
+    async def stop(self) -> None:
+        """Перестать принимать обновления и дождаться начатых обработчиков."""
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for writer in self._connections.values():
+            writer.close()
+        await asyncio.gather(
+            *self._connections, *self._tasks, return_exceptions=True
+        )
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        # Telegram держит соединения открытыми (keep-alive): читаем запросы подряд
+        task = asyncio.current_task()
+        assert task is not None
+        self._connections[task] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers: dict[str, str] = {}
+                while (line := await reader.readline()) not in _END_OF_HEADERS:
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", "0"))
+                if length > _MAX_BODY:
+                    await _respond(writer, 413)
+                    break
+                body = await reader.readexactly(length)
+                status = await self._dispatch(method, target, headers, body)
+                await _respond(writer, status)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+
+    async def _dispatch(
+        self, method: str, target: str, headers: dict[str, str], body: bytes
+    ) -> int:
+        if urlsplit(target).path != self.path:
+            return 404
+        if method != "POST":
+            return 405
+        token = headers.get(SECRET_HEADER, "").encode("latin-1")
+        if not hmac.compare_digest(token, self.secret):
+            logger.warning("Webhook: запрос с неверным секретом отклонён")
+            return 403
+        try:
+            update = Update.de_json(json.loads(body), self.app.bot)
+        except (ValueError, TypeError, KeyError, AttributeError):
+            return 400
+        if update is None:
+            return 400
+        # Свободного слота ждём до ответа: Telegram не получит 200 и не
+        # пришлёт следующее обновление по этому соединению
+        await self._slots.acquire()
+        task = asyncio.create_task(self._process(update), name="webhook-update")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return 200
+
+    async def _process(self, update: Update) -> None:
+        try:
+            await self.app.process_update(update)
+        finally:
+            self._slots.release()
+
+
+async def _respond(writer: asyncio.StreamWriter, status: int) -> None:
+    writer.write(
+        f"HTTP/1.1 {status} {_STATUS[status]}\r\nContent-Length: 0\r\n\r\n".encode()
+    )
+    await writer.drain()
+
+
+async def run_webhook(app: Application) -> None:
+    """Жизненный цикл приложения в режиме webhook (вместо run_polling).
+
+    Порядок тот же, что у run_polling: initialize, post_init, приём
+    обновлений, start; при остановке — в обратном порядке с post_stop и
+    post_shutdown. Работает до SIGINT / SIGTERM.
+    """
+    url = settings.webhook_url
+    secret = settings.webhook_secret or secrets.token_urlsafe(32)
+    server = WebhookServer(app, urlsplit(url).path, secret)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        with contextlib.suppress(NotImplementedError):  # Windows
+            loop.add_signal_handler(sig, stop.set)
+
+    await app.initialize()
+    try:
+        if app.post_init is not None:
+            await app.post_init(app)
+        await server.start(settings.webhook_host, settings.webhook_port)
+        await app.bot.set_webhook(
+            url,
+            secret_token=secret,
+            max_connections=settings.webhook_max_connections,
+            drop_pending_updates=True,
+        )
+        await app.start()
+        try:
+            await stop.wait()
+        finally:
+            await server.stop()
+            await app.stop()
+            if app.post_stop is not None:
+                await app.post_stop(app)
+    finally:
+        await app.shutdown()
+        if app.post_shutdown is not None:
+            await app.post_shutdown(app)